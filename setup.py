@@ -8,8 +8,9 @@ setup(name='SystemView',
 	author_email='bbands@gmail.com',
 	license='MIT',
 	packages=['matplotlib', 'numpy'],
+	python_requires='>=3.7',
 	install_requires=[
-		'numpy',
+		'numpy>=1.20',
 		'matplotlib',
 	],
 	data_files=[('sample_data', ['spx.csv'])],
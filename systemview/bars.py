@@ -0,0 +1,136 @@
+"""
+DESCRIPTION
+    Columnar storage for SystemView price bars
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import numpy as np                                  # numpy
+
+# field name, data type and initial value for each column
+# 0 = date, 1 = open, 2 = high, 3 = low, 4 = close, 5 = volume,
+# 6 = indicator 1, 7 = indicator 2, 8 = signal and 9 = equity curve
+# 10 = TimeInDD and 11 = underwater, the fraction equity is below its peak
+FIELDS = (
+    ('date', 'datetime64[D]', 'NaT'),
+    ('open', np.float64, 0.0),
+    ('high', np.float64, 0.0),
+    ('low', np.float64, 0.0),
+    ('close', np.float64, 0.0),
+    ('volume', np.int64, 0),
+    ('indicator1', np.float64, 0.0),
+    ('indicator2', np.float64, 0.0),
+    ('signal', np.int8, 0),
+    ('equity', np.float64, 1.0),
+    ('timeInDD', np.int64, 0),
+    ('underwater', np.float64, 0.0),
+)
+
+# the fields read from a data file, the rest are calculated
+PRICE_FIELDS = ('date', 'open', 'high', 'low', 'close', 'volume')
+
+def _timestamp(value):
+    """A date or time string or datetime64 as datetime64 in its own unit."""
+    if isinstance(value, str):
+        value = value.strip().replace(' ', 'T')
+    return np.datetime64(value)
+
+class Bars(object):
+    """Price bars held as one typed NumPy array per field."""
+    def __init__(self, length=0):
+        self.names = [name for name, dtype, initial in FIELDS]
+        for name, dtype, initial in FIELDS:
+            setattr(self, name, np.full(length, initial, dtype=dtype))
+
+    @classmethod
+    def fromColumns(cls, date, open, high, low, close, volume):
+        """Build bars from price columns, sorted in ascending date order.
+        Columns of the right type, memory-mapped ones included, are shared.
+        Dates may be whole days or timestamps in any datetime64 unit."""
+        bars = cls(len(date))
+        # columns that already have the right type are used without a copy
+        for name, values in zip(PRICE_FIELDS, (date, open, high, low, close, volume)):
+            dtype = getattr(bars, name).dtype
+            if name == 'date' and np.asarray(values).dtype.kind == 'M':
+                dtype = np.asarray(values).dtype
+            setattr(bars, name, np.asarray(values, dtype=dtype))
+        # Reverse if data is in reverse order
+        if len(bars) > 1 and bars.date[0] > bars.date[1]:
+            for name in bars.names:
+                setattr(bars, name, np.ascontiguousarray(getattr(bars, name)[::-1]))
+        return bars
+
+    def column(self, name):
+        """Return a column by name."""
+        if name not in self.names:
+            raise KeyError("no column named {0}".format(name))
+        return getattr(self, name)
+
+    def setColumn(self, name, values, dtype=np.float64):
+        """Store values in a column, adding the column if it is new."""
+        if name not in self.names:
+            self.names.append(name)
+            setattr(self, name, np.zeros(len(self), dtype=dtype))
+        getattr(self, name)[:] = values
+
+    def window(self, start=None, end=None):
+        """Slice the bars from start to end inclusive, found by binary search
+        on the date column. Dates are "yyyy-mm-dd" or "yyyy-mm-dd hh:mm"
+        strings or datetime64, None or "" leaves that side open. end takes
+        in the whole of its last day, minute and so on. The slice shares
+        memory with these bars."""
+        first, last = 0, len(self)
+        if start is not None and start != "":
+            first = np.searchsorted(self.date, _timestamp(start), side='left')
+        if end is not None and end != "":
+            end = _timestamp(end)
+            last = np.searchsorted(self.date, end + np.timedelta64(1, np.datetime_data(end.dtype)[0]),
+                side='left')
+        return self[first:last]
+
+    def fresh(self):
+        """New bars sharing the price columns of these bars, with every
+        calculated column reset to its initial value."""
+        bars = Bars(len(self))
+        for name in PRICE_FIELDS:
+            setattr(bars, name, getattr(self, name))
+        return bars
+
+    def append(self, date, open, high, low, close, volume):
+        """Add a bar at the end, its calculated columns get their initial
+        values. Storage grows by doubling, so appending is amortized O(1)."""
+        length = len(self)
+        buffers = getattr(self, '_buffers', None)
+        if buffers is None or sorted(buffers) != sorted(self.names) \
+                or len(buffers['date']) == length:
+            capacity = max(16, 2 * length)
+            buffers = {}
+            for name in self.names:
+                column = getattr(self, name)
+                buffers[name] = np.empty(capacity, dtype=column.dtype)
+                buffers[name][:length] = column
+            self._buffers = buffers
+        for name in self.names:
+            setattr(self, name, buffers[name][:length + 1])
+        initial = dict((name, value) for name, dtype, value in FIELDS)
+        for name in self.names:
+            getattr(self, name)[length] = initial.get(name, 0)
+        for name, value in zip(PRICE_FIELDS, (date, open, high, low, close, volume)):
+            getattr(self, name)[length] = value
+
+    def __len__(self):
+        return len(self.date)
+
+    def __getitem__(self, key):
+        """Slice the bars, sharing memory with the original columns."""
+        if not isinstance(key, slice):
+            raise TypeError("Bars can only be sliced")
+        bars = Bars.__new__(Bars)
+        bars.names = list(self.names)
+        for name in self.names:
+            setattr(bars, name, getattr(self, name)[key])
+        return bars
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+"""
+DESCRIPTION
+    SystemView benchmark suite
+
+    Times every stage of the calculation chain, from loading a csv file
+    to drawing a chart, on synthetic random-walk bars of increasing
+    length. Signals can be taken from the moving average or supplied at
+    a set density, so trade-heavy runs can be timed too. The timings are
+    written as json and can be compared against a stored baseline.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import json                                         # report file
+import os                                           # file names
+import platform                                     # machine description
+import shutil                                       # remove temporary files
+import sys                                          # exit status
+import tempfile                                     # temporary csv files
+import timeit                                       # best available timer
+import numpy as np                                  # numpy
+import matplotlib                                   # matplotlib
+matplotlib.use('Agg')                               # no display needed
+import matplotlib.pyplot as plt                     # pyplot
+# import our system variables from parameters.py
+import parameters as param
+from bars import Bars
+import loader
+from systemview import View
+
+# stages timed for every run, in order
+STAGES = ('load', 'loadCached', 'indicator', 'signals', 'trades', 'mae', 'efficiency',
+    'volatility', 'equity', 'drawdown', 'render')
+
+# timings below this many seconds are too noisy to call a regression
+NOISE = 0.001
+
+def random_walk(rows, seed=None, volatility=0.01, start='1900-01-01'):
+    """Bars of a geometric random walk on business days from start."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0, volatility, rows)))
+    open = np.empty(rows)
+    open[0] = 100.0
+    open[1:] = close[:-1]
+    spread = np.abs(rng.normal(0.0, volatility / 2, (2, rows)))
+    high = np.maximum(open, close) * (1 + spread[0])
+    low = np.minimum(open, close) * (1 - spread[1])
+    volume = rng.integers(1000, 1000000, rows)
+    date = np.busday_offset(np.datetime64(start, 'D'), np.arange(rows), roll='forward')
+    return Bars.fromColumns(date, open, high, low, close, volume)
+
+def signal_column(rows, density, seed=None):
+    """Alternating buy and sell signals on about density of the bars,
+    chosen at random."""
+    rng = np.random.default_rng(seed)
+    where = np.flatnonzero(rng.random(rows) < density)
+    signal = np.zeros(rows)
+    signal[where] = np.where(np.arange(len(where)) % 2 == 0, 1.0, -1.0)
+    return signal
+
+def write_csv(fileName, bars):
+    """Write bars as a csv file loader.load_csv can read."""
+    with open(fileName, 'w') as target:
+        target.write("Date,Open,High,Low,Close,Volume\n")
+        for row in zip(bars.date.astype(str).tolist(), bars.open.tolist(), bars.high.tolist(),
+                bars.low.tolist(), bars.close.tolist(), bars.volume.tolist()):
+            target.write("{0},{1!r},{2!r},{3!r},{4!r},{5}\n".format(*row))
+
+def best_time(function, repeat=3):
+    """Shortest of repeat timed calls of function."""
+    times = []
+    for i in range(repeat):
+        begin = timeit.default_timer()
+        function()
+        times.append(timeit.default_timer() - begin)
+    return min(times)
+
+def render(view):
+    """Draw the equity curve off screen."""
+    view.showCharts = False
+    fig = view.displayEquityCurve()
+    fig.canvas.draw()
+    plt.close(fig)
+
+def time_stages(rows, density=None, indLength=21, repeat=3, seed=1, renderRows=10**6,
+        loadRows=10**6):
+    """Time each stage on rows synthetic bars. density is the share of
+    bars with a supplied signal, None for moving average signals. Files
+    aren't loaded above loadRows bars, charts aren't drawn above
+    renderRows. Returns a list of result dictionaries, one per stage."""
+    bars = random_walk(rows, seed)
+    times = {}
+    if rows <= loadRows:
+        directory = tempfile.mkdtemp()
+        try:
+            fileName = os.path.join(directory, 'bench.csv')
+            write_csv(fileName, bars)
+            times['load'] = best_time(lambda: loader.load_csv(fileName, cache=False), repeat)
+            loader.load_csv(fileName)
+            times['loadCached'] = best_time(lambda: loader.load_csv(fileName), repeat)
+        finally:
+            shutil.rmtree(directory)
+    view = View()
+    view.setData(bars)
+    strategy = 'ma_turn'
+    if density is not None:
+        view.myData.setColumn('external', signal_column(rows, density, seed))
+        strategy = 'column'
+    stages = [
+        ('indicator', lambda: view.calcIndicator(indLength)),
+        ('signals', lambda: view.calcSignals(indLength, strategy=strategy)),
+        ('trades', lambda: view.calcTrades(indLength)),
+        ('mae', lambda: view.calcMAE(indLength)),
+        ('efficiency', lambda: view.calcEfficiency(indLength)),
+        ('volatility', lambda: view.calcVolatility(indLength)),
+        ('equity', view.calcEquityCurve),
+        ('drawdown', view.calcTimeInDrawdown),
+    ]
+    if rows <= renderRows:
+        stages.append(('render', lambda: render(view)))
+    for stage, function in stages:
+        times[stage] = best_time(function, repeat)
+    return [{'rows': rows, 'density': density, 'stage': stage, 'seconds': times[stage],
+        'trades': len(view.trades)} for stage in STAGES if stage in times]
+
+def run(sizes, densities=(None,), repeat=3, seed=1, renderRows=10**6, loadRows=10**6):
+    """Time every stage for each size and signal density.
+    Returns the report, a json-ready dictionary."""
+    results = []
+    for rows in sizes:
+        for density in densities:
+            results.extend(time_stages(rows, density, repeat=repeat, seed=seed,
+                renderRows=renderRows, loadRows=loadRows))
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.platform(),
+        'results': results,
+    }
+
+def _result_key(result):
+    """What identifies a timing across reports."""
+    return (result['rows'], result['density'], result['stage'])
+
+def compare(report, baseline, tolerance=0.2):
+    """Timings more than tolerance slower than in the baseline report.
+    Returns a list of (result, baseline seconds)."""
+    before = dict((_result_key(result), result['seconds']) for result in baseline['results'])
+    slower = []
+    for result in report['results']:
+        seconds = before.get(_result_key(result))
+        if seconds is None or max(result['seconds'], seconds) < NOISE:
+            continue
+        if result['seconds'] > seconds * (1 + tolerance):
+            slower.append((result, seconds))
+    return slower
+
+def print_report(report, baseline=None):
+    """Print the timings, against the baseline if there is one."""
+    before = {}
+    if baseline is not None:
+        before = dict((_result_key(result), result['seconds']) for result in baseline['results'])
+    print("    Rows  Density  Stage         Trades   Seconds  Baseline")
+    for result in report['results']:
+        density = "-" if result['density'] is None else "{0:.3f}".format(result['density'])
+        seconds = before.get(_result_key(result))
+        print("{0:8d}  {1:>7s}  {2:12s} {3:7d} {4:9.4f}  {5}".format(result['rows'], density,
+            result['stage'], result['trades'], result['seconds'],
+            "" if seconds is None else "{0:8.4f}".format(seconds)))
+
+if __name__ == '__main__':
+    report = run(param.benchmarkSizes, param.benchmarkDensities, param.benchmarkRepeat)
+    baseline = None
+    if param.benchmarkBaseline and os.path.exists(param.benchmarkBaseline):
+        with open(param.benchmarkBaseline, 'r') as source:
+            baseline = json.load(source)
+    print_report(report, baseline)
+    if param.benchmarkReport:
+        with open(param.benchmarkReport, 'w') as target:
+            json.dump(report, target, indent=2, sort_keys=True)
+    if baseline is not None:
+        slower = compare(report, baseline, param.benchmarkTolerance)
+        for result, seconds in slower:
+            print("slower: {0} rows {1} {2:.4f}s against {3:.4f}s".format(result['rows'],
+                result['stage'], result['seconds'], seconds))
+        if slower:
+            sys.exit(1)
+
+# That's all folks!
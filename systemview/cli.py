@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+"""
+DESCRIPTION
+    SystemView command line
+
+    Runs one system from the command line and prints its summary
+    statistics, as text or json. Settings start from parameters.py, are
+    replaced by those in a config file and then by the command line
+    options, so cron jobs can score many configurations without editing
+    parameters.py. matplotlib is only loaded when charts or a report are
+    asked for, so a stats-only run starts quickly and needs no display.
+
+    python cli.py -f spx.csv -l 21 --json -
+    python cli.py -c system.py --set commission=0.001 --json stats.json
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import argparse                                     # command line
+import ast                                          # --set values
+import json                                         # config and stats files
+import os                                           # file names
+import runpy                                        # python config files
+import sys                                          # exit status
+# import our system variables from parameters.py
+import parameters as param
+import stagecache
+from systemview import View, enabled_charts, json_stats, dashboard
+
+# command line option, parameters.py name and help for the common settings
+OPTIONS = (
+    (('-f', '--file'), 'file1', "data file"),
+    (('--start',), 'start', "first date, yyyy-mm-dd[ hh:mm], \"\" for the whole file"),
+    (('--end',), 'endDate', "last date, yyyy-mm-dd[ hh:mm], \"\" for the whole file"),
+    (('-l', '--length'), 'maLength', "indicator length"),
+    (('--indicator',), 'indicator', "sma, ema or bollinger"),
+    (('--strategy',), 'strategy', "ma_turn, breakout, reversion or column"),
+    (('--stop',), 'stopLoss', "stop loss, a fraction of the entry price"),
+    (('--target',), 'profitTarget', "profit target, a fraction of the entry price"),
+    (('--size',), 'positionSize', "fraction of equity held in each position"),
+    (('--commission',), 'commission', "fraction of the value traded"),
+    (('--slippage',), 'slippage', "fraction of the value traded"),
+    (('--period',), 'barPeriod', "resample to bars of this length, e.g. 5m, 1h or 1D"),
+    (('--format',), 'dataFormat', "csv, yahoo, amibroker, parquet or feather"),
+)
+
+# switches, parameters.py name, the value they set and help
+SWITCHES = (
+    (('--short',), 'allowShort', True, "sell short on sell signals"),
+    (('--adjusted',), 'adjustedClose', True, "use the adjusted close"),
+    (('--no-cache',), 'cacheData', False, "parse the data file, don't use or write its binary cache"),
+)
+
+def default_settings():
+    """The settings in parameters.py as a dictionary."""
+    return dict((name, value) for name, value in vars(param).items()
+        if not name.startswith('_'))
+
+def read_config(fileName):
+    """Settings from a config file, json or python assignments in the
+    form of parameters.py."""
+    if os.path.splitext(fileName)[1].lower() == '.json':
+        with open(fileName, 'r') as source:
+            return json.load(source)
+    return dict((name, value) for name, value in runpy.run_path(fileName).items()
+        if not name.startswith('_'))
+
+def parse_value(text):
+    """A --set value as a python literal, or as a string if it isn't one."""
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+def parser():
+    """The command line parser."""
+    result = argparse.ArgumentParser(description="Run a trading system and print its statistics.")
+    result.add_argument('-c', '--config', help="config file, json or in the form of parameters.py")
+    for flags, name, text in OPTIONS:
+        current = getattr(param, name)
+        kind = parse_value if isinstance(current, (int, float)) else str
+        result.add_argument(*flags, dest=name, type=kind, help=text)
+    for flags, name, value, text in SWITCHES:
+        result.add_argument(*flags, dest=name, action='store_const', const=value, help=text)
+    result.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+        help="any other parameters.py setting, may be repeated")
+    result.add_argument('--json', metavar='FILE',
+        help="write the summary statistics as json to FILE, - for standard output")
+    result.add_argument('--charts', action='store_true',
+        help="show the charts enabled in the settings, in one window unless dashboard is off")
+    result.add_argument('--report', metavar='DIR', help="write the enabled charts to DIR")
+    return result
+
+def settings_from(args):
+    """The settings for a run: parameters.py, then the config file, then
+    the command line."""
+    settings = default_settings()
+    if args.config:
+        settings.update(read_config(args.config))
+    for name in [option[1] for option in OPTIONS + SWITCHES]:
+        if getattr(args, name) is not None:
+            settings[name] = getattr(args, name)
+    for assignment in args.set:
+        name, equals, value = assignment.partition('=')
+        if not equals:
+            raise ValueError("--set needs NAME=VALUE, not {0}".format(assignment))
+        settings[name.strip()] = parse_value(value.strip())
+    return settings
+
+def run(settings):
+    """Load the data and run the whole calculation chain with settings.
+    Returns the View."""
+    s = argparse.Namespace(**settings)
+    view = View()
+    view.getData(s.file1, s.cacheData, s.start, s.endDate, s.barPeriod, s.chunkRows,
+        s.dataFormat, s.dataColumns, s.adjustedClose)
+    if s.stageCacheDir:
+        view.cache = stagecache.StageCache(s.stageCacheDir, diskBytes=s.stageCacheBytes)
+    view.calcAll(s.maLength, s.indicator, s.strategy, s.stopLoss, s.profitTarget,
+        s.allowShort, s.positionSize, s.commission, s.slippage)
+    return view
+
+def write_json(stats, fileName):
+    """Write the statistics as json to a file, or to standard output for -.
+    Statistics that can't be calculated are written as null."""
+    stats = json_stats(stats)
+    if fileName == '-':
+        json.dump(stats, sys.stdout, indent=2, sort_keys=True, allow_nan=False)
+        print()
+    else:
+        with open(fileName, 'w') as target:
+            json.dump(stats, target, indent=2, sort_keys=True, allow_nan=False)
+
+def main(argv=None):
+    """Run from the command line, returns the exit status."""
+    args = parser().parse_args(argv)
+    try:
+        settings = settings_from(args)
+        view = run(settings)
+    except (ValueError, KeyError, IOError, OSError) as error:
+        print("systemview: {0}".format(error), file=sys.stderr)
+        return 1
+    if args.json:
+        write_json(view.summaryStats(), args.json)
+    if args.json != '-':
+        view.printResults()
+    charts = enabled_charts(argparse.Namespace(**settings))
+    if args.report:
+        # imported here, report sets a non-interactive backend
+        import report
+        name = os.path.splitext(os.path.basename(settings['file1']))[0]
+        for fileName in report.write_reports({name: view}, args.report, charts,
+                settings['reportFormats']):
+            print(fileName, file=sys.stderr if args.json == '-' else sys.stdout)
+    elif args.charts and settings['dashboard']:
+        s = argparse.Namespace(**settings)
+        panels, side = dashboard.enabled_panels(s)
+        view.displayDashboard(panels, side, s.distance, s.priceIndicators, s.rollingTrades,
+            s.rollingBars, s.monteCarloBandPaths, s.monteCarloMethod, s.monteCarloSeed)
+    elif args.charts:
+        for method, arguments in charts:
+            getattr(view, method)(*arguments)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+# That's all folks!
@@ -0,0 +1,348 @@
+"""
+DESCRIPTION
+    SystemView dashboard
+
+    Every enabled chart in one window. The charts that run along time are
+    stacked on a shared date axis, so zooming or panning one moves them
+    all, and their long series are decimated again for each new range,
+    see decimate.py. Per-trade charts plot each trade at its entry date.
+    The summary results and the charts that aren't along time sit beside
+    them.
+
+    Clicking near a trade, or the left and right arrow keys, highlights
+    that trade in every chart. The highlight is animated and blitted over
+    a copy of the last full draw, so moving it redraws only the highlight
+    and not the charts beneath it. Escape clears it.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import numpy as np                                  # numpy
+import matplotlib.pyplot as plt                     # pyplot
+import matplotlib.dates as mdates                   # date axis
+import matplotlib.ticker as ticker                  # log axis labels
+from matplotlib.patches import Rectangle            # trade highlight
+import decimate
+import montecarlo
+
+# parameters.py chart flag and dashboard panel for each chart along time,
+# top to bottom
+PANELS = (
+    ('displayPriceTradesGraph', 'priceTrades'),
+    ('displayPriceGraph', 'price'),
+    ('displayEquityCurveLog', 'equityLog'),
+    ('displayEquityCurve', 'equity'),
+    ('displayDrawdownGraph', 'drawdown'),
+    ('displayTimeInDrawDown', 'timeInDrawdown'),
+    ('displayTradeGraph', 'returns'),
+    ('displayMAE', 'mae'),
+    ('displayEfficiency', 'efficiency'),
+    ('displayInTradeVol', 'volatility'),
+    ('displayRollingStats', 'rollingStats'),
+    ('displayRollingDrawdown', 'rollingDrawdown'),
+)
+
+# parameters.py chart flag and dashboard panel for each chart beside them
+SIDE_PANELS = (
+    ('displayDistribution', 'distribution'),
+    ('displayTradesVersusTime', 'tradesVersusTime'),
+    ('displayMonteCarlo', 'monteCarlo'),
+)
+SIDE_NAMES = [name for flag, name in SIDE_PANELS]
+
+# panels left out when the panel they are a plainer version of is shown
+SUPERSEDED = {'price': 'priceTrades', 'equity': 'equityLog'}
+
+# colour of the highlighted trade
+HIGHLIGHT = 'orange'
+
+def enabled_panels(params):
+    """The panels along time and beside them for the charts switched on
+    in params."""
+    panels = [name for flag, name in PANELS if getattr(params, flag)]
+    panels = [name for name in panels if SUPERSEDED.get(name) not in panels]
+    return panels, [name for flag, name in SIDE_PANELS if getattr(params, flag)]
+
+class Dashboard(object):
+    """All of a View's charts in one window with a trade highlighted
+    across them."""
+    def __init__(self, view, panels, side=(), distance=0.2, overlays=(),
+            rollingTrades=50, rollingBars=252, monteCarloPaths=1000,
+            monteCarloMethod='bootstrap', monteCarloSeed=None):
+        self.view = view
+        self.distance = distance            # distance of trade markers from price
+        self.overlays = overlays            # indicator columns over price
+        self.rollingTrades = rollingTrades  # window of the rolling statistics
+        self.rollingBars = rollingBars      # window of the rolling drawdowns
+        self.monteCarlo = (monteCarloPaths, monteCarloMethod, monteCarloSeed)
+        entry, exit = view.tradeBars()
+        self.entry = view.myData.date[entry]    # entry date of each trade
+        self.exit = view.myData.date[exit]      # exit date of each trade
+        self.returns = np.array([row[1] for row in view.trades], dtype=np.float64)
+        self.length = np.array([row[2] for row in view.trades], dtype=np.int64)
+        self.values = {}        # per-trade values of each trade panel
+        self.axes = {}          # axes of each panel
+        self.markers = []       # (artist, panel) marking the highlighted trade
+        self.selected = None    # number of the highlighted trade
+        self.background = None  # the figure without the highlight
+        self.fig = plt.figure(figsize=(14, 10))
+        self.fig.suptitle("John Bollinger's Trade Visualization")
+        grid = self.fig.add_gridspec(1, 2, width_ratios=(3, 1) if side else (5, 1))
+        left = grid[0].subgridspec(max(len(panels), 1), 1, hspace=0.1)
+        first = None
+        for row, name in enumerate(panels):
+            ax = self.fig.add_subplot(left[row], sharex=first)
+            if first is None:
+                first = ax
+            getattr(self, 'panel' + name[0].upper() + name[1:])(ax)
+            ax.grid(True)
+            if row < len(panels) - 1:
+                ax.tick_params(labelbottom=False)
+            self.axes[name] = ax
+        if first is not None:
+            view.formatDateAxis(ax)
+            first.set_xlim(view.myData.date[0], view.myData.date[-1])
+        right = grid[1].subgridspec(len(side) + 1, 1, hspace=0.4)
+        text = self.fig.add_subplot(right[0])
+        text.axis('off')
+        text.text(0, 1, "\n".join(view.resultsText()), va='top', family='monospace', fontsize='small')
+        for row, name in enumerate(side):
+            ax = self.fig.add_subplot(right[row + 1])
+            getattr(self, 'panel' + name[0].upper() + name[1:])(ax)
+            ax.grid(True)
+            self.axes[name] = ax
+        self.makeMarkers()
+        canvas = self.fig.canvas
+        canvas.mpl_connect('draw_event', self.onDraw)
+        canvas.mpl_connect('button_press_event', self.onClick)
+        canvas.mpl_connect('key_press_event', self.onKey)
+
+    def panelPrice(self, ax, markers=False):
+        """Price, log-scale, with trade markers if markers."""
+        data = self.view.myData
+        curve = data.close
+        signal = data.signal
+        ax.set_ylabel("price (log)")
+        ax.set_yscale('log')
+        if markers:
+            # keep the bars with markers when decimating price
+            decimate.plot(ax, data.date, curve, keep=np.flatnonzero(signal))
+            buys = np.flatnonzero(signal == 1)
+            sells = np.flatnonzero(signal == -1)
+            ax.plot(data.date[buys], curve[buys] / (1 + self.distance), 'g^')
+            ax.plot(data.date[sells], curve[sells] * (1 + self.distance), 'rv')
+        else:
+            decimate.plot(ax, data.date, curve)
+        for name in self.overlays:
+            decimate.plot(ax, data.date, data.column(name), linewidth=0.8)
+        ax.yaxis.set_major_formatter(ticker.FormatStrFormatter("%d "))
+
+    def panelPriceTrades(self, ax):
+        """Price with trade markers."""
+        self.panelPrice(ax, True)
+
+    def panelEquity(self, ax, log=False):
+        """The equity curve."""
+        ax.set_ylabel("equity (log)" if log else "equity")
+        if log:
+            ax.set_yscale('log')
+            ax.yaxis.set_major_formatter(ticker.FormatStrFormatter("%d "))
+        decimate.plot(ax, self.view.myData.date, self.view.myData.equity)
+
+    def panelEquityLog(self, ax):
+        """The equity curve, log-scale."""
+        self.panelEquity(ax, True)
+
+    def panelDrawdown(self, ax):
+        """The underwater curve with the deepest trough marked."""
+        curve = self.view.myData.underwater
+        dates = self.view.myData.date
+        troughs = self.view.episodes['trough']
+        ax.set_ylabel("drawdown")
+        decimate.plot(ax, dates, curve, keep=troughs, color='blue')
+        if len(troughs):
+            deepest = troughs[np.argmin(self.view.episodes['depth'])]
+            ax.plot(dates[deepest], curve[deepest], 'o', color='red')
+        ax.set_ylim(top=0)
+
+    def panelTimeInDrawdown(self, ax):
+        """Time spent in drawdown."""
+        ax.set_ylabel("time in dd")
+        decimate.plot(ax, self.view.myData.date, self.view.myData.timeInDD)
+
+    def tradePanel(self, ax, name, values, label):
+        """A per-trade value as a line from zero at each entry date."""
+        self.values[name] = np.asarray(values, dtype=np.float64)
+        ax.set_ylabel(label)
+        decimate.stems(ax, self.entry, self.values[name], color='blue')
+
+    def panelReturns(self, ax):
+        """Trade returns."""
+        self.tradePanel(ax, 'returns', self.returns, "returns")
+
+    def panelMae(self, ax):
+        """Maximum Adverse Excursions."""
+        self.tradePanel(ax, 'mae', [row[1] for row in self.view.mae], "MAE")
+
+    def panelEfficiency(self, ax):
+        """Trade efficiencies."""
+        self.tradePanel(ax, 'efficiency', [row[1] for row in self.view.efficiency], "efficiency")
+
+    def panelVolatility(self, ax):
+        """In-trade volatilities."""
+        self.tradePanel(ax, 'volatility', [row[1] for row in self.view.inTradeVol], "volatility")
+
+    def panelRollingStats(self, ax):
+        """Expectancy over the last rollingTrades trades in blue and over
+        all trades so far in red."""
+        self.view.calcRollingTrades(self.rollingTrades)
+        ax.set_ylabel("expectancy")
+        decimate.plot(ax, self.view.rollingTrades['date'], self.view.rollingTrades['expectancy'], color='blue')
+        decimate.plot(ax, self.view.expandingTrades['date'], self.view.expandingTrades['expectancy'], color='red')
+
+    def panelRollingDrawdown(self, ax):
+        """Max drawdown over the last rollingBars bars in blue and over all
+        bars so far in red."""
+        self.view.calcRollingBars(self.rollingBars)
+        ax.set_ylabel("max dd")
+        decimate.plot(ax, self.view.rollingBars['date'], self.view.rollingBars['maxDrawdown'], color='blue')
+        decimate.plot(ax, self.view.expandingBars['date'], self.view.expandingBars['maxDrawdown'], color='red')
+
+    def panelDistribution(self, ax):
+        """Distribution of returns, winners green and losers red."""
+        ax.set_xlabel("returns")
+        ax.set_ylabel("count")
+        if len(self.returns):
+            bins = np.arange(np.min(self.returns), np.max(self.returns) + 0.005, 0.005)
+            ax.hist(self.returns[self.returns >= 0.0], bins=bins, color='green')
+            ax.hist(self.returns[self.returns < 0.0], bins=bins, color='red')
+
+    def panelTradesVersusTime(self, ax):
+        """Returns versus trade length."""
+        ax.set_xlabel("trading days")
+        ax.set_ylabel("returns")
+        ax.scatter(self.length, self.returns, color='red', alpha=0.4)
+
+    def panelMonteCarlo(self, ax):
+        """Monte Carlo bands of the equity curve over the trades."""
+        paths, method, seed = self.monteCarlo
+        bands = montecarlo.equity_bands(self.returns, paths, (5, 25, 50, 75, 95), method, seed)
+        self.values['monteCarlo'] = np.cumprod(np.concatenate([[1.0], 1 + self.returns]))
+        x = np.arange(len(self.returns) + 1)
+        ax.set_xlabel("trades")
+        ax.set_ylabel("Monte Carlo (log)")
+        ax.set_yscale('log')
+        ax.fill_between(x, bands[0], bands[4], color='blue', alpha=0.15)
+        ax.fill_between(x, bands[1], bands[3], color='blue', alpha=0.3)
+        ax.plot(x, bands[2], color='blue')
+        ax.plot(x, self.values['monteCarlo'], color='red')
+
+    def makeMarkers(self):
+        """Make the hidden, animated artists that mark the highlighted
+        trade, so highlighting only moves them."""
+        for name, ax in self.axes.items():
+            if name == 'distribution':
+                artist = ax.axvline(0, color=HIGHLIGHT, linewidth=2)
+            elif name in ('tradesVersusTime', 'monteCarlo') or name in self.values:
+                artist, = ax.plot([], [], 'o', color=HIGHLIGHT, markeredgecolor='black')
+            else:
+                artist = None
+            if artist is not None:
+                self.markers.append((artist, name))
+            if name not in SIDE_NAMES:
+                # the holding period, in data units along x, full height
+                span = Rectangle((0, 0), 0, 1, transform=ax.get_xaxis_transform(),
+                    facecolor=HIGHLIGHT, edgecolor=HIGHLIGHT, alpha=0.3)
+                # add_artist leaves the data limits alone
+                ax.add_artist(span)
+                self.markers.append((span, 'span'))
+        for artist, name in self.markers:
+            artist.set_animated(True)
+            artist.set_visible(False)
+
+    def select(self, number):
+        """Highlight trade number, None to clear the highlight."""
+        if number is not None and not len(self.returns):
+            number = None
+        if number is not None:
+            number = min(max(number, 0), len(self.returns) - 1)
+        self.selected = number
+        for artist, name in self.markers:
+            artist.set_visible(number is not None)
+            if number is None:
+                continue
+            if name == 'span':
+                start, end = mdates.date2num([self.entry[number], self.exit[number]])
+                artist.set_x(start)
+                artist.set_width(end - start)
+            elif name == 'distribution':
+                artist.set_xdata([self.returns[number]] * 2)
+            elif name == 'tradesVersusTime':
+                artist.set_data([self.length[number]], [self.returns[number]])
+            elif name == 'monteCarlo':
+                artist.set_data([number + 1], [self.values[name][number + 1]])
+            else:
+                artist.set_data([mdates.date2num(self.entry[number])], [self.values[name][number]])
+        self.blit()
+
+    def blit(self, restore=True):
+        """Draw the highlight over the saved background."""
+        if self.background is None:
+            return
+        canvas = self.fig.canvas
+        if restore:
+            canvas.restore_region(self.background)
+        for artist, name in self.markers:
+            if artist.get_visible():
+                artist.axes.draw_artist(artist)
+        canvas.blit(self.fig.bbox)
+
+    def onDraw(self, event):
+        """Save the freshly drawn figure, then put the highlight back."""
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self.blit(False)
+
+    def tradeAt(self, name, x):
+        """The trade nearest to x in a per-trade panel, or the one held
+        at x elsewhere, the nearest one if none was."""
+        position = mdates.date2num(self.entry)
+        if name not in self.values:
+            held = np.searchsorted(position, x, side='right') - 1
+            if held >= 0 and x <= mdates.date2num(self.exit[held]):
+                return held
+        right = min(np.searchsorted(position, x), len(position) - 1)
+        left = max(right - 1, 0)
+        return left if abs(x - position[left]) <= abs(position[right] - x) else right
+
+    def onClick(self, event):
+        """Highlight the trade clicked on, unless zooming or panning."""
+        toolbar = self.fig.canvas.toolbar
+        if event.button != 1 or event.xdata is None or (toolbar is not None and toolbar.mode):
+            return
+        for name, ax in self.axes.items():
+            if ax is event.inaxes and len(self.returns):
+                if name == 'distribution':
+                    self.select(int(np.argmin(np.abs(self.returns - event.xdata))))
+                elif name == 'tradesVersusTime':
+                    distance = np.hypot((self.length - event.xdata) / np.ptp(ax.get_xlim()),
+                        (self.returns - event.ydata) / np.ptp(ax.get_ylim()))
+                    self.select(int(np.argmin(distance)))
+                elif name == 'monteCarlo':
+                    self.select(int(round(event.xdata)) - 1)
+                else:
+                    self.select(int(self.tradeAt(name, event.xdata)))
+
+    def onKey(self, event):
+        """Step through the trades with the arrow keys, escape to clear."""
+        if event.key == 'escape':
+            self.select(None)
+        elif event.key in ('left', 'right'):
+            step = 1 if event.key == 'right' else -1
+            if self.selected is None:
+                self.select(0 if step > 0 else len(self.returns) - 1)
+            else:
+                self.select(self.selected + step)
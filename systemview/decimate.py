@@ -0,0 +1,103 @@
+"""
+DESCRIPTION
+    Level-of-detail decimation for SystemView charts
+
+    Long series are cut down to the lowest and highest point in each of
+    about one bucket per horizontal pixel before they are drawn, so the
+    chart looks the same while matplotlib handles a few thousand points
+    instead of millions. Zooming re-decimates the visible range.
+    Per-trade values drawn as lines from zero are decimated the same way.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import numpy as np                                  # numpy
+
+def minmax_indices(y, first, last, buckets, keep=None):
+    """Indices of the points to draw between first and last: the first and
+    last point, the lowest and highest point of each bucket and any
+    indices in keep, in order."""
+    count = last - first
+    if count <= 2 * buckets:
+        return np.arange(first, last)
+    size = -(-count // buckets)
+    whole = count // size * size
+    block = y[first:first + whole].reshape(-1, size)
+    starts = np.arange(first, first + whole, size)
+    chosen = [[first, last - 1], starts + np.argmin(block, axis=1), starts + np.argmax(block, axis=1)]
+    if whole < count:
+        tail = y[first + whole:last]
+        chosen.append([first + whole + np.argmin(tail), first + whole + np.argmax(tail)])
+    if keep is not None:
+        chosen.append(keep[(keep >= first) & (keep < last)])
+    return np.unique(np.concatenate(chosen))
+
+class DecimatedLine(object):
+    """A line drawn with about two points per horizontal pixel that is
+    decimated again whenever the x-axis limits change."""
+    def __init__(self, ax, x, y, fmt='-', keep=None, **kwargs):
+        self.ax = ax
+        self.x = np.asarray(x)
+        self.y = np.asarray(y)
+        # positions on the x-axis for finding the visible range
+        if self.x.dtype.kind == 'M':
+            # imported here so importing this module doesn't load matplotlib
+            import matplotlib.dates as mdates
+            self.position = mdates.date2num(self.x)
+        else:
+            self.position = self.x.astype(np.float64)
+        self.keep = None if keep is None else np.unique(keep)
+        self.range = None   # range and bucket count last decimated
+        shown = self.select(0, len(self.x))
+        self.line = self.draw(shown, fmt, **kwargs)
+        ax.callbacks.connect('xlim_changed', lambda ax: self.update())
+
+    def draw(self, shown, fmt, **kwargs):
+        """Draw the points in shown, returns the artist."""
+        line, = self.ax.plot(self.x[shown], self.y[shown], fmt, **kwargs)
+        return line
+
+    def redraw(self, shown):
+        """Replace the points drawn with those in shown."""
+        self.line.set_data(self.x[shown], self.y[shown])
+
+    def select(self, first, last):
+        """Indices of the points to draw from first to last."""
+        buckets = max(1, int(self.ax.get_window_extent().width))
+        return minmax_indices(self.y, first, last, buckets, self.keep)
+
+    def update(self):
+        """Decimate the visible range, one point either side included."""
+        low, high = self.ax.get_xlim()
+        first = max(np.searchsorted(self.position, low) - 1, 0)
+        last = min(np.searchsorted(self.position, high, side='right') + 1, len(self.x))
+        # axes sharing x all call back whenever one of them changes
+        current = (first, last, int(self.ax.get_window_extent().width))
+        if current != self.range:
+            self.range = current
+            self.redraw(self.select(first, last))
+
+class DecimatedStems(DecimatedLine):
+    """Vertical lines from zero to each point, one per trade, decimated
+    like DecimatedLine so a long run of trades draws quickly."""
+    def draw(self, shown, fmt, **kwargs):
+        return self.ax.vlines(self.x[shown], 0, self.y[shown], **kwargs)
+
+    def redraw(self, shown):
+        x = self.position[shown]
+        zero = np.zeros(len(shown))
+        self.line.set_segments(np.stack([np.column_stack([x, zero]),
+            np.column_stack([x, self.y[shown]])], axis=1))
+
+def plot(ax, x, y, fmt='-', keep=None, **kwargs):
+    """Plot y against x on ax with decimation, returns the line."""
+    return DecimatedLine(ax, x, y, fmt, keep, **kwargs).line
+
+def stems(ax, x, y, keep=None, **kwargs):
+    """Draw vertical lines from zero to each y at x on ax with
+    decimation, returns the LineCollection."""
+    return DecimatedStems(ax, x, y, None, keep, **kwargs).line
@@ -0,0 +1,90 @@
+"""
+DESCRIPTION
+    Vectorized drawdown analytics for SystemView
+
+    Everything is measured against the running peak of the equity curve,
+    found with np.maximum.accumulate, so each function is a single O(N)
+    pass. The underwater curve is the fraction equity stands below its
+    peak, zero at a new high. An episode runs from the last bar at a peak
+    through the trough to the first bar back at that peak. The curve
+    functions work along the first axis, so a single curve or a time by
+    symbol array can be passed in.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import numpy as np                                  # numpy
+
+# one row per drawdown episode, bars are indices into the equity curve
+# recovery is -1 and duration counts to the last bar while still under water
+EPISODE_DTYPE = [
+    ('start', np.int64),        # last bar at the peak
+    ('trough', np.int64),       # lowest bar
+    ('recovery', np.int64),     # first bar back at the peak
+    ('depth', np.float64),      # fall from peak to trough, negative
+    ('duration', np.int64),     # bars from start to recovery
+]
+
+def peak(equity):
+    """The highest equity so far."""
+    return np.maximum.accumulate(np.asarray(equity, dtype=np.float64), axis=0)
+
+def underwater(equity):
+    """The fraction equity is below its peak, 0 at a new high."""
+    equity = np.asarray(equity, dtype=np.float64)
+    return equity / peak(equity) - 1
+
+def in_drawdown(equity):
+    """True where equity is below its peak."""
+    equity = np.asarray(equity, dtype=np.float64)
+    return equity < peak(equity)
+
+def time_in_drawdown(equity):
+    """Bars since the last peak, 0 at a new high."""
+    under = in_drawdown(equity)
+    rows = np.arange(len(under)).reshape((-1,) + (1,) * (under.ndim - 1))
+    return rows - np.maximum.accumulate(np.where(under, 0, rows), axis=0)
+
+def max_drawdown(equity):
+    """The deepest fall from a peak, negative or 0."""
+    curve = underwater(equity)
+    if len(curve) == 0:
+        return np.zeros(curve.shape[1:])
+    return curve.min(axis=0)
+
+def ulcer_index(equity):
+    """Root mean square of the underwater curve, Peter Martin's measure
+    of both the depth and the length of drawdowns."""
+    curve = underwater(equity)
+    if len(curve) == 0:
+        return np.zeros(curve.shape[1:])
+    return np.sqrt(np.mean(curve**2, axis=0))
+
+def episodes(equity):
+    """Table of every drawdown of a single equity curve, in order."""
+    curve = underwater(equity)
+    under = curve < 0
+    if not under.any():
+        return np.zeros(0, dtype=EPISODE_DTYPE)
+    # runs of bars under water, the bar before each run is at the peak
+    starting = under & ~np.concatenate([[False], under[:-1]])
+    begins = np.flatnonzero(starting)
+    ends = np.flatnonzero(under & ~np.concatenate([under[1:], [False]])) + 1
+    depth = np.minimum.reduceat(curve, begins)
+    # the first bar of each run at its lowest
+    rows = np.flatnonzero(under)
+    run = np.cumsum(starting)[rows] - 1
+    lowest = curve[rows] == depth[run]
+    run = run[lowest]
+    first = np.concatenate([[True], run[1:] != run[:-1]])
+    result = np.zeros(len(begins), dtype=EPISODE_DTYPE)
+    result['start'] = begins - 1
+    result['trough'] = rows[lowest][first]
+    result['recovery'] = np.where(ends < len(curve), ends, -1)
+    result['depth'] = depth
+    result['duration'] = np.where(ends < len(curve), ends, len(curve) - 1) - result['start']
+    return result
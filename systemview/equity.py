@@ -0,0 +1,85 @@
+"""
+DESCRIPTION
+    Vectorized equity engine for SystemView
+
+    Positions are carried forward from the last signal, long after a buy
+    and short or flat after a sell, scaled by the position size. Equity
+    is the running product of the position-weighted bar returns less the
+    commission and slippage paid whenever the position changes. Every
+    function works along the first axis, so a single symbol or a time by
+    symbol array can be passed in.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import numpy as np                                  # numpy
+
+def positions(signal, short=False, size=1.0):
+    """Position held at the close of each bar: size after a buy, -size
+    after a sell when short is True, otherwise flat. size may be a number
+    or an array of sizes for each bar."""
+    signal = np.asarray(signal)
+    rows = np.arange(len(signal)).reshape((-1,) + (1,) * (signal.ndim - 1))
+    latest = np.maximum.accumulate(np.where(signal != 0, rows, 0), axis=0)
+    state = np.take_along_axis(signal, latest, axis=0).astype(np.float64)
+    if not short:
+        state = np.maximum(state, 0.0)
+    return state * size
+
+def growth(close, position, cost=0.0):
+    """Growth of equity over each bar from the position held over it, the
+    first bar has none. cost is the commission and slippage, a fraction of
+    the value traded, taken from equity when the position changes."""
+    close = np.asarray(close, dtype=np.float64)
+    position = np.asarray(position, dtype=np.float64)
+    result = np.ones(close.shape)
+    held = position[:-1]
+    ratio = close[1:] / close[:-1]
+    # whole long positions take the close to close change as is
+    result[1:] = np.where(held == 1, ratio, 1 + held * (ratio - 1))
+    if cost:
+        turnover = np.abs(position).copy()
+        turnover[1:] = np.abs(np.diff(position, axis=0))
+        result *= 1 - turnover * cost
+    return result
+
+def equity_curve(close, position, cost=0.0):
+    """Compound the value of an initial dollar through the positions."""
+    return np.cumprod(growth(close, position, cost), axis=0)
+
+def net_returns(returns, cost=0.0):
+    """Trade returns after paying cost going in and coming out."""
+    returns = np.asarray(returns, dtype=np.float64)
+    if not cost:
+        return returns
+    return (1 + returns) * (1 - cost)**2 - 1
+
+def sized_returns(close, stats, size=1.0, cost=0.0):
+    """Returns of the trades in stats, see trades.trade_stats, with size
+    held over each bar of the trade as positions and growth hold it, net
+    of cost on the value traded going in, coming out and as the size
+    changes. size may be a number or an array of sizes for each bar.
+    Whole long positions keep the trades' own returns, as net_returns,
+    shorts are compounded as growth takes them even when whole."""
+    if np.all(np.asarray(size) == 1.0) and np.all(np.asarray(stats.direction) > 0):
+        return net_returns(stats.returns, cost)
+    close = np.asarray(close, dtype=np.float64)
+    size = np.broadcast_to(np.asarray(size, dtype=np.float64), close.shape)
+    entries, exits = np.asarray(stats.entry), np.asarray(stats.exit)
+    # the position taken on a bar is held over the next one
+    held = np.zeros(close.shape)
+    held[1:] = size[:-1] * (close[1:] / close[:-1] - 1)
+    # log growth so far of a long and of a short position
+    with np.errstate(divide='ignore', invalid='ignore'):
+        grown = np.cumsum(np.log1p(np.stack([held, -held])), axis=1)
+        # and of the cost of changes in size while the trade is held
+        paid = np.zeros(close.shape)
+        paid[1:] = np.abs(np.diff(size)) * cost
+        paid = np.cumsum(np.log1p(-paid))
+    side = (np.asarray(stats.direction) < 0).astype(np.intp)
+    returns = np.exp(grown[side, exits] - grown[side, entries] + paid[exits - 1] - paid[entries])
+    return returns * (1 - size[entries] * cost) * (1 - size[exits - 1] * cost) - 1
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+"""
+DESCRIPTION
+    SystemView grids of systems
+
+    Runs every combination of strategy, date window and indicator length
+    across a process pool, see sweep.py, and keeps the summary statistics
+    of each system as one array per statistic indexed by strategy, window
+    and length. A grid is saved as a directory of .npy files like the data
+    cache and memory-mapped when read back, so it can be sliced and drawn
+    again without running any backtests. The key file, written last,
+    holds a hash of the data, the grid and the code, and a grid whose key
+    doesn't match is run again.
+
+    plot_surface draws each strategy as a surface over win % and profit
+    factor, x and y of the 3D chart in TODO.txt, with expectancy, annual
+    gain or any other statistic as the height.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import itertools                                    # parameter grid
+import os                                           # file names
+import numpy as np                                  # numpy
+# import our system variables from parameters.py
+import parameters as param
+from bars import PRICE_FIELDS
+import drawdown
+import equity
+import indicators
+import signals
+import stagecache
+import sweep
+import systemview
+import timeseries
+import trades
+from systemview import View
+
+# statistics kept for each system, single precision is plenty to draw
+GRID_FIELDS = [
+    ('trades', np.int32),
+    ('wins', np.int32),
+    ('losses', np.int32),
+    ('winPct', np.float32),
+    ('avgWin', np.float32),
+    ('avgLoss', np.float32),
+    ('prftFact', np.float32),
+    ('expectancy', np.float32),
+    ('totalGain', np.float32),
+    ('annualGain', np.float32),
+    ('regret', np.float32),
+]
+
+# first and last bar of each date window
+WINDOW_DTYPE = [
+    ('start', 'datetime64[D]'),
+    ('end', 'datetime64[D]'),
+]
+
+# strategies that trade the Bollinger Bands, whatever the indicator
+BAND_STRATEGIES = ('breakout', 'reversion')
+
+class Grid(object):
+    """Summary statistics of a grid of systems, each an array indexed by
+    strategy, window and length."""
+    def __init__(self, lengths, strategies, windows, columns):
+        self.lengths = np.asarray(lengths)          # indicator lengths
+        self.strategies = np.asarray(strategies)    # strategy names
+        self.windows = np.asarray(windows)          # WINDOW_DTYPE table
+        self.columns = columns                      # statistic name to array
+
+    def index(self, strategy=None, window=None, length=None):
+        """Open mesh of the positions of the strategy names, window
+        numbers and lengths given, a single one or a list, None for all."""
+        def positions(wanted, count, find):
+            if wanted is None:
+                return np.arange(count)
+            return np.array([find(value) for value in np.atleast_1d(wanted)], dtype=np.intp)
+        def findName(value):
+            found = np.flatnonzero(self.strategies == value)
+            if not len(found):
+                raise KeyError("strategy {0} is not in the grid".format(value))
+            return found[0]
+        def findLength(value):
+            found = np.flatnonzero(self.lengths == value)
+            if not len(found):
+                raise KeyError("length {0} is not in the grid".format(value))
+            return found[0]
+        return np.ix_(positions(strategy, len(self.strategies), findName),
+            positions(window, len(self.windows), int),
+            positions(length, len(self.lengths), findLength))
+
+    def select(self, name, strategy=None, window=None, length=None):
+        """A statistic for the strategies, windows and lengths given, see
+        index, as an array of strategy by window by length."""
+        return self.columns[name][self.index(strategy, window, length)]
+
+def strategy_kind(strategy, kind='sma'):
+    """The indicator a strategy needs, the bands for band strategies."""
+    return 'bollinger' if strategy in BAND_STRATEGIES else kind
+
+def evaluate(bars, lengths, strategies=('ma_turn',), windows=((None, None),), kind='sma',
+        processes=None):
+    """Run every combination of strategy, (start, end) window and
+    indicator length, processes as in sweep.sweep. Returns a Grid."""
+    lengths, strategies, windows = list(lengths), list(strategies), list(windows)
+    tasks = [(indLength, start, end, strategy_kind(strategy, kind), strategy)
+        for strategy, (start, end), indLength in itertools.product(strategies, windows, lengths)]
+    rows = sweep.run_tasks(bars, tasks, processes)
+    shape = (len(strategies), len(windows), len(lengths))
+    columns = dict((name, rows[name].astype(dtype).reshape(shape)) for name, dtype in GRID_FIELDS)
+    # the bars each window covers are the same for every system
+    first = rows.reshape(shape)[0, :, 0]
+    spans = np.zeros(len(windows), dtype=WINDOW_DTYPE)
+    spans['start'], spans['end'] = first['start'], first['end']
+    return Grid(lengths, strategies, spans, columns)
+
+def grid_key(bars, lengths, strategies, windows, kind):
+    """Hash of the bars, the grid and the code that runs it."""
+    return stagecache.stage_key('grid', [getattr(bars, name) for name in PRICE_FIELDS],
+        (list(lengths), list(strategies), [tuple(window) for window in windows], kind),
+        [sweep, systemview, indicators, signals, trades, equity, drawdown, timeseries])
+
+def read_grid(path, key=None):
+    """Memory-map a saved grid, None if there is none or its key isn't key."""
+    try:
+        with open(os.path.join(path, 'key'), 'r') as source:
+            if key is not None and source.read() != key:
+                return None
+        def load(name):
+            return np.load(os.path.join(path, name + '.npy'), mmap_mode='r')
+        return Grid(load('lengths'), load('strategies'), load('windows'),
+            dict((name, load(name)) for name, dtype in GRID_FIELDS))
+    except (IOError, OSError, ValueError):
+        return None
+
+def write_grid(path, grid, key):
+    """Save a grid, the key goes last so a partial grid is never used.
+    Returns False if it could not be written."""
+    try:
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        keyFile = os.path.join(path, 'key')
+        if os.path.exists(keyFile):
+            os.remove(keyFile)
+        for name in ('lengths', 'strategies', 'windows'):
+            np.save(os.path.join(path, name + '.npy'), getattr(grid, name))
+        for name, dtype in GRID_FIELDS:
+            np.save(os.path.join(path, name + '.npy'), grid.columns[name])
+        with open(keyFile, 'w') as target:
+            target.write(key)
+    except (IOError, OSError):
+        return False
+    return True
+
+def load_grid(path, bars, lengths, strategies=('ma_turn',), windows=((None, None),), kind='sma',
+        processes=None):
+    """The grid saved in path if it is current, otherwise run it with
+    evaluate and save it there. Returns a Grid."""
+    key = grid_key(bars, lengths, strategies, windows, kind)
+    grid = read_grid(path, key)
+    if grid is None:
+        grid = evaluate(bars, lengths, strategies, windows, kind, processes)
+        write_grid(path, grid, key)
+    return grid
+
+def plot_surface(grid, z='expectancy', strategy=None, window=None, length=None, show=True):
+    """Draw the systems of each strategy given as a surface over win %
+    and profit factor with the statistic z as its height, one point per
+    system, slicing as Grid.index. Returns the figure."""
+    # imported here so running a grid doesn't load matplotlib
+    import matplotlib.pyplot as plt
+    from mpl_toolkits.mplot3d import Axes3D         # registers the 3d projection
+    fig = plt.figure()
+    fig.suptitle("John Bollinger's Trade Visualization")
+    ax = fig.add_subplot(projection='3d')
+    ax.set_xlabel("win %")
+    ax.set_ylabel("profit factor")
+    ax.set_zlabel(z)
+    x = grid.select('winPct', strategy, window, length)
+    y = grid.select('prftFact', strategy, window, length)
+    height = grid.select(z, strategy, window, length)
+    names = grid.strategies[grid.index(strategy)[0].ravel()]
+    for number, name in enumerate(names):
+        color = "C{0}".format(number)
+        points = [values[number].ravel().astype(np.float64) for values in (x, y, height)]
+        finite = np.isfinite(points[0]) & np.isfinite(points[1]) & np.isfinite(points[2])
+        points = [values[finite] for values in points]
+        try:
+            ax.plot_trisurf(*points, color=color, alpha=0.4)
+        except (ValueError, RuntimeError):
+            pass  # too few points, or all in a line, for a surface
+        ax.scatter(*points, color=color, label=name)
+    ax.legend()
+    if show:
+        plt.show()
+    return fig
+
+def print_grid(grid, z='expectancy'):
+    """Print the best system of each strategy and window by z."""
+    print("Strategy   Start      End        Length  Win %  Prft fact  {0:>10}".format(z))
+    for s, name in enumerate(grid.strategies):
+        for w, window in enumerate(grid.windows):
+            values = np.asarray(grid.columns[z][s, w], dtype=np.float64)
+            if not np.isfinite(values).any():
+                continue
+            best = np.nanargmax(values)
+            print("{0:10} {1} {2} {3:6d} {4:6.2f}% {5:9.2f} {6:10.4f}".format(name, window['start'],
+                window['end'], grid.lengths[best], grid.columns['winPct'][s, w, best] * 100,
+                grid.columns['prftFact'][s, w, best], values[best]))
+
+if __name__ == '__main__':
+    # load the bars once for every run
+    a = View()
+    a.getData(param.file1, param.cacheData, period=param.barPeriod, chunkRows=param.chunkRows,
+        format=param.dataFormat, columns=param.dataColumns, adjusted=param.adjustedClose)
+    g = load_grid(param.gridDir, a.myData, param.sweepLengths, param.gridStrategies,
+        param.sweepWindows, param.indicator)
+    print_grid(g, param.gridMetric)
+    plot_surface(g, param.gridMetric)
+
+# That's all folks!
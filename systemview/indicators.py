@@ -0,0 +1,89 @@
+"""
+DESCRIPTION
+    Vectorized indicators for SystemView
+
+    Every indicator works along the first axis, so a column of closes or a
+    time by symbol array can be passed in. Bars before the first full
+    window are NaN.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import numpy as np                                  # numpy
+
+# values held at once by the windowed calculations
+BLOCK_VALUES = 2**20
+
+def rolling_sum(values, length):
+    """Sum of each window of length bars, O(N) via a running sum.
+    The running sum adds the difference between the bar entering and the
+    bar leaving the window, so it stays near the size of one window and
+    equal bars give exactly equal sums."""
+    steps = np.empty((len(values) - length + 1,) + values.shape[1:])
+    steps[0] = values[:length].sum(axis=0)
+    steps[1:] = values[length:] - values[:-length]
+    return np.cumsum(steps, axis=0)
+
+def sma(values, length):
+    """Simple moving average."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if 0 < length <= len(values):
+        out[length - 1:] = rolling_sum(values, length) / length
+    return out
+
+def ema(values, length):
+    """Exponential moving average, seeded with the simple average of the
+    first length bars."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if not 0 < length <= len(values):
+        return out
+    if length == 1:
+        out[:] = values
+        return out
+    alpha = 2 / (length + 1)
+    decay = 1 - alpha
+    out[length - 1] = values[:length].mean(axis=0)
+    # within a block e[k] = decay**k * (e[0] + alpha * sum(x[j] * decay**-j)),
+    # the block is kept short enough for decay**-k to stay finite
+    block = int(min(256, max(1, 600 // -np.log(decay))))
+    shape = (-1,) + (1,) * (values.ndim - 1)
+    prev = out[length - 1]
+    for start in range(length, len(values), block):
+        chunk = values[start:start + block]
+        powers = decay ** np.arange(1, len(chunk) + 1).reshape(shape)
+        out[start:start + len(chunk)] = powers * (prev + alpha * np.cumsum(chunk / powers, axis=0))
+        prev = out[start + len(chunk) - 1]
+    return out
+
+def bollinger(values, length, width=2.0):
+    """Bollinger Bands, the simple moving average plus and minus width
+    population standard deviations. Returns (middle, upper, lower)."""
+    values = np.asarray(values, dtype=np.float64)
+    middle = sma(values, length)
+    upper = np.full(values.shape, np.nan)
+    lower = np.full(values.shape, np.nan)
+    if 0 < length <= len(values):
+        # the deviations from each window's own mean, not a running sum of
+        # squares that loses precision on long or drifting series; a block
+        # of windows at a time keeps the deviations to about BLOCK_VALUES
+        windows = np.lib.stride_tricks.sliding_window_view(values, length, axis=0)
+        stdev = np.empty(windows.shape[:-1])
+        step = max(1, BLOCK_VALUES // length)
+        for start in range(0, len(windows), step):
+            stdev[start:start + step] = windows[start:start + step].std(axis=-1)
+        upper[length - 1:] = middle[length - 1:] + width * stdev
+        lower[length - 1:] = middle[length - 1:] - width * stdev
+    return middle, upper, lower
+
+# indicators available by name
+INDICATORS = {
+    'sma': sma,
+    'ema': ema,
+    'bollinger': bollinger,
+}
@@ -0,0 +1,141 @@
+"""
+DESCRIPTION
+    Per-stage timing and profiling for SystemView
+
+    Methods decorated with timed record their wall time, CPU time, peak
+    memory and the bar and trade counts they leave behind whenever the
+    View has a Profiler. Without one the decorator only checks for it
+    and calls straight through, so it can stay on all the time. The
+    records can be written as json and the outermost calls can be run
+    under cProfile.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+from collections import namedtuple                  # result record
+import functools                                    # keep method names
+import json                                         # stats file
+import time                                         # cpu time
+import timeit                                       # best available timer
+try:                                                # memory tracing for Python3
+    import tracemalloc
+except ImportError:                                 # not in Python2
+    tracemalloc = None
+import cProfile                                     # function level profile
+
+try:                                                # Python3
+    _cpuTime = time.process_time
+except AttributeError:                              # Python2
+    _cpuTime = time.clock
+
+# one record per measured call, in the order the calls finish
+# depth is 0 for calls made from outside the View, memory the peak
+# bytes allocated during the call, bars and trades the counts after it
+StageRecord = namedtuple('StageRecord', ['stage', 'depth', 'wall', 'cpu', 'memory',
+    'bars', 'trades'])
+
+class Profiler(object):
+    """Records the stages a View runs. memory traces allocations to find
+    each stage's peak, cprofile runs the outermost stages under cProfile."""
+    def __init__(self, memory=True, cprofile=False):
+        self.records = []       # StageRecords
+        self.memory = memory and hasattr(tracemalloc, 'reset_peak')
+        self.profile = cProfile.Profile() if cprofile else None
+        self.peaks = []         # highest memory seen by each open stage
+        self.tracing = False    # True while tracing started here is on
+
+    def measure(self, stage, method, view, args, kwargs):
+        """Call method on view, recording the call as stage."""
+        depth = len(self.peaks)
+        if self.memory:
+            if depth == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.tracing = True
+            current, peak = tracemalloc.get_traced_memory()
+            if self.peaks:
+                self.peaks[-1] = max(self.peaks[-1], peak)
+            tracemalloc.reset_peak()
+        self.peaks.append(0)
+        if self.profile is not None and depth == 0:
+            self.profile.enable()
+        wall, cpu = timeit.default_timer(), _cpuTime()
+        try:
+            return method(view, *args, **kwargs)
+        finally:
+            wall, cpu = timeit.default_timer() - wall, _cpuTime() - cpu
+            if self.profile is not None and depth == 0:
+                self.profile.disable()
+            used = 0
+            peak = self.peaks.pop()
+            if self.memory:
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                used = max(peak - current, 0)
+                if self.peaks:
+                    self.peaks[-1] = max(self.peaks[-1], peak)
+                elif self.tracing:
+                    tracemalloc.stop()
+                    self.tracing = False
+            self.records.append(StageRecord(stage, depth, wall, cpu, used,
+                len(view.myData), len(view.trades)))
+
+    def __getstate__(self):
+        """Profiles can't be pickled, a copy sent to another process
+        goes without it."""
+        state = self.__dict__.copy()
+        state['profile'] = None
+        return state
+
+    def summary(self):
+        """Totals for each stage: calls, wall and CPU time and the highest
+        peak memory, as a dictionary by stage name."""
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record.stage,
+                {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'memory': 0})
+            total['calls'] += 1
+            total['wall'] += record.wall
+            total['cpu'] += record.cpu
+            total['memory'] = max(total['memory'], record.memory)
+        return totals
+
+    def asDict(self):
+        """The records and summary, ready for json."""
+        return {
+            'records': [record._asdict() for record in self.records],
+            'summary': self.summary(),
+        }
+
+    def writeJson(self, fileName):
+        """Write the records and summary as json."""
+        with open(fileName, 'w') as target:
+            json.dump(self.asDict(), target, indent=2, sort_keys=True)
+
+    def writeStats(self, fileName):
+        """Write the cProfile statistics for pstats or a profile viewer."""
+        if self.profile is not None:
+            self.profile.dump_stats(fileName)
+
+    def printStats(self):
+        """Print the records, nested stages indented."""
+        print("Stage                         Wall s    CPU s   Memory MB     Bars  Trades")
+        for record in self.records:
+            print("{0:28s} {1:8.4f} {2:8.4f} {3:11.2f} {4:8d} {5:7d}".format(
+                ("  " * record.depth + record.stage)[:28], record.wall, record.cpu,
+                record.memory / 2**20, record.bars, record.trades))
+
+    def clear(self):
+        """Forget the records."""
+        self.records = []
+
+def timed(method):
+    """Record calls to a View method when the View has a profiler."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.profiler is None:
+            return method(self, *args, **kwargs)
+        return self.profiler.measure(method.__name__, method, self, args, kwargs)
+    return wrapper
@@ -0,0 +1,199 @@
+"""
+DESCRIPTION
+    Bulk data loading for SystemView
+
+    The whole data file is parsed in one vectorized step by the reader for
+    its format, see readers.py. A binary cache of the parsed columns is
+    written next to the file, keyed by the file's size and modification
+    time and the reader options, and later loads memory-map the cache
+    instead of parsing. Csv files too big for memory can be parsed a
+    chunk of rows at a time straight into the memory-mapped cache.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import os                                           # file system
+import numpy as np                                  # numpy
+from bars import Bars, PRICE_FIELDS
+import readers
+import timeseries
+
+# plain csv files as the chunked cache reads them, a header line then
+# 2016-01-01, open, high, low, close, volume
+# or with times, 2016-01-01 09:30:00, open, high, low, close, volume
+CSV_DTYPE = [
+    ('date', 'datetime64[s]'),
+    ('open', np.float64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('close', np.float64),
+    ('volume', np.int64),
+]
+
+# external indicators and signals, a header line then
+# 2016-01-01, value or 2016-01-01 09:30:00, value
+COLUMN_DTYPE = [
+    ('date', 'datetime64[s]'),
+    ('value', np.float64),
+]
+
+def cache_dir(fileName):
+    """The cache sits next to the data file, one .npy per column."""
+    return fileName + '.cache'
+
+def _cache_key(fileName, options=""):
+    """Identify a version of the data file by its size and modification
+    time, and the reader options it was parsed with."""
+    info = os.stat(fileName)
+    key = "{0} {1!r}".format(info.st_size, info.st_mtime)
+    return key + " " + options if options else key
+
+def _options(fileName, format=None, columns=None, adjusted=False):
+    """The reader options as part of the cache key, "" for a plain csv
+    file so its cache stays the same."""
+    format = format or readers.detect_format(fileName)
+    if format == 'csv' and not columns and not adjusted:
+        return ""
+    return repr((format, sorted((columns or {}).items()), bool(adjusted)))
+
+def parse_csv(fileName):
+    """Parse the csv file in one step, returns the price columns.
+    Dates without times come back as whole days."""
+    return readers.read_csv(fileName)
+
+def parse_column(fileName):
+    """Parse a csv file of dates and values, returns (date, value)."""
+    date, value = np.loadtxt(fileName, dtype=COLUMN_DTYPE, delimiter=',', skiprows=1,
+        usecols=range(len(COLUMN_DTYPE)), unpack=True, ndmin=1)
+    return timeseries.to_dates(date), value
+
+def read_cache(fileName, options=""):
+    """Memory-map the cached columns, None if there is no current cache."""
+    path = cache_dir(fileName)
+    try:
+        with open(os.path.join(path, 'key'), 'r') as source:
+            if source.read() != _cache_key(fileName, options):
+                return None
+        return [np.load(os.path.join(path, name + '.npy'), mmap_mode='r')
+            for name in PRICE_FIELDS]
+    except (IOError, OSError, ValueError):
+        return None
+
+def write_cache(fileName, bars, options=""):
+    """Save the price columns, the key goes last so a partial cache is never used.
+    Returns False if the cache could not be written."""
+    path = cache_dir(fileName)
+    try:
+        if not os.path.isdir(path):
+            os.mkdir(path)
+        keyFile = os.path.join(path, 'key')
+        if os.path.exists(keyFile):
+            os.remove(keyFile)
+        for name in PRICE_FIELDS:
+            np.save(os.path.join(path, name + '.npy'), getattr(bars, name))
+        with open(keyFile, 'w') as target:
+            target.write(_cache_key(fileName, options))
+    except (IOError, OSError):
+        return False
+    return True
+
+def _count_rows(fileName):
+    """Data lines in a file, the header line not counted."""
+    lines = 0
+    last = b'\n'
+    with open(fileName, 'rb') as source:
+        for block in iter(lambda: source.read(2**20), b''):
+            lines += block.count(b'\n')
+            last = block[-1:]
+    if last != b'\n':
+        lines += 1
+    return max(lines - 1, 0)
+
+def _reverse(column, chunkRows):
+    """Reverse a memory-mapped column in place, a chunk at a time."""
+    length = len(column)
+    for start in range(0, length // 2, chunkRows):
+        end = min(start + chunkRows, length // 2)
+        head = column[start:end].copy()
+        column[start:end] = column[length - end:length - start][::-1]
+        column[length - end:length - start] = head[::-1]
+
+def write_cache_chunked(fileName, chunkRows=timeseries.CHUNK_ROWS):
+    """Parse the file chunkRows lines at a time into the memory-mapped
+    cache, so the file never has to fit in memory. Returns False if the
+    cache could not be written."""
+    path = cache_dir(fileName)
+    rows = _count_rows(fileName)
+    try:
+        if not os.path.isdir(path):
+            os.mkdir(path)
+        keyFile = os.path.join(path, 'key')
+        if os.path.exists(keyFile):
+            os.remove(keyFile)
+        columns = [np.lib.format.open_memmap(os.path.join(path, name + '.npy'), mode='w+',
+            dtype=dtype, shape=(rows,)) for name, dtype in CSV_DTYPE]
+        midnight = True
+        filled = 0
+        with open(fileName, 'r') as source:
+            source.readline()
+            while filled < rows:
+                part = np.loadtxt(source, dtype=CSV_DTYPE, delimiter=',', max_rows=chunkRows,
+                    usecols=range(len(CSV_DTYPE)), unpack=True, ndmin=1)
+                count = len(part[0])
+                if count == 0:
+                    break
+                for column, values in zip(columns, part):
+                    column[filled:filled + count] = values
+                midnight = midnight and timeseries.to_dates(part[0]).dtype != part[0].dtype
+                filled += count
+        # blank lines leave the columns short, parse it the usual way
+        if filled < rows:
+            return False
+        # ascending date order, as Bars.fromColumns would leave it
+        if rows > 1 and columns[0][0] > columns[0][1]:
+            for column in columns:
+                _reverse(column, chunkRows)
+        # whole days when no bar has a time
+        if midnight:
+            days = np.lib.format.open_memmap(os.path.join(path, 'date.tmp.npy'), mode='w+',
+                dtype='datetime64[D]', shape=(rows,))
+            for part in timeseries.chunks(rows, chunkRows):
+                days[part] = columns[0][part]
+            days.flush()
+            del days
+        for column in columns:
+            column.flush()
+        del columns
+        if midnight:
+            os.rename(os.path.join(path, 'date.tmp.npy'), os.path.join(path, 'date.npy'))
+        with open(keyFile, 'w') as target:
+            target.write(_cache_key(fileName))
+    except (IOError, OSError):
+        return False
+    return True
+
+def load(fileName, cache=True, chunkRows=None, format=None, columns=None, adjusted=False):
+    """Load a data file as Bars in ascending date order, see readers.read
+    for format, columns and adjusted.
+    With cache, use the binary cache if it is current, otherwise parse
+    the file and write the cache for next time. With chunkRows as well,
+    a plain csv file is parsed that many rows at a time into the cache
+    and the bars are memory-mapped from it."""
+    options = _options(fileName, format, columns, adjusted)
+    cached = read_cache(fileName, options) if cache else None
+    if cached is not None:
+        return Bars.fromColumns(*cached)
+    if cache and chunkRows and not options and write_cache_chunked(fileName, chunkRows):
+        return Bars.fromColumns(*read_cache(fileName))
+    bars = Bars.fromColumns(*readers.read(fileName, format, columns, adjusted))
+    if cache:
+        write_cache(fileName, bars, options)
+    return bars
+
+def load_csv(fileName, cache=True, chunkRows=None):
+    """Load a csv file as Bars in ascending date order, see load."""
+    return load(fileName, cache, chunkRows, 'csv')
@@ -0,0 +1,96 @@
+"""
+DESCRIPTION
+    Monte Carlo trade resampling for SystemView
+
+    Draws many alternative orderings of the historical trades, either
+    resampled with replacement (bootstrap) or shuffled, as one 2-D array
+    per chunk of paths, compounds them into equity paths and measures
+    each path. Chunks get their own seeds, so for a given seed and chunk
+    size the results are the same whatever the number of processes.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import multiprocessing                              # process pool
+import numpy as np                                  # numpy
+
+# statistics of each simulated path
+RESULT_DTYPE = [
+    ('totalGain', np.float64),
+    ('annualGain', np.float64),
+    ('maxDrawdown', np.float64),
+    ('regret', np.float64),         # share of trades ending below the peak
+]
+
+# cells in one chunk of paths, caps the memory used at once
+CHUNK_CELLS = 4000000
+
+def draw(rng, count, paths, method='bootstrap'):
+    """Trade numbers for each path: resampled with replacement for
+    'bootstrap', a permutation of all trades for 'shuffle'."""
+    if method == 'bootstrap':
+        return rng.integers(0, count, size=(paths, count))
+    if method == 'shuffle':
+        return np.argsort(rng.random((paths, count)), axis=1)
+    raise ValueError("unknown resampling method {0}".format(method))
+
+def equity_paths(returns, order):
+    """Compound an initial dollar through the trades of each path.
+    The first column is the starting dollar."""
+    equity = np.ones((len(order), order.shape[1] + 1))
+    np.cumprod(1 + returns[order], axis=1, out=equity[:, 1:])
+    return equity
+
+def path_stats(equity, years):
+    """Measure every equity path, annualizing over years."""
+    peak = np.maximum.accumulate(equity, axis=1)
+    stats = np.zeros(len(equity), dtype=RESULT_DTYPE)
+    stats['totalGain'] = equity[:, -1] - 1
+    with np.errstate(divide='ignore'):
+        stats['annualGain'] = equity[:, -1]**(1 / years) - 1
+    stats['maxDrawdown'] = (equity / peak - 1).min(axis=1)
+    stats['regret'] = (equity[:, 1:] < peak[:, 1:]).mean(axis=1)
+    return stats
+
+def _run_chunk(task):
+    """Simulate one chunk of paths from its own seed."""
+    returns, years, paths, method, seed = task
+    rng = np.random.default_rng(seed)
+    return path_stats(equity_paths(returns, draw(rng, len(returns), paths, method)), years)
+
+def simulate(returns, years, paths=10000, method='bootstrap', seed=None,
+        chunkSize=None, processes=1):
+    """Statistics of paths resampled trade sequences.
+    chunkSize is the number of paths drawn at once, by default as many
+    as fit in CHUNK_CELLS. processes is the pool size, None for every
+    core. Returns an array of RESULT_DTYPE, one row per path."""
+    returns = np.asarray(returns, dtype=np.float64)
+    if chunkSize is None:
+        chunkSize = max(1, CHUNK_CELLS // max(1, len(returns)))
+    sizes = [min(chunkSize, paths - start) for start in range(0, paths, chunkSize)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(returns, years, size, method, child) for size, child in zip(sizes, seeds)]
+    if processes == 1:
+        chunks = [_run_chunk(task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            chunks = pool.map(_run_chunk, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=RESULT_DTYPE)
+
+def percentiles(results, q=(5, 25, 50, 75, 95)):
+    """Percentiles of each statistic, as a dictionary of arrays."""
+    return dict((name, np.percentile(results[name], q)) for name, dtype in RESULT_DTYPE)
+
+def equity_bands(returns, paths=1000, q=(5, 25, 50, 75, 95), method='bootstrap', seed=None):
+    """Percentiles of equity after each trade across paths, one row per q."""
+    returns = np.asarray(returns, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    return np.percentile(equity_paths(returns, draw(rng, len(returns), paths, method)), q, axis=0)
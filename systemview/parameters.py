@@ -5,18 +5,106 @@ trading statistics display program
 # file names
 file1 = "spx.csv"
 file2 = ""
+# symbol files for portfolio.py, empty to use file1 and file2
+portfolioFiles = []
+# keep a binary cache of the parsed data next to the data file
+cacheData = True
+# data file format: "csv", "yahoo", "amibroker", "parquet" or "feather",
+# "" to tell from the file
+dataFormat = ""
+# header name or column number of each field the header doesn't name,
+# e.g. {"close": "Settle"}
+dataColumns = {}
+# use the adjusted close, with the open, high and low scaled to match it
+adjustedClose = False
+# keep the results of each calculation stage in this directory, at most
+# stageCacheBytes of them, "" to always calculate every stage
+stageCacheDir = "stagecache"
+stageCacheBytes = 1024 * 2**20
 # indicator constants
 maLength = 21
+# indicator type: "sma", "ema" or "bollinger"
+indicator = "sma"
+# signal strategy: "ma_turn", "breakout" or "reversion" on the Bollinger
+# Bands, or "column" for signals imported into the external column
+strategy = "ma_turn"
+# exit when the close is this fraction of the entry price below or
+# above it, 0 for no stop or target, with allowShort the exit also
+# reverses the position, see signals.stop_target
+stopLoss = 0
+profitTarget = 0
+# sell short on sell signals instead of going flat
+allowShort = False
+# fraction of equity held in each position
+positionSize = 1.0
+# commission and slippage, fractions of the value traded on each entry and exit
+commission = 0.0
+slippage = 0.0
 # print debug info
 verbose = True
-# start and end dates "yyyy-mm-dd"
+# record the time, CPU time and peak memory of each stage, print them and
+# write them as json to profileJson, and cProfile statistics to
+# profileStats, "" to skip either file
+profile = False
+profileJson = "profile.json"
+profileStats = ""
+# parameter sweep, indicator lengths and ("yyyy-mm-dd", "yyyy-mm-dd") date
+# windows to test, None for an open end
+sweepLengths = range(5, 105, 5)
+sweepWindows = [(None, None)]
+# walk-forward analysis, choose among sweepLengths over walkInSample bars
+# and trade the choice for the next walkOutSample bars, scored by
+# "equity" gain or a trade statistic such as "expectancy"
+walkInSample = 2520
+walkOutSample = 252
+walkMetric = "equity"
+# grid.py runs each of gridStrategies at every sweepLengths length over
+# every sweepWindows window, keeps the results in gridDir until the data
+# or the grid changes and draws them as surfaces over win % and profit
+# factor with gridMetric, e.g. "expectancy" or "annualGain", as the height
+gridStrategies = ["ma_turn", "breakout", "reversion"]
+gridDir = "gridcache"
+gridMetric = "expectancy"
+# resample the bars to this length on loading, e.g. "5m", "1h" or "1D",
+# "" to use them as they are
+barPeriod = ""
+# parse and resample this many rows at a time, for intraday files too big
+# for memory, 0 to do it all at once
+chunkRows = 0
+# start and end dates "yyyy-mm-dd" or times "yyyy-mm-dd hh:mm", "" to use
+# the whole file
 start = "1960-01-01"
 endDate = "1970-01-01"
+# Monte Carlo resampling of the trades, "bootstrap" or "shuffle",
+# 0 paths to skip it, same seed for the same results
+monteCarloPaths = 0
+monteCarloMethod = "bootstrap"
+monteCarloSeed = 1
+monteCarloBandPaths = 1000
+# benchmark.py times every stage on synthetic bars of these lengths, with
+# moving average signals (None) or signals on this share of the bars, and
+# writes the report as json, comparing against the baseline report if
+# there is one and failing on stages more than benchmarkTolerance slower
+benchmarkSizes = [10**3, 10**4, 10**5, 10**6, 10**7]
+benchmarkDensities = [None, 0.5]
+benchmarkRepeat = 3
+benchmarkReport = "benchmark.json"
+benchmarkBaseline = "benchmark-baseline.json"
+benchmarkTolerance = 0.2
+# report.py writes the enabled charts to this directory in these formats
+reportDir = "report"
+reportFormats = ["png"]
 # true to have summary stats in window
 resultsTk = True
+# true to show the enabled charts and the summary stats in one window,
+# zooming together with trades highlighted on click, false for a window
+# per chart
+dashboard = True
 # visualizations to display
 # show a plot of price
 displayPriceGraph = True
+# indicators to overlay on the price plot, e.g. ["indicator1"]
+priceIndicators = []
 # show a plot of price
 displayPriceTradesGraph = True
 # distance in percent from price fro signal markers
@@ -27,6 +115,8 @@ displayTradeGraph = True
 displayTradesVersusTime = True
 # show a plot of the equity curve
 displayEquityCurve = True
+# show Monte Carlo percentile bands of the equity curve
+displayMonteCarlo = False
 # show a log plot of the equity curve
 displayEquityCurveLog = True
 # show a graph of the distribution of returns
@@ -41,4 +131,12 @@ displayMAE = True
 displayInTradeVol = True
 # show a graph of Efficiency
 displayEfficiency = True
+# show win %, profit factor, expectancy and annual gain over the last
+# rollingTrades trades and over all trades so far
+displayRollingStats = True
+rollingTrades = 50
+# show time in drawdown, max drawdown and Ulcer index over the last
+# rollingBars bars and over all bars so far
+displayRollingDrawdown = True
+rollingBars = 252
 # all done!
@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+"""
+DESCRIPTION
+    SystemView portfolio backtesting
+
+    Loads many symbol files into aligned time by symbol arrays and runs the
+    indicator, signals, trades, equity curves and drawdowns for every
+    symbol in one batched NumPy pass.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import os                                           # file names
+import numpy as np                                  # numpy
+# import our system variables from parameters.py
+import parameters as param
+import drawdown
+import equity
+import indicators
+import loader
+import signals
+import timeseries
+import trades
+
+# one row per symbol, plus one for the whole portfolio
+STATS_DTYPE = [
+    ('symbol', 'U32'),
+    ('first', 'datetime64[D]'),     # first bar of the symbol
+    ('last', 'datetime64[D]'),      # last bar of the symbol
+    ('trades', np.int64),
+    ('wins', np.int64),
+    ('losses', np.int64),
+    ('winPct', np.float64),
+    ('avgWin', np.float64),
+    ('avgLoss', np.float64),
+    ('prftFact', np.float64),
+    ('expectancy', np.float64),
+    ('totalGain', np.float64),
+    ('annualGain', np.float64),
+    ('maxDrawdown', np.float64),
+    ('regret', np.float64),
+]
+
+def underwater(equity):
+    """True where equity is below its earlier peak, from the second bar on
+    as calcTimeInDrawdown counts it."""
+    under = np.zeros(equity.shape, dtype=bool)
+    under[1:] = drawdown.in_drawdown(equity[1:])
+    return under
+
+class Portfolio(object):
+    """Run one trading system across many symbols at once.
+    Every time series is a time by symbol array on a shared date axis."""
+    def __init__(self):
+        self.symbols = []           # symbol names
+        self.date = None            # dates shared by every symbol
+        self.close = None           # closes, filled across missing bars
+        self.first = None           # index of each symbol's first bar
+        self.last = None            # index of each symbol's last bar
+        self.indicator = None       # indicator values
+        self.signal = None          # 1 for buy, -1 for sell
+        self.tradeStats = None      # trades of every symbol, see trades.trade_stats
+        self.tradeSymbol = None     # symbol number of each trade
+        self.equity = None          # equity curve of each symbol
+        self.drawdown = None        # drawdown from peak equity
+        self.portfolioEquity = None # equal-weighted equity of all symbols
+        self.stats = None           # per-symbol statistics, STATS_DTYPE
+        self.summary = None         # portfolio statistics, STATS_DTYPE
+
+    def getData(self, fileNames, cache=True, start=None, end=None, format=None, columns=None,
+            adjusted=False):
+        """Load the symbol files and align them on the union of their dates.
+        Missing closes are filled with the previous close, or the first
+        one before a symbol starts trading. format, columns and adjusted
+        pick the reader, see readers.read."""
+        data = [loader.load(fileName, cache, None, format, columns, adjusted).window(start, end)
+            for fileName in fileNames]
+        self.symbols = [os.path.splitext(os.path.basename(fileName))[0] for fileName in fileNames]
+        self.date = np.unique(np.concatenate([bars.date for bars in data]))
+        close = np.full((len(self.date), len(data)), np.nan)
+        for column, bars in enumerate(data):
+            close[np.searchsorted(self.date, bars.date), column] = bars.close
+        have = ~np.isnan(close)
+        rows = np.arange(len(self.date))[:, np.newaxis]
+        self.first = np.argmax(have, axis=0)
+        self.last = len(self.date) - 1 - np.argmax(have[::-1], axis=0)
+        fill = np.maximum(np.maximum.accumulate(np.where(have, rows, 0), axis=0), self.first)
+        self.close = close[fill, np.arange(len(data))]
+
+    def calcIndicator(self, indLength, kind='sma', **kwargs):
+        """Calculate the indicator for every symbol.
+        For Bollinger Bands the middle band is used."""
+        result = indicators.INDICATORS[kind](self.close, indLength, **kwargs)
+        self.indicator = result[0] if isinstance(result, tuple) else result
+
+    def calcSignals(self, indLength):
+        """Calculate the signals for every symbol while it trades."""
+        rows = np.arange(len(self.date))[:, np.newaxis]
+        live = (rows >= self.first + indLength + 2) & (rows <= self.last)
+        self.signal = np.where(live, signals.ma_turn(self.indicator, indLength + 2), 0).astype(np.int8)
+
+    def calcTrades(self, short=False, commission=0.0, slippage=0.0, size=1.0):
+        """Pair the signals into trades across all symbols at once.
+        The symbols are laid end to end and trades that would run from
+        one symbol into the next are dropped. With short sells are also
+        paired with the next buy. Returns are net of commission and
+        slippage, fractions of the value traded, and of the position size
+        as calcEquityCurve holds it."""
+        length = len(self.date)
+        if short:
+            entries, exits, direction = trades.pair_long_short(self.signal.T.ravel())
+        else:
+            entries, exits = trades.pair_trades(self.signal.T.ravel())
+            direction = np.ones(len(entries), dtype=np.int8)
+        same = entries // length == exits // length
+        entries, exits, direction = entries[same], exits[same], direction[same]
+        stats = trades.trade_stats(self.close.T.ravel(), entries, exits, direction)
+        sizes = np.broadcast_to(np.asarray(size, dtype=np.float64), self.close.shape).T.ravel()
+        self.tradeStats = stats._replace(returns=equity.sized_returns(self.close.T.ravel(), stats,
+            sizes, commission + slippage))
+        self.tradeSymbol = entries // length
+
+    def calcEquityCurve(self, short=False, size=1.0, commission=0.0, slippage=0.0):
+        """Compound the value of an initial dollar for every symbol, see
+        equity.positions for the positions held. The portfolio starts
+        with an equal share in each symbol."""
+        position = equity.positions(self.signal, short, size)
+        self.equity = equity.equity_curve(self.close, position, commission + slippage)
+        self.portfolioEquity = self.equity.mean(axis=1)
+
+    def calcDrawdown(self):
+        """Calculate the drawdown from peak equity of every symbol."""
+        self.drawdown = drawdown.underwater(self.equity)
+
+    def calcStatistics(self):
+        """Calculate the per-symbol and portfolio statistics.
+        Symbol gains compound their trades, as calcReturns does, the
+        portfolio gain comes from its equity curve."""
+        returns = self.tradeStats.returns
+        count = len(self.symbols)
+        self.stats = np.zeros(count, dtype=STATS_DTYPE)
+        self.stats['symbol'] = self.symbols
+        self.stats['first'] = self.date[self.first]
+        self.stats['last'] = self.date[self.last]
+        for name, values in zip(['trades', 'wins', 'losses', 'winPct', 'avgWin', 'avgLoss',
+                'prftFact', 'expectancy', 'totalGain'],
+                trades.trade_summary(returns, self.tradeSymbol, count)):
+            self.stats[name] = values
+        years = timeseries.years_between(self.date[np.minimum(self.first + 1, self.last)], self.date[self.last])
+        with np.errstate(divide='ignore'):
+            self.stats['annualGain'] = (1 + self.stats['totalGain'])**(1 / years) - 1
+        self.stats['maxDrawdown'] = self.drawdown.min(axis=0)
+        rows = np.arange(len(self.date))[:, np.newaxis]
+        under = underwater(self.equity) & (rows <= self.last)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.stats['regret'] = under.sum(axis=0) / (self.last - self.first)
+        # the whole portfolio
+        self.summary = np.zeros(1, dtype=STATS_DTYPE)
+        self.summary['symbol'] = 'portfolio'
+        self.summary['first'] = self.date[0]
+        self.summary['last'] = self.date[-1]
+        for name, values in zip(['trades', 'wins', 'losses', 'winPct', 'avgWin', 'avgLoss',
+                'prftFact', 'expectancy'],
+                trades.trade_summary(returns, np.zeros(len(returns), dtype=np.intp), 1)):
+            self.summary[name] = values
+        equity = self.portfolioEquity
+        self.summary['totalGain'] = equity[-1] / equity[0] - 1
+        with np.errstate(divide='ignore'):
+            self.summary['annualGain'] = (equity[-1] / equity[0])**(1 / timeseries.years_between(self.date[1], self.date[-1])) - 1
+        self.summary['maxDrawdown'] = drawdown.max_drawdown(equity)
+        self.summary['regret'] = underwater(equity).sum() / (len(equity) - 1)
+
+    def calcAll(self, indLength, kind='sma', short=False, size=1.0, commission=0.0, slippage=0.0):
+        """Run the whole calculation chain for every symbol."""
+        self.calcIndicator(indLength, kind)
+        self.calcSignals(indLength)
+        self.calcTrades(short, commission, slippage, size)
+        self.calcEquityCurve(short, size, commission, slippage)
+        self.calcDrawdown()
+        self.calcStatistics()
+
+    def printResults(self):
+        """Print a table of per-symbol and portfolio results."""
+        print("Symbol     Trades  Win %  Prft fact  Expect  Tot gain  Ann gain  Max DD  Regret")
+        for row in np.concatenate([self.stats, self.summary]):
+            print("{0:10s} {1:6d} {2:6.2f}% {3:9.2f} {4:7.2f} {5:8.2f}% {6:8.2f}% {7:6.2f}% {8:6.2f}%".format(
+                row['symbol'][:10], row['trades'], row['winPct'] * 100, row['prftFact'],
+                row['expectancy'], row['totalGain'] * 100, row['annualGain'] * 100,
+                row['maxDrawdown'] * 100, row['regret'] * 100))
+
+if __name__ == '__main__':
+    # the portfolio files, or the two single-symbol files
+    files = param.portfolioFiles or [name for name in (param.file1, param.file2) if name]
+    p = Portfolio()
+    p.getData(files, param.cacheData, param.start, param.endDate, param.dataFormat,
+        param.dataColumns, param.adjustedClose)
+    p.calcAll(param.maLength, param.indicator, param.allowShort, param.positionSize,
+        param.commission, param.slippage)
+    p.printResults()
+
+# That's all folks!
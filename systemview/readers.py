@@ -0,0 +1,322 @@
+"""
+DESCRIPTION
+    Data file readers for SystemView
+
+    Each reader turns a file into the six price columns Bars.fromColumns
+    takes, date, open, high, low, close and volume, typed as the csv
+    loader types them. Text files are parsed by np.loadtxt in one step,
+    Yahoo month names and slashed dates are rewritten into separate
+    numeric fields first so no date is parsed a row at a time. Columns
+    are found by their header names, a mapping of field to header name
+    or column number overrides that, and the adjusted close can stand in
+    for the close. The format can be given or detected from the file.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import io                                           # text as a file
+import os                                           # file names
+import re                                           # date styles
+import numpy as np                                  # numpy
+try:                                                # Parquet and Feather files
+    import pyarrow.parquet as parquet
+    import pyarrow.feather as feather
+except ImportError:                                 # pyarrow is optional
+    parquet = feather = None
+import timeseries
+
+# header names each field goes by, lower case without spaces, underscores
+# or angle brackets, e.g. "Adj Close" or <DTYYYYMMDD>
+HEADER_NAMES = {
+    'ticker': ('ticker', 'symbol', 'name'),
+    'date': ('date', 'date/time', 'datetime', 'timestamp', 'dtyyyymmdd', 'indexlevel0'),
+    'time': ('time',),
+    'open': ('open', 'o'),
+    'high': ('high', 'h'),
+    'low': ('low', 'l'),
+    'close': ('close', 'c', 'last'),
+    'volume': ('volume', 'vol', 'v'),
+    'adjusted': ('adjclose', 'adjustedclose'),
+    'openint': ('openint', 'openinterest', 'oi'),
+}
+
+# csv files whose header names we don't know
+CSV_LAYOUT = ('date', 'open', 'high', 'low', 'close', 'volume')
+
+# AmiBroker ASCII exports without a header line, by number of fields
+AMIBROKER_LAYOUTS = {
+    7: ('ticker', 'date', 'open', 'high', 'low', 'close', 'volume'),
+    8: ('ticker', 'date', 'open', 'high', 'low', 'close', 'volume', 'openint'),
+}
+AMIBROKER_INTRADAY = ('ticker', 'date', 'time', 'open', 'high', 'low', 'close', 'volume')
+
+MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+# two digit years above this are 19nn, the rest 20nn, as yahoo_to_iso_date has it
+CENTURY_PIVOT = 20
+
+# date and time styles found in text files
+YAHOO_DATE = re.compile(r'^\d{1,2}-[A-Za-z]{3}-\d{2,4}$')       # 31-May-16
+SLASH_DATE = re.compile(r'^\d{1,2}/\d{1,2}/\d{2,4}$')           # 5/31/2016
+NUMBER_DATE = re.compile(r'^\d{8}$')                            # 20160531
+
+def _normalize(name):
+    """A header name as HEADER_NAMES has it."""
+    return re.sub(r'[\s_<>]', '', name).lower()
+
+def _field(name):
+    """The field a header name stands for, None for one we don't know."""
+    name = _normalize(name)
+    for field, names in HEADER_NAMES.items():
+        if name in names:
+            return field
+    return None
+
+def _layout(header, columns=None):
+    """The field of each column, from the header names with columns, a
+    dictionary of field to header name or column number, overriding."""
+    layout = [_field(name) for name in header]
+    # the first column a field is found in is the one used
+    layout = [None if field in layout[:column] else field for column, field in enumerate(layout)]
+    for field, column in (columns or {}).items():
+        if field in layout:
+            layout[layout.index(field)] = None
+        if not isinstance(column, int):
+            names = [_normalize(name) for name in header]
+            if _normalize(column) not in names:
+                raise ValueError("no column named {0}".format(column))
+            column = names.index(_normalize(column))
+        elif not 0 <= column < len(layout):
+            raise ValueError("column {0} out of range, the rows have {1} columns".format(
+                column, len(layout)))
+        layout[column] = field
+    return layout
+
+def _has_header(fields):
+    """True if a first line holds column names rather than data, known
+    names or no numbers at all."""
+    if any(_field(field) in ('date', 'open', 'close') for field in fields):
+        return True
+    return not any(re.match(r'^[-+.]?\d', field) for field in fields)
+
+def _first_lines(fileName, count=2):
+    """The first lines of a text file, split into stripped fields."""
+    lines = []
+    with open(fileName, 'r') as source:
+        for line in source:
+            if line.strip():
+                lines.append([field.strip() for field in line.split(',')])
+            if len(lines) == count:
+                break
+    return lines
+
+def dates(year, month, day):
+    """Whole dates from arrays of year, month and day numbers. Two digit
+    years are put in the century CENTURY_PIVOT picks."""
+    year = np.asarray(year, dtype=np.int64)
+    year = np.where(year < 100, np.where(year > CENTURY_PIVOT, year + 1900, year + 2000), year)
+    months = (year - 1970) * 12 + np.asarray(month, dtype=np.int64) - 1
+    return months.astype('datetime64[M]').astype('datetime64[D]') + \
+        (np.asarray(day, dtype=np.int64) - 1).astype('timedelta64[D]')
+
+def _columns(date, values, fileName, adjusted=False):
+    """The six price columns from the date and a dictionary of the other
+    fields. With adjusted, the adjusted close replaces the close and the
+    open, high and low are scaled by the same factor."""
+    for field in ('open', 'high', 'low', 'close'):
+        if field not in values:
+            raise ValueError("{0} has no {1} column".format(fileName, field))
+    open, high, low, close = [np.asarray(values[field], dtype=np.float64)
+        for field in ('open', 'high', 'low', 'close')]
+    if adjusted:
+        if 'adjusted' not in values:
+            raise ValueError("{0} has no adjusted close column".format(fileName))
+        adjust = np.asarray(values['adjusted'], dtype=np.float64)
+        factor = adjust / close
+        open, high, low, close = open * factor, high * factor, low * factor, adjust
+    volume = values.get('volume')
+    if volume is None:
+        volume = np.zeros(len(close), dtype=np.int64)
+    else:
+        volume = np.asarray(volume)
+        if volume.dtype.kind == 'f':
+            volume = np.rint(volume)
+        volume = volume.astype(np.int64)
+    return [timeseries.to_dates(date), open, high, low, close, volume]
+
+def _read_text(fileName, layout, header, adjusted=False):
+    """Parse a comma separated text file whose columns hold the fields in
+    layout. Dates may be ISO dates or times, yyyymmdd, m/d/yyyy or
+    dd-Mon-yy, a separate time column hh:mm[:ss] or hhmmss."""
+    lines = _first_lines(fileName)
+    sample = lines[1 if header else 0] if len(lines) > int(header) else []
+    wanted = ['date', 'time', 'open', 'high', 'low', 'close', 'volume']
+    if adjusted:
+        wanted.append('adjusted')
+    # the fields each column splits into once dates and times are rewritten
+    parts = []
+    rewrites = []
+    for field, value in zip(layout, sample):
+        if field not in wanted:
+            parts.append([None])
+        elif field == 'date' and YAHOO_DATE.match(value):
+            rewrites.extend(('-' + month + '-', ',{0},'.format(number + 1))
+                for number, month in enumerate(MONTHS))
+            parts.append(['day', 'month', 'year'])
+        elif field == 'date' and SLASH_DATE.match(value):
+            rewrites.append(('/', ','))
+            parts.append(['month', 'day', 'year'])
+        elif field == 'date' and NUMBER_DATE.match(value):
+            parts.append(['yyyymmdd'])
+        elif field == 'time' and ':' in value:
+            rewrites.append((':', ','))
+            parts.append(['hour', 'minute', 'second'][:value.count(':') + 1])
+        elif field == 'time':
+            parts.append(['hhmmss' if len(value) > 4 else 'hhmm'])
+        else:
+            parts.append([field])
+    fields = [field for part in parts for field in part]
+    usecols = [column for column, field in enumerate(fields) if field is not None]
+    dtype = [(fields[column], 'datetime64[s]' if fields[column] == 'date' else np.float64)
+        for column in usecols]
+    source = fileName
+    if rewrites:
+        # rewritten as a whole, a handful of string replacements
+        with open(fileName, 'r') as original:
+            if header:
+                original.readline()
+            text = original.read()
+        for old, new in rewrites:
+            text = text.replace(old, new)
+        source = io.StringIO(text)
+        header = False
+    parsed = np.loadtxt(source, dtype=dtype, delimiter=',', skiprows=int(header),
+        usecols=usecols, unpack=True, ndmin=1)
+    values = dict((name, column) for (name, kind), column in zip(dtype, parsed))
+    # dates put together from their parts
+    if 'yyyymmdd' in values:
+        number = values['yyyymmdd'].astype(np.int64)
+        values['date'] = dates(number // 10000, number // 100 % 100, number % 100)
+    elif 'year' in values:
+        values['date'] = dates(values['year'], values['month'], values['day'])
+    if 'date' not in values:
+        raise ValueError("{0} has no date column".format(fileName))
+    seconds = None
+    if 'hour' in values:
+        seconds = values['hour'] * 3600 + values['minute'] * 60 + values.get('second', 0)
+    elif 'hhmmss' in values or 'hhmm' in values:
+        if 'hhmm' in values:
+            number = values['hhmm'].astype(np.int64) * 100
+        else:
+            number = values['hhmmss'].astype(np.int64)
+        seconds = number // 10000 * 3600 + number // 100 % 100 * 60 + number % 100
+    date = values['date']
+    if seconds is not None:
+        date = date.astype('datetime64[s]') + np.asarray(seconds, dtype=np.int64).astype('timedelta64[s]')
+    return _columns(date, values, fileName, adjusted)
+
+def read_csv(fileName, columns=None, adjusted=False):
+    """Comma separated bars with a header line naming the columns, in
+    the order date, open, high, low, close and volume if it doesn't."""
+    header = _first_lines(fileName, 1)[0]
+    layout = _layout(header, columns)
+    # unknown names, take the columns in the usual order
+    if not any(layout):
+        layout = _layout(CSV_LAYOUT[:len(header)], columns)
+    return _read_text(fileName, layout, True, adjusted)
+
+def read_yahoo(fileName, columns=None, adjusted=False):
+    """Yahoo! csv downloads, Date,Open,High,Low,Close,Volume,Adj Close with
+    dates as dd-Mon-yy or yyyy-mm-dd."""
+    return read_csv(fileName, columns, adjusted)
+
+def read_amibroker(fileName, columns=None, adjusted=False):
+    """AmiBroker ASCII exports, Ticker,Date,[Time,]Open,High,Low,Close,Volume
+    with an optional header line and dates as yyyymmdd, yyyy-mm-dd or
+    m/d/yyyy."""
+    first = _first_lines(fileName, 1)[0]
+    header = _has_header(first)
+    if header:
+        layout = first
+    elif len(first) == 8 and ':' in first[2]:
+        layout = AMIBROKER_INTRADAY
+    elif len(first) in AMIBROKER_LAYOUTS:
+        layout = AMIBROKER_LAYOUTS[len(first)]
+    else:
+        raise ValueError("{0} has {1} fields, not an AmiBroker export".format(fileName, len(first)))
+    return _read_text(fileName, _layout(layout, columns), header, adjusted)
+
+def _read_table(table, fileName, columns=None, adjusted=False):
+    """The price columns of a pyarrow table."""
+    layout = _layout(table.column_names, columns)
+    values = {}
+    for name, field in zip(table.column_names, layout):
+        if field is not None and field not in values:
+            values[field] = np.asarray(table.column(name).to_numpy())
+    if 'date' not in values:
+        raise ValueError("{0} has no date column".format(fileName))
+    # in seconds as the text readers have them, pandas writes nanoseconds
+    return _columns(values['date'].astype('datetime64[s]'), values, fileName, adjusted)
+
+def read_parquet(fileName, columns=None, adjusted=False):
+    """Parquet files, needs pyarrow."""
+    if parquet is None:
+        raise ImportError("reading Parquet files needs pyarrow")
+    return _read_table(parquet.read_table(fileName), fileName, columns, adjusted)
+
+def read_feather(fileName, columns=None, adjusted=False):
+    """Feather and Arrow IPC files, needs pyarrow."""
+    if feather is None:
+        raise ImportError("reading Feather files needs pyarrow")
+    return _read_table(feather.read_table(fileName), fileName, columns, adjusted)
+
+# readers by format name, each reader(fileName, columns, adjusted)
+READERS = {
+    'csv': read_csv,
+    'yahoo': read_yahoo,
+    'amibroker': read_amibroker,
+    'parquet': read_parquet,
+    'feather': read_feather,
+}
+
+# formats known by their file extension
+EXTENSIONS = {
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.feather': 'feather',
+    '.arrow': 'feather',
+}
+
+def detect_format(fileName):
+    """The format of a data file, from its extension or its first lines."""
+    extension = os.path.splitext(fileName)[1].lower()
+    if extension in EXTENSIONS:
+        return EXTENSIONS[extension]
+    lines = _first_lines(fileName)
+    if not lines:
+        return 'csv'
+    if not _has_header(lines[0]):
+        return 'amibroker'
+    layout = _layout(lines[0])
+    if 'ticker' in layout:
+        return 'amibroker'
+    if len(lines) > 1 and 'date' in layout:
+        date = lines[1][layout.index('date')]
+        if YAHOO_DATE.match(date):
+            return 'yahoo'
+    return 'csv'
+
+def read(fileName, format=None, columns=None, adjusted=False):
+    """Read a data file as price columns. format is a name in READERS,
+    None to detect it. columns maps fields to header names or column
+    numbers where the header doesn't say. adjusted uses the adjusted
+    close in place of the close."""
+    if not format:
+        format = detect_format(fileName)
+    if format not in READERS:
+        raise ValueError("unknown data format {0}".format(format))
+    return READERS[format](fileName, columns, adjusted)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+DESCRIPTION
+    SystemView headless reports
+
+    Renders every chart enabled in parameters.py to image files on a
+    non-interactive backend, with the charts of one or more systems drawn
+    concurrently across a process pool, and writes the summary statistics
+    of each system next to its charts.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import json                                         # summary file
+import multiprocessing                              # process pool
+import os                                           # file names
+import matplotlib                                   # matplotlib
+matplotlib.use('Agg')                               # no display needed
+import matplotlib.pyplot as plt                     # pyplot
+# import our system variables from parameters.py
+import parameters as param
+from systemview import View, enabled_charts, json_stats
+
+# systems shared with each worker process
+_views = None
+
+def _init_worker(views):
+    """Keep the systems in the worker."""
+    global _views
+    _views = views
+
+def _render_task(task):
+    """Render one chart of one system."""
+    return render_chart(_views[task[0]], *task[1:])
+
+def render_chart(view, method, args, path, formats):
+    """Draw a chart and save it as path.format for each format.
+    Returns the files written."""
+    view.showCharts = False
+    fig = getattr(view, method)(*args)
+    files = []
+    for fileFormat in formats:
+        files.append("{0}.{1}".format(path, fileFormat))
+        fig.savefig(files[-1])
+    plt.close(fig)
+    return files
+
+def write_summary(view, path):
+    """Write the summary statistics of a system as json, those that can't
+    be calculated as null."""
+    with open(path, 'w') as target:
+        json.dump(json_stats(view.summaryStats()), target, indent=2, sort_keys=True,
+            allow_nan=False)
+
+def write_reports(views, outDir, charts=None, formats=('png',), processes=None):
+    """Write charts and summary statistics for each calculated View in the
+    views dictionary to outDir/name. charts is a list of (method, args),
+    the enabled charts by default. processes is the pool size, None for
+    every core, 1 to render in this process. Returns the files written."""
+    if charts is None:
+        charts = enabled_charts()
+    tasks = []
+    files = []
+    for name in sorted(views):
+        systemDir = os.path.join(outDir, name)
+        if not os.path.isdir(systemDir):
+            os.makedirs(systemDir)
+        files.append(os.path.join(systemDir, 'summary.json'))
+        write_summary(views[name], files[-1])
+        for method, args in charts:
+            tasks.append((name, method, args, os.path.join(systemDir, method), formats))
+    if processes == 1:
+        rendered = [render_chart(views[task[0]], *task[1:]) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(processes, _init_worker, (views,))
+        try:
+            rendered = pool.map(_render_task, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    for written in rendered:
+        files.extend(written)
+    return files
+
+if __name__ == '__main__':
+    a = View()
+    a.getData(param.file1, param.cacheData, param.start, param.endDate, param.barPeriod,
+        param.chunkRows, param.dataFormat, param.dataColumns, param.adjustedClose)
+    a.calcAll(param.maLength, param.indicator, param.strategy, param.stopLoss, param.profitTarget,
+        param.allowShort, param.positionSize, param.commission, param.slippage)
+    name = os.path.splitext(os.path.basename(param.file1))[0]
+    for fileName in write_reports({name: a}, param.reportDir, formats=param.reportFormats):
+        print(fileName)
+
+# That's all folks!
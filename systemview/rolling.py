@@ -0,0 +1,134 @@
+"""
+DESCRIPTION
+    Rolling and expanding trade statistics for SystemView
+
+    Shows how the summary statistics drift over time, to see when a
+    system starts to decay. The win and loss counts, their sums and the
+    compounded gain are kept as running totals over the trades, so the
+    statistics of every window of trades are differences of two totals
+    and the whole table takes O(N). The time in drawdown, max drawdown
+    and Ulcer index are done the same way over the bars, the windowed
+    minimum with the van Herk/Gil-Werman block method.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import numpy as np                                  # numpy
+import drawdown
+import timeseries
+
+# one row per trade, the statistics of the trades closed by then,
+# as printResults shows them for the whole history, the counts are
+# floats so rows before a window is full can be NaN as well
+TRADE_FIELDS = [
+    ('trades', np.float64),
+    ('wins', np.float64),
+    ('losses', np.float64),
+    ('winPct', np.float64),
+    ('avgWin', np.float64),
+    ('avgLoss', np.float64),
+    ('prftFact', np.float64),
+    ('expectancy', np.float64),
+    ('totalGain', np.float64),
+    ('annualGain', np.float64),
+]
+
+# one row per bar, the equity curve statistics of the bars so far
+BAR_FIELDS = [
+    ('regret', np.float64),
+    ('maxDrawdown', np.float64),
+    ('ulcerIndex', np.float64),
+]
+
+def window_sum(values, window=None):
+    """Sum of each value and the window - 1 values before it, fewer at
+    the start, or of every value so far when window is None."""
+    total = np.cumsum(values)
+    if window is None or window >= len(total):
+        return total
+    result = total.copy()
+    result[window:] -= total[:-window]
+    return result
+
+def rolling_min(values, window=None):
+    """Lowest of each value and the window - 1 values before it, fewer at
+    the start, or of every value so far when window is None. The values
+    are cut into blocks of window, the minimum from the start of each
+    block and to its end answer every window with two lookups."""
+    values = np.asarray(values, dtype=np.float64)
+    if window is None or window >= len(values):
+        return np.minimum.accumulate(values)
+    blocks = -(-len(values) // window)
+    padded = np.full(blocks * window, np.inf)
+    padded[:len(values)] = values
+    padded = padded.reshape(blocks, window)
+    fromStart = np.minimum.accumulate(padded, axis=1).reshape(-1)[:len(values)]
+    toEnd = np.minimum.accumulate(padded[:, ::-1], axis=1)[:, ::-1].reshape(-1)
+    result = fromStart.copy()
+    result[window - 1:] = np.minimum(toEnd[:len(values) - window + 1], fromStart[window - 1:])
+    return result
+
+def _table(date, fields):
+    """An empty table with a date field of the unit of date."""
+    return np.zeros(len(date), dtype=[('date', date.dtype)] + fields)
+
+def trade_table(returns, entry, exit, window=None, start=None):
+    """Statistics of each window of trades, or of all trades so far when
+    window is None, one row as of each trade's exit. entry and exit are
+    the trades' dates. Annual gains cover the time from the first entry
+    in the window, or from start for all trades so far, to the exit.
+    Rows before a window is full are NaN."""
+    returns = np.asarray(returns, dtype=np.float64)
+    entry = np.asarray(entry)
+    exit = np.asarray(exit)
+    table = _table(exit, TRADE_FIELDS)
+    table['date'] = exit
+    if len(returns) == 0:
+        return table
+    won = returns > 0.0
+    count = window_sum(np.ones(len(returns), dtype=np.int64), window)
+    wins = window_sum(won.astype(np.int64), window)
+    table['trades'] = count
+    table['wins'] = wins
+    table['losses'] = count - wins
+    with np.errstate(divide='ignore', invalid='ignore'):
+        table['winPct'] = wins / count
+        table['avgWin'] = window_sum(np.where(won, returns, 0.0), window) / wins
+        table['avgLoss'] = window_sum(np.where(won, 0.0, returns), window) / (count - wins)
+        table['prftFact'] = table['avgWin'] / np.abs(table['avgLoss'])
+        table['expectancy'] = table['winPct'] * table['prftFact'] - (1 - table['winPct'])
+        table['totalGain'] = np.expm1(window_sum(np.log1p(returns), window))
+        if window is None:
+            begin = np.full(len(returns), entry[0] if start is None else start, dtype=entry.dtype)
+        else:
+            begin = entry[np.maximum(np.arange(len(returns)) - window + 1, 0)]
+        years = np.asarray(timeseries.years_between(begin, exit), dtype=np.float64)
+        years[years <= 0] = np.nan
+        table['annualGain'] = (1 + table['totalGain'])**(1 / years) - 1
+    if window is not None:
+        for name, dtype in TRADE_FIELDS:
+            table[name][:window - 1] = np.nan
+    return table
+
+def bar_table(equity, date, window=None):
+    """Share of bars in drawdown, max drawdown and Ulcer index of each
+    window of bars, or of all bars so far when window is None. Drawdowns
+    are measured from the highest equity since the first bar, not since
+    the start of the window. Rows before a window is full are NaN."""
+    equity = np.asarray(equity, dtype=np.float64)
+    table = _table(np.asarray(date), BAR_FIELDS)
+    table['date'] = date
+    curve = drawdown.underwater(equity)
+    count = window_sum(np.ones(len(equity)), window)
+    table['regret'] = window_sum(drawdown.in_drawdown(equity), window) / count
+    table['maxDrawdown'] = rolling_min(curve, window)
+    # differences of running totals can come out a hair below zero
+    table['ulcerIndex'] = np.sqrt(np.maximum(window_sum(curve**2, window), 0.0) / count)
+    if window is not None:
+        for name, dtype in BAR_FIELDS:
+            table[name][:window - 1] = np.nan
+    return table
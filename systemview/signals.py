@@ -0,0 +1,241 @@
+"""
+DESCRIPTION
+    Vectorized trading signals for SystemView
+
+    Signals are 1 for buy, 0 for no action and -1 for sell or short.
+    Every rule works along the first axis, so a single indicator column or
+    a time by symbol array can be passed in.
+
+    A strategy takes the Bars and the indicator length and returns the
+    whole signal column in one call. STRATEGIES holds the ones that come
+    with SystemView, any function with the same arguments can be used.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import numpy as np                                  # numpy
+import trades
+
+def ma_turn(ind, start=2):
+    """Buy when the indicator turns up, sell when it turns down.
+    Bars before start get no signal."""
+    ind = np.asarray(ind)
+    signal = np.zeros(ind.shape, dtype=np.int8)
+    start = max(start, 2)
+    if start >= len(ind):
+        return signal
+    before, middle, after = ind[start - 2:-2], ind[start - 1:-1], ind[start:]
+    signal[start:][(before > middle) & (middle < after)] = 1
+    signal[start:][(before < middle) & (middle > after)] = -1
+    return signal
+
+def alternate(signal):
+    """Drop buys while already bought and sells while already sold, so
+    every buy is followed by a sell."""
+    signal = np.asarray(signal)
+    rows = np.arange(len(signal)).reshape((-1,) + (1,) * (signal.ndim - 1))
+    latest = np.maximum.accumulate(np.where(signal != 0, rows, -1), axis=0)
+    state = np.zeros(signal.shape, dtype=np.int8)
+    held = latest >= 0
+    state[held] = np.take_along_axis(signal, np.maximum(latest, 0), axis=0)[held]
+    previous = np.zeros(signal.shape, dtype=np.int8)
+    previous[1:] = state[:-1]
+    return np.where(signal != previous, signal, 0).astype(np.int8)
+
+def _crosses_above(values, level):
+    """True where values move from below level to at or above it."""
+    cross = np.zeros(values.shape, dtype=bool)
+    cross[1:] = (values[:-1] < level[:-1]) & (values[1:] >= level[1:])
+    return cross
+
+def _crosses_below(values, level):
+    """True where values move from at or above level to below it."""
+    cross = np.zeros(values.shape, dtype=bool)
+    cross[1:] = (values[:-1] >= level[:-1]) & (values[1:] < level[1:])
+    return cross
+
+def band_breakout(close, middle, upper, lower, start=2):
+    """Buy when the close breaks out above the upper band, sell when it
+    falls back below the middle band. Bars before start get no signal."""
+    close = np.asarray(close)
+    signal = np.zeros(close.shape, dtype=np.int8)
+    signal[_crosses_above(close, upper)] = 1
+    signal[_crosses_below(close, middle)] = -1
+    signal[:start] = 0
+    return alternate(signal)
+
+def band_reversion(close, middle, upper, lower, start=2):
+    """Buy when the close comes back above the lower band, sell when it
+    reaches the middle band. Bars before start get no signal."""
+    close = np.asarray(close)
+    signal = np.zeros(close.shape, dtype=np.int8)
+    signal[_crosses_above(close, lower)] = 1
+    signal[_crosses_above(close, middle)] = -1
+    signal[:start] = 0
+    return alternate(signal)
+
+def _exit_prices(price, side, stop, target):
+    """The closes at or below and at or above which a trade entered at
+    price on side, 1 or -1 or an array of them, reaches its stop or
+    target, infinite for none."""
+    price, side = np.asarray(price, dtype=np.float64), np.asarray(side)
+    stopPrice = price * (1 - side * stop) if stop else np.full(price.shape, np.nan)
+    targetPrice = price * (1 + side * target) if target else np.full(price.shape, np.nan)
+    long = side > 0
+    below = np.where(long, stopPrice, targetPrice)
+    above = np.where(long, targetPrice, stopPrice)
+    return np.nan_to_num(below, nan=-np.inf), np.nan_to_num(above, nan=np.inf)
+
+def _first_exits(close, entries, exits, side, stop, target):
+    """First bar after each entry, up to its exit, at which the trade
+    reaches its stop or target, len(close) for none. Segmented, a batch
+    at a time, like trades.trade_stats."""
+    below, above = _exit_prices(close[entries], side, stop, target)
+    result = np.zeros(len(entries), dtype=np.intp)
+    for batch in trades._batches(entries, exits):
+        index, tradeNo, offsets = trades._segments(entries[batch], exits[batch])
+        prices = close[index]
+        hit = (prices <= below[batch][tradeNo]) | (prices >= above[batch][tradeNo])
+        # the entry bar itself does not count
+        hit[offsets] = False
+        first = np.minimum.reduceat(np.where(hit, np.arange(len(index)), len(index)), offsets)
+        result[batch] = np.append(index, len(close))[first]
+    return result
+
+def _first_exit(close, entry, end, side, stop, target):
+    """_first_exits for a single trade, None if it has no exit. The bars
+    are looked at in blocks that double in size, so finding the exit
+    takes time in proportion to how far away it is."""
+    price = close[entry]
+    stopPrice = price * (1 - side * stop) if stop else None
+    targetPrice = price * (1 + side * target) if target else None
+    below, above = (stopPrice, targetPrice) if side > 0 else (targetPrice, stopPrice)
+    below = -np.inf if below is None else below
+    above = np.inf if above is None else above
+    size = 64
+    begin = entry + 1
+    while begin <= end:
+        prices = close[begin:min(begin + size, end + 1)]
+        hit = (prices <= below) | (prices >= above)
+        if hit.any():
+            return begin + np.argmax(hit)
+        begin += size
+        size *= 2
+    return None
+
+def stop_target(close, signal, stop=None, target=None, start=0, short=False):
+    """Sell at the first close after the entry at or below the entry price
+    less stop, or at or above it plus target, if that comes before the
+    trade's own sell or the last bar. stop and target are fractions of
+    the entry price, None for no exit. With short, shorts are bought back
+    the same way, see _stop_and_reverse."""
+    close = np.asarray(close, dtype=np.float64)
+    signal = np.array(signal, dtype=np.int8)
+    if short and (stop or target):
+        return _stop_and_reverse(close, signal, stop, target, start)
+    entries = np.flatnonzero(signal[start:] == 1) + start
+    if len(entries) == 0 or (not stop and not target):
+        return signal
+    sells = np.flatnonzero(signal == -1)
+    # a buy that is never sold runs to the last bar
+    exits = np.append(sells, len(signal) - 1)[np.searchsorted(sells, entries, side='right')]
+    first = _first_exits(close, entries, exits, 1, stop, target)
+    signal[first[first < len(signal)]] = -1
+    return signal
+
+def _stop_and_reverse(close, signal, stop, target, start):
+    """stop_target for a system that sells short. A sell also goes short
+    and a buy covers, so there is no flat position to exit to: a long is
+    stopped or taken out with a sell that goes short there and a short
+    with a buy that goes long, each trade's stop and target measured
+    against the close it was entered at. Signals that repeat the position
+    held are dropped.
+    The strategy's own trades, from each signal against the position to
+    the next, are checked all at once and skipped until one of them
+    exits. Only the trades from there to where the strategy turns again
+    are walked one at a time."""
+    count = len(signal)
+    moves = np.flatnonzero(signal[start:]) + start
+    if not len(moves):
+        return signal
+    sign = signal[moves]
+    # the moves that turn the strategy and the first such after each move
+    turns = np.append(0, np.flatnonzero(np.diff(sign)) + 1)
+    run = np.searchsorted(turns, np.arange(len(moves)), side='right') - 1
+    against = np.append(turns[1:], len(moves))[run]
+    entries = moves[turns]
+    ends = np.append(entries[1:], count - 1)
+    first = _first_exits(close, entries, ends, sign[turns], stop, target)
+    # the last trade has no turn to end it, an exit on its last bar counts
+    exits = np.flatnonzero((first < ends) | ((first == count - 1) & (ends == count - 1)))
+    # following is None while on the strategy's own trades, otherwise the
+    # next move against the position taken at the last exit
+    turn, following = 0, None
+    while True:
+        if following is None:
+            # skip to the next of the strategy's trades that exits
+            found = np.searchsorted(exits, turn)
+            if found == len(exits):
+                break
+            turn = exits[found]
+            exit, side = first[turn], sign[turns[turn]]
+        else:
+            end = moves[following] if following < len(moves) else count - 1
+            exit = _first_exit(close, entry, end, side, stop, target)
+            if exit is None or (exit == end and following < len(moves)):
+                if following == len(moves):
+                    break
+                turn = np.searchsorted(turns, following)
+                if turn < len(turns) and turns[turn] == following:
+                    # back on the strategy's own trades
+                    following = None
+                else:
+                    entry, side, following = end, -side, against[following]
+                continue
+        # the exit reverses the position
+        signal[exit] = -side
+        entry, side = exit, -side
+        following = np.searchsorted(moves, exit, side='right')
+        if following < len(moves) and sign[following] == side:
+            following = against[following]
+    # buys while long and sells while short
+    signal[start:] = alternate(signal[start:])
+    return signal
+
+def turn_strategy(bars, indLength, indicator='indicator1'):
+    """Buy when the indicator turns up, sell when it turns down."""
+    return ma_turn(bars.column(indicator), indLength + 2)
+
+def breakout_strategy(bars, indLength, indicator='indicator1'):
+    """Bollinger Band breakouts, see band_breakout. Needs the bands from
+    calcIndicator with kind 'bollinger'."""
+    return band_breakout(bars.close, bars.column(indicator), bars.column(indicator + 'Upper'),
+        bars.column(indicator + 'Lower'), indLength + 2)
+
+def reversion_strategy(bars, indLength, indicator='indicator1'):
+    """Bollinger Band mean reversion, see band_reversion. Needs the bands
+    from calcIndicator with kind 'bollinger'."""
+    return band_reversion(bars.close, bars.column(indicator), bars.column(indicator + 'Upper'),
+        bars.column(indicator + 'Lower'), indLength + 2)
+
+def column_strategy(bars, indLength, indicator='indicator1', column='external'):
+    """Signals supplied from outside, the sign of the column called column.
+    Missing values and bars before the indicator is ready get no signal.
+    A column of positions, 1 on every bar held, gives a buy only where
+    the position is taken, see alternate."""
+    values = np.nan_to_num(np.asarray(bars.column(column), dtype=np.float64))
+    signal = np.sign(values).astype(np.int8)
+    signal[:indLength + 2] = 0
+    return alternate(signal)
+
+# strategies by name
+STRATEGIES = {
+    'ma_turn': turn_strategy,
+    'breakout': breakout_strategy,
+    'reversion': reversion_strategy,
+    'column': column_strategy,
+}
@@ -0,0 +1,165 @@
+"""
+DESCRIPTION
+    Stage-level memoization for the SystemView calculation chain
+
+    Each stage's result is stored under a key made from a hash of its
+    input arrays, its parameters and the source of the modules that
+    calculate it, so a result is reused only while all three are the
+    same. Results are kept in memory and, given a directory, on disk as
+    one .npz file per key. Both stores drop their least recently used
+    results once they grow past their size limit.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+from collections import OrderedDict                 # least recently used order
+import hashlib                                      # content hashes
+import os                                           # file system
+import numpy as np                                  # numpy
+
+# default size limits in bytes
+MEMORY_BYTES = 256 * 2**20
+DISK_BYTES = 1024 * 2**20
+
+# source hash of each module, read once
+_versions = {}
+
+def code_version(modules):
+    """Hash of the source files of the modules."""
+    digest = hashlib.sha1()
+    for module in modules:
+        fileName = os.path.splitext(module.__file__)[0] + '.py'
+        if fileName not in _versions:
+            with open(fileName, 'rb') as source:
+                _versions[fileName] = hashlib.sha1(source.read()).hexdigest()
+        digest.update(_versions[fileName].encode('ascii'))
+    return digest.hexdigest()
+
+def stage_key(stage, arrays, params, modules=()):
+    """Key for a stage run on the input arrays with params, a repr-able
+    value such as a tuple of numbers and strings."""
+    digest = hashlib.sha1()
+    digest.update(stage.encode('utf-8'))
+    digest.update(code_version(modules).encode('ascii'))
+    digest.update(repr(params).encode('utf-8'))
+    for values in arrays:
+        values = np.ascontiguousarray(values)
+        digest.update(str(values.dtype).encode('ascii'))
+        digest.update(repr(values.shape).encode('ascii'))
+        digest.update(values.view(np.uint8).reshape(-1))
+    return digest.hexdigest()
+
+def _nbytes(result):
+    """Memory held by a result."""
+    return sum(values.nbytes for values in result.values())
+
+class StageCache(object):
+    """Results of calculation stages, dictionaries of arrays, by key.
+    Cached arrays are read-only, copy them before changing them."""
+    def __init__(self, directory=None, memoryBytes=MEMORY_BYTES, diskBytes=DISK_BYTES):
+        self.directory = directory      # where results are saved, None for memory only
+        self.memoryBytes = memoryBytes  # memory size limit
+        self.diskBytes = diskBytes      # disk size limit
+        self.memory = OrderedDict()     # results, least recently used first
+        self.used = 0                   # bytes held in memory
+        self.hits = 0                   # results found
+        self.misses = 0                 # results calculated
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def path(self, key):
+        """File a result is saved in."""
+        return os.path.join(self.directory, key + '.npz')
+
+    def get(self, key):
+        """The result stored under key, None if there is none."""
+        if key in self.memory:
+            result = self.memory.pop(key)
+            self.memory[key] = result
+            return result
+        if not self.directory:
+            return None
+        try:
+            with np.load(self.path(key)) as saved:
+                result = dict((name, saved[name]) for name in saved.files)
+            # mark it recently used
+            os.utime(self.path(key), None)
+        except (IOError, OSError, ValueError):
+            return None
+        self.remember(key, result)
+        return result
+
+    def put(self, key, result):
+        """Store a result under key."""
+        result = dict((name, np.array(values)) for name, values in result.items())
+        self.remember(key, result)
+        if self.directory:
+            self.save(key, result)
+        return result
+
+    def remember(self, key, result):
+        """Keep a result in memory, dropping the least recently used ones
+        past the memory limit."""
+        for values in result.values():
+            values.setflags(write=False)
+        if key in self.memory:
+            self.used -= _nbytes(self.memory.pop(key))
+        self.memory[key] = result
+        self.used += _nbytes(result)
+        while self.used > self.memoryBytes and len(self.memory) > 1:
+            oldKey, oldResult = self.memory.popitem(last=False)
+            self.used -= _nbytes(oldResult)
+
+    def save(self, key, result):
+        """Save a result to disk, dropping the least recently used files
+        past the disk limit. The file is written under a temporary name
+        so a partial result is never read."""
+        temporary = os.path.join(self.directory, key + '.tmp.npz')
+        try:
+            np.savez(temporary, **result)
+            os.rename(temporary, self.path(key))
+        except (IOError, OSError):
+            return
+        self.evict()
+
+    def evict(self):
+        """Delete the least recently used files past the disk limit."""
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz') and not name.endswith('.tmp.npz'):
+                info = os.stat(os.path.join(self.directory, name))
+                files.append((info.st_mtime, info.st_size, name))
+        files.sort()
+        total = sum(size for mtime, size, name in files)
+        for mtime, size, name in files[:-1]:
+            if total <= self.diskBytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+
+    def stage(self, stage, arrays, params, calculate, modules=()):
+        """Return the stored result of a stage, or calculate() it and
+        store it. calculate returns a dictionary of arrays."""
+        key = stage_key(stage, arrays, params, modules)
+        result = self.get(key)
+        if result is not None:
+            self.hits += 1
+            return result
+        self.misses += 1
+        return self.put(key, calculate())
+
+    def clear(self):
+        """Forget every result, on disk too."""
+        self.memory = OrderedDict()
+        self.used = 0
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith('.npz'):
+                    os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,194 @@
+"""
+DESCRIPTION
+    Incremental updates for SystemView
+
+    Keeps the running state of a calculated View, the moving average sum,
+    position, open trades, equity and drawdown state, so that each new
+    bar is processed in O(1) and the View ends up as a full recompute
+    would leave it, the same trades and signals and the same statistics
+    to within rounding.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import numpy as np                                  # numpy
+import indicators
+import timeseries
+
+class OpenTrade(object):
+    """Running statistics of a trade that has not been sold yet."""
+    def __init__(self, entry, price):
+        self.entry = entry      # bar index of the buy
+        self.price = price      # entry price
+        self.low = price        # lowest close so far
+        self.peak = price       # highest close so far
+        self.mae = 0.0          # worst close against the highest so far
+        self.dist = 0.0         # distance traveled
+        self.vol = 0.0          # sum of absolute single-period returns
+        self.count = 0          # bars held
+
+    def update(self, close, previous):
+        """Add one bar to the trade."""
+        self.low = min(self.low, close)
+        if close > self.peak:
+            self.peak = close
+        self.mae = min(self.mae, close / self.peak - 1)
+        self.dist += abs(close - previous)
+        self.vol += abs(close / previous - 1)
+        self.count += 1
+
+class Stream(object):
+    """Update a calculated View one bar at a time.
+    Only the simple moving average can be updated this way."""
+    def __init__(self, view, indLength, indicator='indicator1'):
+        """Pick up the state of a View that calcAll has run on."""
+        self.view = view
+        self.indLength = indLength
+        self.indicator = indicator
+        data = view.myData
+        close, signal, equity = data.close, data.signal, data.equity
+        # the moving average sum exactly as indicators.sma left it
+        self.indSum = None
+        if len(data) >= indLength:
+            self.indSum = indicators.rolling_sum(close, indLength)[-1]
+        # the position after the last signal
+        moves = np.flatnonzero(signal)
+        self.longPosition = len(moves) > 0 and signal[moves[-1]] == 1
+        # buys since the last sell are still open
+        sells = np.flatnonzero(signal == -1)
+        first = max(indLength + 2, sells[-1] + 1 if len(sells) else 0)
+        self.openTrades = []
+        for entry in np.flatnonzero(signal[first:] == 1) + first:
+            trade = OpenTrade(entry, close[entry])
+            for j in range(entry + 1, len(data)):
+                trade.update(close[j], close[j-1])
+            self.openTrades.append(trade)
+        # peak equity and bars in drawdown as calcTimeInDrawdown counts them
+        self.maximum = equity[1:].max() if len(data) > 1 else 0
+        self.count = np.count_nonzero(data.timeInDD[1:])
+        self.sumSquares = np.sum(data.underwater[1:]**2)
+        # the last episode is extended in place, cached tables are read-only
+        view.episodes = view.episodes.copy()
+        # running sums of the closed trades as calcSummaryData and calcReturns take them
+        self.sumWins = sum(view.wins)
+        self.sumLosses = sum(view.losses)
+        self.gain = 1
+        for trade in view.trades:
+            self.gain = self.gain * (1 + trade[1])
+
+    def append(self, date, open, high, low, close, volume):
+        """Add a bar and update the indicator, signal, trades, equity
+        and time in drawdown of the View."""
+        view, length = self.view, self.indLength
+        data = view.myData
+        data.append(date, open, high, low, close, volume)
+        i = len(data) - 1
+        closes, ind, signal = data.close, data.column(self.indicator), data.signal
+        # simple moving average
+        if i >= length:
+            self.indSum += closes[i] - closes[i-length]
+        elif i == length - 1:
+            self.indSum = closes[:length].sum()
+        ind[i] = self.indSum / length if i >= length - 1 else np.nan
+        # moving average changes in direction
+        if i >= length + 2:
+            if ind[i-2] > ind[i-1] and ind[i-1] < ind[i]:
+                signal[i] = 1
+            elif ind[i-2] < ind[i-1] and ind[i-1] > ind[i]:
+                signal[i] = -1
+        if i == 0:
+            return
+        # equity from the position held over the last bar
+        if self.longPosition:
+            data.equity[i] = closes[i] / closes[i-1] * data.equity[i-1]
+        else:
+            data.equity[i] = data.equity[i-1]
+        if signal[i] == 1:
+            self.longPosition = True
+        elif signal[i] == -1:
+            self.longPosition = False
+        # time in drawdown
+        if data.equity[i] < self.maximum:
+            data.timeInDD[i] = data.timeInDD[i-1] + 1
+            self.count += 1
+        else:
+            self.maximum = data.equity[i]
+        view.regret = self.count / i
+        self.updateDrawdown(i)
+        # trades
+        for trade in self.openTrades:
+            trade.update(closes[i], closes[i-1])
+        if signal[i] == -1 and self.openTrades:
+            self.closeTrades(i)
+        elif signal[i] == 1:
+            self.openTrades.append(OpenTrade(i, closes[i]))
+        self.updateSummary()
+
+    def updateDrawdown(self, i):
+        """Extend the underwater curve, drawdown episodes, max drawdown
+        and Ulcer index of the View to bar i."""
+        view = self.view
+        data = view.myData
+        depth = data.equity[i] / self.maximum - 1
+        data.underwater[i] = depth
+        view.maxDrawdown = min(view.maxDrawdown, depth)
+        self.sumSquares += depth**2
+        view.ulcerIndex = np.sqrt(self.sumSquares / i)
+        if data.timeInDD[i] == 1:
+            episode = np.zeros(1, dtype=view.episodes.dtype)
+            episode[0] = (i - 1, i, -1, depth, 1)
+            view.episodes = np.concatenate([view.episodes, episode])
+        elif data.timeInDD[i] > 1 or data.timeInDD[i-1] > 0:
+            last = view.episodes[-1:]
+            last['duration'] = i - last['start']
+            if data.timeInDD[i] == 0:
+                last['recovery'] = i
+            elif depth < last['depth']:
+                last['depth'] = depth
+                last['trough'] = i
+
+    def closeTrades(self, exit):
+        """Sell the open trades. Their statistics come from the running
+        values each OpenTrade kept, as trades.trade_stats defines them, so
+        closing takes time in the number of open trades, not bars."""
+        view = self.view
+        close = view.myData.close[exit]
+        for trade in self.openTrades:
+            date = view.myData.date[trade.entry].item()
+            ret = float(close / trade.price - 1)
+            view.trades.append([date, ret, trade.count])
+            if ret > 0.0:
+                view.wins.append(ret)
+                self.sumWins += ret
+            else:
+                view.losses.append(ret)
+                self.sumLosses += ret
+            self.gain = self.gain * (1 + ret)
+            drawdown = trade.low / trade.price - 1 if trade.low < trade.price else 0.0
+            view.drawdowns.append([date, float(drawdown)])
+            view.mae.append([date, float(trade.mae)])
+            view.efficiency.append([date, float(trade.dist / trade.count / trade.price)])
+            view.inTradeVol.append([date, float(trade.vol / trade.count)])
+        # the per-trade arrays are rebuilt by calcTrades
+        view.tradeStats = None
+        self.openTrades = []
+
+    def updateSummary(self):
+        """Refresh the calcSummaryData and calcReturns statistics."""
+        view = self.view
+        if not (view.wins and view.losses):
+            return
+        view.winPct = len(view.wins) / len(view.trades)
+        avgWin = self.sumWins / len(view.wins)
+        avgLoss = self.sumLosses / len(view.losses)
+        view.prftFact = avgWin / abs(avgLoss)
+        view.expectancy = view.winPct * view.prftFact - (1-view.winPct)
+        view.averages = [[avgWin, avgLoss]]
+        years = float(timeseries.years_between(view.myData.date[1], view.myData.date[-1]))
+        if years > 0:
+            gain = self.gain - 1
+            view.gains = [[gain, (1 + gain)**(1/years) - 1]]
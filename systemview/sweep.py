@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+DESCRIPTION
+    SystemView parameter sweep
+
+    Runs the calculation chain for every combination of indicator length
+    and date window across a process pool. The bars are loaded once and
+    shared read-only with the workers. Results come back in grid order
+    whatever the number of workers.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import itertools                                    # parameter grid
+import multiprocessing                              # process pool
+import numpy as np                                  # numpy
+# import our system variables from parameters.py
+import parameters as param
+from bars import PRICE_FIELDS
+from systemview import View
+
+# one row of the results table per parameter set
+RESULT_DTYPE = [
+    ('maLength', np.int64),
+    ('start', 'datetime64[D]'),     # first bar in the window
+    ('end', 'datetime64[D]'),       # last bar in the window
+    ('trades', np.int64),
+    ('wins', np.int64),
+    ('losses', np.int64),
+    ('winPct', np.float64),
+    ('avgWin', np.float64),
+    ('avgLoss', np.float64),
+    ('prftFact', np.float64),
+    ('expectancy', np.float64),
+    ('totalGain', np.float64),
+    ('annualGain', np.float64),
+    ('regret', np.float64),
+]
+
+# bars shared with each worker process
+_bars = None
+
+def _init_worker(bars):
+    """Keep the shared bars in the worker, read-only."""
+    global _bars
+    for name in PRICE_FIELDS:
+        getattr(bars, name).setflags(write=False)
+    _bars = bars
+
+def _run_task(task):
+    """Run one parameter set against the shared bars."""
+    return run_system(_bars, *task)
+
+def run_system(bars, indLength, start=None, end=None, kind='sma', strategy='ma_turn'):
+    """Run the calculation chain for one parameter set.
+    Returns a row of the results table. Statistics that can't be
+    calculated, such as the average loss without any losers, are NaN or
+    inf, see View.calcSummaryData."""
+    view = View()
+    view.setData(bars.window(start, end))
+    nan = float('nan')
+    first, last = np.datetime64('NaT'), np.datetime64('NaT')
+    if len(view.myData):
+        first, last = view.myData.date[0], view.myData.date[-1]
+    if len(view.myData) <= indLength + 2:
+        return (indLength, first, last, 0, 0, 0) + (nan,) * 8
+    view.calcIndicator(indLength, kind)
+    view.calcSignals(indLength, strategy=strategy)
+    view.calcTrades(indLength)
+    view.calcEquityCurve()
+    view.calcTimeInDrawdown()
+    view.calcSummaryData()
+    view.calcReturns()
+    return (indLength, first, last, len(view.trades), len(view.wins), len(view.losses),
+        view.winPct, view.averages[0][0], view.averages[0][1], view.prftFact,
+        view.expectancy, view.gains[0][0], view.gains[0][1], view.regret)
+
+def sweep(bars, lengths, windows=((None, None),), kind='sma', processes=None):
+    """Run every combination of indicator length and (start, end) window.
+    processes is the pool size, None for every core, 1 to run in this
+    process. Returns a structured array in lengths-then-windows order."""
+    tasks = [(indLength, start, end, kind)
+        for indLength, (start, end) in itertools.product(lengths, windows)]
+    return run_tasks(bars, tasks, processes)
+
+def run_tasks(bars, tasks, processes=None):
+    """Run each task, the arguments of run_system after bars, across a
+    process pool. Returns a structured array in task order."""
+    if processes == 1:
+        rows = [run_system(bars, *task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(processes, _init_worker, (bars,))
+        try:
+            rows = pool.map(_run_task, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    return np.array(rows, dtype=RESULT_DTYPE)
+
+def print_table(results):
+    """Print the results table."""
+    print("Length Start      End        Trades  Win %  Prft fact  Expect  Ann gain  Regret")
+    for row in results:
+        print("{0:6d} {1} {2} {3:6d} {4:6.2f}% {5:9.2f} {6:7.2f} {7:8.2f}% {8:6.2f}%".format(
+            row['maLength'], row['start'], row['end'], row['trades'], row['winPct'] * 100,
+            row['prftFact'], row['expectancy'], row['annualGain'] * 100, row['regret'] * 100))
+
+if __name__ == '__main__':
+    # load the bars once for every run
+    a = View()
+    a.getData(param.file1, param.cacheData, period=param.barPeriod, chunkRows=param.chunkRows,
+        format=param.dataFormat, columns=param.dataColumns, adjusted=param.adjustedClose)
+    print_table(sweep(a.myData, param.sweepLengths, param.sweepWindows, param.indicator))
+
+# That's all folks!
@@ -16,17 +16,38 @@ from __future__ import (division, print_function)
 # import external libraries
 import sys                                          # system functions
 import datetime                                     # date functions
+import importlib                                    # deferred imports
 import numpy as np                                  # numpy
-import matplotlib.pyplot as plt                     # pyplot
-import matplotlib.dates as mdates                   # dates for pyplot
-from matplotlib.ticker import FormatStrFormatter    # format graph axes
-from dateutil.relativedelta import relativedelta    # date math
-try:                                                # Tkinter for Python2
-    import Tkinter as tk
-except ImportError:                                 # tkinter for Python3
-    import tkinter as tk
 # import our system variables from parameters.py
 import parameters as param
+# columnar bar store
+from bars import Bars
+# vectorized indicators
+import indicators
+# trade lifecycle engine
+import trades
+# bulk csv loading
+import loader
+# vectorized signals
+import signals
+# incremental updates
+import stream
+# decimation of long series for plotting
+import decimate
+# Monte Carlo trade resampling
+import montecarlo
+# long, short and sized positions
+import equity
+# memoized calculation stages
+import stagecache
+# per-stage timing and profiling
+import instrument
+# timestamps and resampling
+import timeseries
+# underwater curve and drawdown episodes
+import drawdown
+# statistics over time
+import rolling
 
 # version number
 __author__ = "John Bollinger"
@@ -34,8 +55,33 @@ __version__ = "0.1"
 
 # range/xrange patch for python 2 and 3 compatibility
 if sys.version_info >= (3, 0):
-    def xrange(*args, **kwargs):
-        return iter(range(*args, **kwargs))
+    xrange = range
+
+class _LazyModule(object):
+    """A module imported the first time one of its names is used, the
+    first of names that imports."""
+    def __init__(self, *names):
+        self._names = names
+        self._module = None
+
+    def __getattr__(self, name):
+        if self._module is None:
+            for moduleName in self._names:
+                try:
+                    self._module = importlib.import_module(moduleName)
+                    break
+                except ImportError:
+                    if moduleName == self._names[-1]:
+                        raise
+        return getattr(self._module, name)
+
+# the GUI libraries are imported by the first chart or window, so runs
+# that only need the numbers start quickly and need no display
+plt = _LazyModule('matplotlib.pyplot')              # pyplot
+mdates = _LazyModule('matplotlib.dates')            # dates for pyplot
+ticker = _LazyModule('matplotlib.ticker')           # format graph axes
+tk = _LazyModule('Tkinter', 'tkinter')              # Tkinter for Python2, tkinter for Python3
+dashboard = _LazyModule('dashboard')                # all charts in one window
 
 def yahoo_to_iso_date(date):
     """Convert Yahoo!'s date to datetime object."""
@@ -50,14 +96,56 @@ def yahoo_to_iso_date(date):
     return datetime.date(year, month, day)
 
 def string_to_date(date):
-    """Convert yyyy-mm-dd string to datetime object."""
-    date = date.split('-')
-    return datetime.date(int(date[0]), int(date[1]), int(date[2]))
+    """Convert yyyy-mm-dd string to date object, or yyyy-mm-dd hh:mm[:ss]
+    to datetime object."""
+    return np.datetime64(date.strip().replace(' ', 'T')).item()
+
+def ratio(numerator, denominator):
+    """numerator / denominator as a float, inf or NaN when the denominator
+    is zero, so too few trades leave statistics undefined, not an error."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return float(np.float64(numerator) / denominator)
+
+def json_stats(stats):
+    """A dictionary of statistics with the NaN and inf that ratio gives
+    as None, json has no numbers for them."""
+    return dict((name, value if np.isfinite(value) else None) for name, value in stats.items())
+
+# parameters.py flag and View method for every chart
+CHARTS = (
+    'displayPriceGraph',
+    'displayPriceTradesGraph',
+    'displayTradeGraph',
+    'displayTradesVersusTime',
+    'displayEquityCurve',
+    'displayMonteCarlo',
+    'displayEquityCurveLog',
+    'displayDistribution',
+    'displayDrawdownGraph',
+    'displayTimeInDrawDown',
+    'displayMAE',
+    'displayEfficiency',
+    'displayInTradeVol',
+    'displayRollingStats',
+    'displayRollingDrawdown',
+)
+
+def enabled_charts(params=param):
+    """The charts switched on in params, with their arguments."""
+    arguments = {
+        'displayPriceGraph': (params.priceIndicators,),
+        'displayPriceTradesGraph': (params.distance,),
+        'displayMonteCarlo': (params.monteCarloBandPaths, params.monteCarloMethod,
+            params.monteCarloSeed),
+        'displayRollingStats': (params.rollingTrades,),
+        'displayRollingDrawdown': (params.rollingBars,),
+    }
+    return [(name, arguments.get(name, ())) for name in CHARTS if getattr(params, name)]
 
 class View(object):
     """Display trading statistics as charts instead of tables."""
     def __init__(self):
-        self.myData = []        # main data structure
+        self.myData = Bars()    # main data structure
         self.trades = []        # trade list
         self.wins = []          # list of winning trades
         self.losses = []        # list of losing trades
@@ -68,214 +156,382 @@ class View(object):
         self.gains = []         # total and annual gains
         self.drawdowns = []     # list of drawdowns
         self.regret = 0         # regret is the % of time in drawdown
+        self.maxDrawdown = 0    # deepest fall of the equity curve from its peak
+        self.ulcerIndex = 0     # root mean square of the underwater curve
+        self.episodes = None    # drawdown episodes, see drawdown.episodes
+        self.rollingTrades = None   # statistics of each window of trades, see rolling.trade_table
+        self.expandingTrades = None # statistics of the trades so far
+        self.rollingBars = None     # drawdown statistics of each window of bars, see rolling.bar_table
+        self.expandingBars = None   # drawdown statistics of the bars so far
         self.mae = []           # list of Maximum Adverse Excursions
         self.efficiency = []    # list of efficiencies
         self.inTradeVol = []    # list of in-trade volatilties
-
-    def getData(self, fileName):
-        """Load the data from a csv file."""
-        # open the file
-        source = open(fileName, 'r')
-        # dump the first line
-        source.readline()
-        # put the data in our list
-        for line in source:
-            line.strip() # get rid of the new line
-            data = line.split(',')
-            # 0 = date, 1 = open, 2 = high, 3 = low, 4 = close, 5 = volume,
-            # 6 = indicator 1, 7 = indicator 2, 8 = signal and 9 = equity curve
-            # 10 = TimeInDD
-            self.myData.append([string_to_date(data[0]), float(data[1]), float(data[2]),\
-                float(data[3]), float(data[4]), int(data[5]), 0, 0, 0, 1, 0])
-        # Reverse if data is in reverse order
-        if self.myData[0][0] > self.myData[1][0]:
-            self.myData.reverse()
-        # TODO Allow for import of indicator and/or signals
-
-    def calcIndicator(self, indLength):
-        """Calculate an indicator to be used for decision making."""
-        # TODO allow for import of external indicator
-        # simple moving average
-        for i in xrange(indLength - 1, len(self.myData)):
-            indSum = 0
-            for j in xrange(0, indLength):
-                indSum += self.myData[i-j][4]
-            self.myData[i][6] = indSum / indLength
-
-    def calcSignals(self, indLength):
+        self.tradeStats = None  # per-trade arrays from trades.trade_stats
+        self.tradeSettings = (None, False, 0.0, 0.0, 1.0)   # calcTradeStats arguments of tradeStats
+        self.stream = None      # incremental update state, see startStream
+        self.showCharts = True  # False to have display methods return their figure unshown
+        self.dashboard = None   # the last dashboard.Dashboard, kept so its events stay connected
+        self.monteCarlo = None  # statistics of resampled trade sequences
+        self.cache = None       # stagecache.StageCache to reuse stage results, None to always calculate
+        self.profiler = None    # instrument.Profiler to record each stage, None for no overhead
+
+    @instrument.timed
+    def getData(self, fileName, cache=True, start=None, end=None, period=None, chunkRows=None,
+            format=None, columns=None, adjusted=False):
+        """Load the data from a csv, Yahoo!, AmiBroker, Parquet or Feather file.
+        The file is parsed in one step and cached next to itself in binary
+        form, later loads memory-map the cache, see loader.load. format,
+        columns and adjusted pick the reader, see readers.read.
+        Only the bars from start to end, "yyyy-mm-dd" or "yyyy-mm-dd hh:mm"
+        inclusive, are used, a ValueError if there are none. They are found
+        by binary search and are a view, not a copy. With period, e.g. "5m",
+        "1h" or "1D", the bars are resampled to that length. With chunkRows,
+        files are parsed and resampled that many rows at a time, so minute
+        bars that don't fit in memory can be used."""
+        bars = loader.load(fileName, cache, chunkRows, format, columns, adjusted).window(start, end)
+        if not len(bars):
+            raise ValueError("{0} has no bars from {1} to {2}".format(fileName,
+                start or "the first", end or "the last"))
+        if period:
+            bars = timeseries.resample_chunked(bars, period, chunkRows or timeseries.CHUNK_ROWS)
+        self.myData = bars
+
+    @instrument.timed
+    def importColumn(self, fileName, name):
+        """Import an external indicator or signal column from a csv file of
+        dates and values, see loader.parse_column. Dates the file doesn't
+        have are NaN. Use the column called external with the column
+        strategy to trade external signals."""
+        date, value = loader.parse_column(fileName)
+        order = np.argsort(date, kind='stable')
+        date, value = date[order], value[order]
+        column = np.full(len(self.myData), np.nan)
+        if len(date):
+            where = np.minimum(np.searchsorted(date, self.myData.date), len(date) - 1)
+            found = date[where] == self.myData.date
+            column[found] = value[where[found]]
+        self.myData.setColumn(name, column)
+
+    @instrument.timed
+    def setData(self, bars):
+        """Use bars that are already loaded.
+        The price columns are shared, not copied, so they may be read-only."""
+        self.myData = bars.fresh()
+
+    @instrument.timed
+    def calcAll(self, indLength, kind='sma', strategy='ma_turn', stop=None, target=None,
+            short=False, size=1.0, commission=0.0, slippage=0.0):
+        """Run the whole calculation chain on the loaded data."""
+        # calculate indicator
+        self.calcIndicator(indLength, kind)
+        # calculate signals
+        self.calcSignals(indLength, strategy=strategy, stop=stop, target=target, short=short)
+        # get a list of trades with their drawdowns, Maximum Adverse Excursions,
+        # efficiencies and in-trade volatilities
+        self.calcTrades(indLength, short, commission, slippage, size)
+        # calculate returns
+        self.calcReturns()
+        # calculate equity curve
+        self.calcEquityCurve(short, size, commission, slippage)
+        # calculate time to recover peak asset value
+        self.calcTimeInDrawdown()
+        # calculate summary data
+        self.calcSummaryData()
+
+    def calcStage(self, stage, arrays, params, calculate, modules):
+        """Run calculate, or reuse its result from self.cache when the input
+        arrays, params and the source of modules are unchanged. The source
+        of this module is always part of the key, calculate is written here."""
+        if self.cache is None:
+            return calculate()
+        modules = [sys.modules[__name__]] + list(modules)
+        return self.cache.stage(stage, arrays, params, calculate, modules)
+
+    @instrument.timed
+    def calcIndicator(self, indLength, kind='sma', name='indicator1', **kwargs):
+        """Calculate an indicator to be used for decision making.
+        kind is one of indicators.INDICATORS, the result is stored in the
+        column called name. Bollinger Bands also store nameUpper and nameLower.
+        External indicators can be loaded with importColumn."""
+        def calculate():
+            result = indicators.INDICATORS[kind](self.myData.close, indLength, **kwargs)
+            if isinstance(result, tuple):
+                return dict(zip(('middle', 'upper', 'lower'), result))
+            return {'middle': result}
+        result = self.calcStage('indicator', [self.myData.close],
+            (kind, indLength, sorted(kwargs.items())), calculate, [indicators])
+        self.myData.setColumn(name, result['middle'])
+        if 'upper' in result:
+            self.myData.setColumn(name + 'Upper', result['upper'])
+            self.myData.setColumn(name + 'Lower', result['lower'])
+
+    @instrument.timed
+    def calcSignals(self, indLength, indicator='indicator1', strategy='ma_turn',
+            stop=None, target=None, short=False, **kwargs):
         """Calculate the signals from the indicator.
-        1 for buy, 0 for no action -1 for sell or short."""
-        # moving average changes in direction
-        # TODO Exit logic
-        for i in xrange(indLength + 2, len(self.myData)):
-            if self.myData[i-2][6] > self.myData[i-1][6] and self.myData[i-1][6] < self.myData[i][6]:
-                self.myData[i][8] = 1
-            elif self.myData[i-2][6] < self.myData[i-1][6] and self.myData[i-1][6] > self.myData[i][6]:
-                self.myData[i][8] = -1
-
-    def calcTrades(self, indLength):
-        """Calculate the trades and drawdowns from the signals."""
-        for i in xrange(indLength + 2, len(self.myData)):
-            if self.myData[i][8] == 1:
-                entry = self.myData[i][4] # entry price
-                drawdown = sys.maxint # a large number
-                for j in xrange(i, len(self.myData)):
-                    if self.myData[j][4] < entry: # drawdown
-                        drawdown = self.myData[j][4]
-                    if self.myData[j][8] == -1: # exit
-                        trade = self.myData[j][4] / self.myData[i][4] - 1
-                        self.trades.append([self.myData[i][0], trade, j - i])
-                        if trade > 0.0:
-                            self.wins.append(trade)
-                        else:
-                            self.losses.append(trade)
-                        if drawdown < entry:
-                            self.drawdowns.append([self.myData[i][0], drawdown/entry-1])
-                        else:
-                            self.drawdowns.append([self.myData[i][0], 0.0])
-                        break
-
-    def calcEquityCurve(self):
-        """Calculate the equity curve.
-        Compound the value of an initial dollar."""
-        longPosition = False
-        for i in xrange(0, len(self.myData) - 1):
-            if self.myData[i][8] == 1:
-                longPosition = True
-            elif self.myData[i][8] == -1:
-                longPosition = False
-            delta = self.myData[i+1][4] / self.myData[i][4]
-            if longPosition:
-                self.myData[i+1][9] = delta * self.myData[i][9]
+        1 for buy, 0 for no action -1 for sell or short.
+        strategy is one of signals.STRATEGIES or a function taking the bars,
+        indLength, indicator and kwargs that returns the signal column,
+        moving average changes in direction by default. stop and target
+        add exits at a loss or gain, fractions of the entry price, for
+        shorts too with short, see signals.stop_target."""
+        rule = strategy if callable(strategy) else signals.STRATEGIES[strategy]
+        def calculate():
+            signal = rule(self.myData, indLength, indicator, **kwargs)
+            if stop or target:
+                signal = signals.stop_target(self.myData.close, signal, stop, target,
+                    indLength + 2, short)
+            return {'signal': signal}
+        if callable(strategy):
+            # only the named strategies have their source in the key
+            result = calculate()
+        else:
+            # any column but the calculated ones may be read
+            inputs = [self.myData.column(name) for name in self.myData.names
+                if name not in ('signal', 'equity', 'timeInDD', 'underwater')]
+            result = self.calcStage('signals', inputs,
+                (strategy, indLength, indicator, stop, target, short, sorted(kwargs.items())),
+                calculate, [signals, trades])
+        self.myData.signal[:] = result['signal']
+
+    def startStream(self, indLength, indicator='indicator1'):
+        """Get ready to add bars one at a time with appendBar.
+        calcAll must have been run with the sma indicator and the
+        ma_turn strategy, long only, without stops, targets or costs."""
+        self.stream = stream.Stream(self, indLength, indicator)
+
+    @instrument.timed
+    def appendBar(self, date, open, high, low, close, volume):
+        """Add a bar and update every calculation in O(1), as if the
+        whole calculation chain had been run again."""
+        self.stream.append(date, open, high, low, close, volume)
+
+    @instrument.timed
+    def calcTrades(self, indLength, short=False, commission=0.0, slippage=0.0, size=1.0):
+        """Calculate the trades, drawdowns, Maximum Adverse Excursions,
+        efficiencies and in-trade volatilities from the signals.
+        Each buy is paired with the next sell once and every statistic is
+        taken from that single pass, see trades.trade_stats. With short
+        each sell is also paired with the next buy as a short trade.
+        Returns are net of commission and slippage, fractions of the value
+        traded paid going in and coming out, and of the position size as
+        calcEquityCurve holds it, see equity.sized_returns."""
+        stats = self.calcTradeStats(indLength, short, commission, slippage, size)
+        dates = self.myData.date[stats.entry].tolist()
+        self.trades = [[d, r, n] for d, r, n in zip(dates, stats.returns.tolist(), stats.length.tolist())]
+        self.wins = stats.returns[stats.returns > 0.0].tolist()
+        self.losses = stats.returns[stats.returns <= 0.0].tolist()
+        self.drawdowns = [list(x) for x in zip(dates, stats.drawdown.tolist())]
+        self.mae = [list(x) for x in zip(dates, stats.mae.tolist())]
+        self.efficiency = [list(x) for x in zip(dates, stats.efficiency.tolist())]
+        self.inTradeVol = [list(x) for x in zip(dates, stats.volatility.tolist())]
+
+    @instrument.timed
+    def calcTradeStats(self, indLength, short=False, commission=0.0, slippage=0.0, size=1.0):
+        """Pair the signals into trades and calculate their statistics.
+        The per-trade arrays are kept in self.tradeStats."""
+        def calculate():
+            if short:
+                entries, exits, direction = trades.pair_long_short(self.myData.signal, indLength + 2)
             else:
-                self.myData[i+1][9] = self.myData[i][9]
-
+                entries, exits = trades.pair_trades(self.myData.signal, indLength + 2)
+                direction = 1
+            stats = trades.trade_stats(self.myData.close, entries, exits, direction)
+            stats = stats._replace(returns=equity.sized_returns(self.myData.close, stats, size,
+                commission + slippage))
+            return stats._asdict()
+        sizes = np.asarray(size, dtype=np.float64)
+        result = self.calcStage('trades', [self.myData.close, self.myData.signal, sizes],
+            (indLength, short, commission + slippage), calculate, [trades, equity])
+        self.tradeStats = trades.TradeStats(**result)
+        self.tradeSettings = (indLength, short, commission, slippage, size)
+        return self.tradeStats
+
+    def currentTradeStats(self, indLength):
+        """self.tradeStats for indLength. Calculated again, with the short,
+        cost and size settings it last had, if it is missing, as after bars are
+        added, or was for another length."""
+        if self.tradeStats is None or self.tradeSettings[0] != indLength:
+            self.calcTradeStats(indLength, *self.tradeSettings[1:])
+        return self.tradeStats
+
+    @instrument.timed
+    def calcEquityCurve(self, short=False, size=1.0, commission=0.0, slippage=0.0):
+        """Calculate the equity curve.
+        Compound the value of an initial dollar, long size after a buy and
+        short size after a sell with short, otherwise flat. Commission and
+        slippage are fractions of the value traded, see equity.growth."""
+        def calculate():
+            position = equity.positions(self.myData.signal, short, size)
+            return {'equity': equity.equity_curve(self.myData.close, position, commission + slippage)}
+        sizes = np.asarray(size, dtype=np.float64)
+        result = self.calcStage('equity', [self.myData.close, self.myData.signal, sizes],
+            (short, commission + slippage), calculate, [equity])
+        self.myData.equity[:] = result['equity']
+
+    @instrument.timed
     def calcTimeInDrawdown(self):
-        """Calculate time spent in draw down."""
-        maximum = 0
-        count = 0
-        for i in xrange(1, len(self.myData)):
-            if self.myData[i][9] < maximum:
-                self.myData[i][10] = self.myData[i-1][10] + 1
-                count += 1
-            else:
-                maximum = self.myData[i][9]
-        self.regret = count / (len(self.myData) - 1)
-
+        """Calculate time spent in draw down, the underwater curve, the
+        drawdown episodes, max drawdown and Ulcer index. Peaks are
+        counted from the second bar on."""
+        def calculate():
+            equity = self.myData.equity[1:]
+            timeInDD = np.zeros(len(self.myData), dtype=np.int64)
+            timeInDD[1:] = drawdown.time_in_drawdown(equity)
+            underwater = np.zeros(len(self.myData))
+            underwater[1:] = drawdown.underwater(equity)
+            episodes = drawdown.episodes(equity)
+            for name in ('start', 'trough', 'recovery'):
+                episodes[name][episodes[name] >= 0] += 1
+            return {'timeInDD': timeInDD, 'underwater': underwater, 'episodes': episodes,
+                'regret': np.array(ratio(np.count_nonzero(timeInDD), max(len(self.myData) - 1, 0))),
+                'maxDrawdown': drawdown.max_drawdown(equity),
+                'ulcerIndex': drawdown.ulcer_index(equity)}
+        result = self.calcStage('timeInDD', [self.myData.equity], (), calculate, [drawdown])
+        self.myData.timeInDD[:] = result['timeInDD']
+        self.myData.underwater[:] = result['underwater']
+        self.episodes = result['episodes']
+        self.regret = result['regret'].item()
+        self.maxDrawdown = result['maxDrawdown'].item()
+        self.ulcerIndex = result['ulcerIndex'].item()
+
+    @instrument.timed
     def calcSummaryData(self):
-        """Calculate the summary statistics."""
-        self.winPct = len(self.wins) / len(self.trades)
-        avgWin = sum(self.wins) / len(self.wins)
-        avgLoss = abs(sum(self.losses) / len(self.losses))
-        self.prftFact = avgWin / avgLoss
+        """Calculate the summary statistics. Ratios that can't be taken,
+        such as the profit factor without any losers, are inf or NaN."""
+        self.winPct = ratio(len(self.wins), len(self.trades))
+        avgWin = ratio(sum(self.wins), len(self.wins))
+        avgLoss = abs(ratio(sum(self.losses), len(self.losses)))
+        self.prftFact = ratio(avgWin, avgLoss)
         self.expectancy = self.winPct * self.prftFact - (1-self.winPct)
 
+    @instrument.timed
     def calcReturns(self):
         """Calculate returns from trades."""
-        avgWin = sum(self.wins) / len(self.wins)
-        avgLoss = sum(self.losses) / len(self.losses)
+        avgWin = ratio(sum(self.wins), len(self.wins))
+        avgLoss = ratio(sum(self.losses), len(self.losses))
         self.averages.append([avgWin, avgLoss])
         gain = 1
         for i in xrange(0, len(self.trades)):
             gain = gain * (1 + self.trades[i][1])
         gain -= 1
-        annGain = (1 + gain)**(1/(relativedelta(self.myData[-1][0], self.myData[1][0]).years)) - 1
+        years = 0.0
+        if len(self.myData) > 1:
+            years = float(timeseries.years_between(self.myData.date[1], self.myData.date[-1]))
+        annGain = (1 + gain)**(1/years) - 1 if years > 0 else float('nan')
         self.gains.append([gain, annGain])
 
+    @instrument.timed
     def calcMAE(self, indLength):
         """Calculate Maximum Adverse Excursions.
-        Bollinger's implementation of John Sweeny idea."""
-        for i in xrange(indLength + 2, len(self.myData)):
-            if self.myData[i][8] == 1:
-                mae, maximum = 0, 0
-                for j in xrange(i, len(self.myData)):
-                    if self.myData[j][4] > maximum:
-                        maximum = self.myData[j][4]
-                    elif self.myData[j][4] / maximum - 1 < mae:
-                        mae = self.myData[j][4] / maximum - 1
-                    if self.myData[j][8] == -1: # exit
-                        self.mae.append([self.myData[i][0], mae])
-                        break
+        Bollinger's implementation of John Sweeny idea.
+        calcTrades already does this, kept for callers that want only MAE."""
+        stats = self.currentTradeStats(indLength)
+        self.mae = [list(x) for x in zip(self.myData.date[stats.entry].tolist(), stats.mae.tolist())]
 
+    @instrument.timed
     def calcEfficiency(self, indLength):
         """Calculate Efficiencies.
         Distance traveled versus gain/loss."""
         # TODO Should we calcualte ink instead of distance or both?
-        for i in xrange(indLength + 2, len(self.myData)):
-            if self.myData[i][8] == 1:
-                dist = 0
-                for j in xrange(i + 1, len(self.myData)):
-                    dist += abs(self.myData[j][4] - self.myData[j-1][4])
-                    if self.myData[j][8] == -1: # exit
-                        eff = dist / (j - i) / self.myData[i][4]
-                        self.efficiency.append([self.myData[i][0], eff])
-                        break
+        stats = self.currentTradeStats(indLength)
+        self.efficiency = [list(x) for x in zip(self.myData.date[stats.entry].tolist(), stats.efficiency.tolist())]
 
+    @instrument.timed
     def calcVolatility(self, indLength):
         """Calculate in-trade volatility using
          the absolute value of average single-period return."""
-        for i in xrange(indLength + 2, len(self.myData)):
-            if self.myData[i][8] == 1:
-                vol = 0
-                count = 0
-                for j in xrange(i + 1, len(self.myData)):
-                    vol += abs(self.myData[j][4] / self.myData[j-1][4] - 1)
-                    count += 1
-                    if self.myData[j][8] == -1: # exit
-                        self.inTradeVol.append([self.myData[i][0], vol / count])
-                        break
-
-    def displayPriceGraph(self):
-        """Display a graph of price."""
-        curve = [row[4] for row in self.myData] # extract data to be plotted
-        dates = [row[0] for row in self.myData]
+        stats = self.currentTradeStats(indLength)
+        self.inTradeVol = [list(x) for x in zip(self.myData.date[stats.entry].tolist(), stats.volatility.tolist())]
+
+    def tradeBars(self):
+        """Bar numbers of the entry and exit of each trade."""
+        date = self.myData.date
+        entry = np.searchsorted(date, np.array([row[0] for row in self.trades], dtype=date.dtype))
+        return entry, entry + np.array([row[2] for row in self.trades], dtype=np.intp)
+
+    @instrument.timed
+    def calcRollingTrades(self, window=50):
+        """Calculate the summary statistics of every window of trades and
+        of all trades up to each one, as of each trade's exit, in O(N),
+        see rolling.trade_table."""
+        date = self.myData.date
+        returns = [row[1] for row in self.trades]
+        entry, exit = self.tradeBars()
+        self.rollingTrades = rolling.trade_table(returns, date[entry], date[exit], window)
+        self.expandingTrades = rolling.trade_table(returns, date[entry], date[exit], None, date[1])
+
+    @instrument.timed
+    def calcRollingBars(self, window=252):
+        """Calculate the time in drawdown, max drawdown and Ulcer index of
+        every window of bars and of all bars up to each one, from the
+        second bar on as calcTimeInDrawdown counts them, see
+        rolling.bar_table."""
+        equity, date = self.myData.equity[1:], self.myData.date[1:]
+        self.rollingBars = rolling.bar_table(equity, date, window)
+        self.expandingBars = rolling.bar_table(equity, date)
+
+    @instrument.timed
+    def calcMonteCarlo(self, paths=10000, method='bootstrap', seed=None, chunkSize=None, processes=1):
+        """Resample the trades into many alternative histories and measure
+        each one, see montecarlo.simulate."""
+        returns = [row[1] for row in self.trades]
+        years = float(timeseries.years_between(self.myData.date[1], self.myData.date[-1]))
+        self.monteCarlo = montecarlo.simulate(returns, years, paths, method, seed, chunkSize, processes)
+
+    @instrument.timed
+    def displayPriceGraph(self, overlays=()):
+        """Display a graph of price.
+        overlays is a list of indicator columns to plot over price by name."""
+        curve = self.myData.close # data to be plotted
+        dates = self.myData.date
         fig, ax = plt.subplots()
         fig.suptitle("John Bollinger's Trade Visualization")
         ax.set_ylabel("price (log-scale)")
-        ax.semilogy(dates, curve)
+        ax.set_yscale('log')
+        decimate.plot(ax, dates, curve)
+        for name in overlays:
+            decimate.plot(ax, dates, self.myData.column(name), linewidth=0.8)
         # minor tick labels for log y-axis
-        ax.yaxis.set_major_formatter(FormatStrFormatter("%d "))
-        ax.yaxis.set_minor_formatter(FormatStrFormatter("%d "))
+        ax.yaxis.set_major_formatter(ticker.FormatStrFormatter("%d "))
+        ax.yaxis.set_minor_formatter(ticker.FormatStrFormatter("%d "))
         ax.set_ylim(top=np.max(curve))
         ax.set_ylim(bottom=np.min(curve))
         ax.grid(True)
-        ax.xaxis.set_major_locator(mdates.YearLocator(5)) # every 5 years
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
+        self.formatDateAxis(ax)
         fig.autofmt_xdate()
-        plt.show()
+        return self.showFigure(fig)
 
+    @instrument.timed
     def displayPriceTradesGraph(self, distance):
         """Display a graph of price."""
-        curve = [row[4] for row in self.myData] # extract data to be plotted
-        dates = [row[0] for row in self.myData] # extract dates to be plotted
-        trades = [row[8] for row in self.myData] # extract trades to be plotted
-        upper = [x * (1 + distance) for x in curve] # anchor for sell markers
-        lower = [x / (1 + distance) for x in curve] # anchor for buy markers
-        buys, sells = [], [] # lists of buys and sells
-        i = 0
-        for b in trades: # parse trades into indexed buys and sells
-            if b == 1:
-                buys.append(i)
-            elif b == -1:
-                sells.append(i)
-            i += 1
+        curve = self.myData.close # data to be plotted
+        dates = self.myData.date # dates to be plotted
+        trades = self.myData.signal # trades to be plotted
+        upper = curve * (1 + distance) # anchor for sell markers
+        lower = curve / (1 + distance) # anchor for buy markers
+        # parse trades into indexed buys and sells
+        buys = np.flatnonzero(trades == 1)
+        sells = np.flatnonzero(trades == -1)
         fig, ax = plt.subplots()
         fig.suptitle("John Bollinger's Trade Visualization")
         ax.set_ylabel("price with trade markers (log-scale)")
-        ax.semilogy(dates, curve)
-        ax.semilogy(dates, lower, 'g^', markevery=buys)
-        ax.semilogy(dates, upper, 'rv', markevery=sells)
+        ax.set_yscale('log')
+        # keep the bars with markers when decimating price
+        decimate.plot(ax, dates, curve, keep=np.flatnonzero(trades))
+        ax.semilogy(dates[buys], lower[buys], 'g^')
+        ax.semilogy(dates[sells], upper[sells], 'rv')
         # minor tick labels for log y-axis
-        ax.yaxis.set_major_formatter(FormatStrFormatter("%d "))
-        ax.yaxis.set_minor_formatter(FormatStrFormatter("%d "))
+        ax.yaxis.set_major_formatter(ticker.FormatStrFormatter("%d "))
+        ax.yaxis.set_minor_formatter(ticker.FormatStrFormatter("%d "))
         ax.set_ylim(top=np.max(curve) * (1 + distance))
         ax.set_ylim(bottom=np.min(curve) / (1 + distance))
         ax.grid(True)
-        ax.xaxis.set_major_locator(mdates.YearLocator(5)) # every 5 years
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
+        self.formatDateAxis(ax)
         fig.autofmt_xdate()
-        plt.show()
+        return self.showFigure(fig)
 
+    @instrument.timed
     def displayTradeGraph(self):
         """Display a graph of the trades."""
         y = [row[1] for row in self.trades] # extract data to be plotted
@@ -289,8 +545,9 @@ class View(object):
         ax.set_xlim([0, len(self.trades)]) # don't leave extra space
         ax.set_ylim(top=np.max(y) + 0.01) # use almost the whole plot space
         ax.set_ylim(bottom=np.min(y) - 0.01)
-        plt.show()
+        return self.showFigure(fig)
 
+    @instrument.timed
     def displayTradesVersusTime(self):
         """Display an x-y of returns versus time."""
         x = [row[2] for row in self.trades] # extract data to be plotted
@@ -305,43 +562,69 @@ class View(object):
         ax.set_xlim(right=np.max(x) + 2)
         ax.set_xlim(left=np.min(x) - 2)
         ax.grid(True)
-        plt.show()
+        return self.showFigure(fig)
 
+    @instrument.timed
     def displayEquityCurveLog(self):
         """Display the equity curve with semi-log scaling."""
-        curve = [row[9] for row in self.myData] # extract data to be plotted
-        dates = [row[0] for row in self.myData]
+        curve = self.myData.equity # data to be plotted
+        dates = self.myData.date
         fig, ax = plt.subplots()
         fig.suptitle("John Bollinger's Trade Visualization")
         ax.set_ylabel("equity curve (log)")
-        ax.semilogy(dates, curve)
+        ax.set_yscale('log')
+        decimate.plot(ax, dates, curve)
         # minor tick labels for log y-axis
-        ax.yaxis.set_major_formatter(FormatStrFormatter("%d "))
-        ax.yaxis.set_minor_formatter(FormatStrFormatter("%d "))
+        ax.yaxis.set_major_formatter(ticker.FormatStrFormatter("%d "))
+        ax.yaxis.set_minor_formatter(ticker.FormatStrFormatter("%d "))
         ax.set_ylim(top=np.max(curve))
         ax.set_ylim(bottom=np.min(curve))
         ax.grid(True)
-        ax.xaxis.set_major_locator(mdates.YearLocator(5)) # every 5 years
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
+        self.formatDateAxis(ax)
         fig.autofmt_xdate()
-        plt.show()
+        return self.showFigure(fig)
 
+    @instrument.timed
     def displayEquityCurve(self):
         """Display the equity curve."""
-        curve = [row[9] for row in self.myData] # extract data to be plotted
-        dates = [row[0] for row in self.myData]
+        curve = self.myData.equity # data to be plotted
+        dates = self.myData.date
         fig, ax = plt.subplots()
         fig.suptitle("John Bollinger's Trade Visualization")
         ax.set_ylabel("equity curve")
-        ax.plot(dates, curve)
+        decimate.plot(ax, dates, curve)
         ax.set_ylim(top=np.max(curve))
         ax.set_ylim(bottom=np.min(curve))
         ax.grid(True)
-        ax.xaxis.set_major_locator(mdates.YearLocator(5)) # every 5 years
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
+        self.formatDateAxis(ax)
         fig.autofmt_xdate()
-        plt.show()
+        return self.showFigure(fig)
+
+    @instrument.timed
+    def displayMonteCarlo(self, paths=1000, method='bootstrap', seed=None):
+        """Display percentile bands of resampled equity curves
+        against the historical sequence of trades."""
+        returns = [row[1] for row in self.trades] # extract data to be plotted
+        bands = montecarlo.equity_bands(returns, paths, (5, 25, 50, 75, 95), method, seed)
+        actual = np.cumprod([1.0] + [1 + r for r in returns])
+        x = np.arange(len(actual)) # values for x-axis
+        fig, ax = plt.subplots()
+        fig.suptitle("John Bollinger's Trade Visualization")
+        ax.set_xlabel("trades")
+        ax.set_ylabel("equity curve, Monte Carlo 5-95% bands (log)")
+        ax.set_yscale('log')
+        ax.fill_between(x, bands[0], bands[4], color='blue', alpha=0.15)
+        ax.fill_between(x, bands[1], bands[3], color='blue', alpha=0.3)
+        ax.plot(x, bands[2], color='blue')
+        ax.plot(x, actual, color='red')
+        # minor tick labels for log y-axis
+        ax.yaxis.set_major_formatter(ticker.FormatStrFormatter("%d "))
+        ax.yaxis.set_minor_formatter(ticker.FormatStrFormatter("%d "))
+        ax.set_xlim([0, len(returns)]) # don't leave extra space
+        ax.grid(True)
+        return self.showFigure(fig)
 
+    @instrument.timed
     def displayDistribution(self):
         """Display a graph of the distribution of returns."""
         y = [row[1] for row in self.trades] # extract data to be plotted
@@ -357,38 +640,46 @@ class View(object):
         neg = [n for n in y if n < 0.0]
         ax.hist(pos, bins = binspec, color = 'green')
         ax.hist(neg, bins = binspec, color = 'red')
-        plt.show()
+        return self.showFigure(fig)
 
+    @instrument.timed
     def displayTimeInDrawDown(self):
         """Display the time spent in drawdown."""
-        dd = [row[10] for row in self.myData] # extract data to be plotted
-        dates = [row[0] for row in self.myData]
+        dd = self.myData.timeInDD # data to be plotted
+        dates = self.myData.date
         fig, ax = plt.subplots()
         fig.suptitle("John Bollinger's Trade Visualization")
         ax.set_ylabel("time in drawdown")
-        ax.plot(dates, dd)
+        decimate.plot(ax, dates, dd)
         ax.grid(True)
         ax.set_ylim(top=np.max(dd) + 0.01)
-        ax.xaxis.set_major_locator(mdates.YearLocator(5)) # every 5 years
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
+        self.formatDateAxis(ax)
         fig.autofmt_xdate()
-        plt.show()
+        return self.showFigure(fig)
 
+    @instrument.timed
     def displayDrawdownGraph(self):
-        """Display a graph of the drawdowns."""
-        y = [row[1] for row in self.drawdowns] # extract data to be plotted
-        x = xrange(0, len(self.drawdowns), 1) # values for x-axis
+        """Display the underwater curve, the fall of equity from its peak,
+        with the bottom of the deepest drawdown marked."""
+        curve = self.myData.underwater # data to be plotted
+        dates = self.myData.date
+        troughs = self.episodes['trough']
         fig, ax = plt.subplots()
         fig.suptitle("John Bollinger's Trade Visualization")
-        ax.set_xlabel("trades")
         ax.set_ylabel("drawdowns")
-        ax.vlines(x, 0, y, color='blue')
+        # the troughs are kept so decimation never hides a bottom
+        decimate.plot(ax, dates, curve, keep=troughs, color='blue')
+        if len(troughs):
+            deepest = troughs[np.argmin(self.episodes['depth'])]
+            ax.plot(dates[deepest], curve[deepest], 'o', color='red')
         ax.grid(True)
-        ax.set_xlim([0, len(self.drawdowns)]) # don't leave extra space
         ax.set_ylim(top = 0)
-        ax.set_ylim(bottom=np.min(y) - 0.01)
-        plt.show()
+        ax.set_ylim(bottom=np.min(curve) - 0.01)
+        self.formatDateAxis(ax)
+        fig.autofmt_xdate()
+        return self.showFigure(fig)
 
+    @instrument.timed
     def displayMAE(self):
         """Display a graph of the Maximum Adverse Excursions."""
         y = [row[1] for row in self.mae] # extract data to be plotted
@@ -402,8 +693,9 @@ class View(object):
         ax.set_xlim([0, len(self.mae)]) # don't leave extra space
         ax.set_ylim(top = 0)
         ax.set_ylim(bottom=np.min(y) - 0.01)
-        plt.show()
+        return self.showFigure(fig)
 
+    @instrument.timed
     def displayEfficiency(self):
         """Display a graph of the trade efficiencies."""
         y = [row[1] for row in self.efficiency] # extract data to be plotted
@@ -417,8 +709,9 @@ class View(object):
         ax.set_xlim([0, len(self.mae)]) # don't leave extra space
         ax.set_ylim(top=np.max(y) + 0.01)
         ax.set_ylim(bottom = 0)
-        plt.show()
+        return self.showFigure(fig)
 
+    @instrument.timed
     def displayInTradeVol(self):
         """Display a graph of in-trade volatilities."""
         y = [row[1] for row in self.inTradeVol] # extract data to be plotted
@@ -432,125 +725,229 @@ class View(object):
         ax.set_xlim([0, len(self.inTradeVol)]) # don't leave extra space
         ax.set_ylim(top=np.max(y) + 0.01)
         ax.set_ylim(bottom = 0)
-        plt.show()
+        return self.showFigure(fig)
+
+    @instrument.timed
+    def displayRollingStats(self, window=50):
+        """Display win %, profit factor, expectancy and annual gain over
+        the last window trades in blue and over all trades so far in red,
+        to show a system decaying."""
+        self.calcRollingTrades(window)
+        fig, axes = plt.subplots(4, sharex=True)
+        fig.suptitle("John Bollinger's Trade Visualization")
+        for ax, name, label in zip(axes, ['winPct', 'prftFact', 'expectancy', 'annualGain'],
+                ["win %", "profit factor", "expectancy", "annual gain"]):
+            ax.plot(self.rollingTrades['date'], self.rollingTrades[name], color='blue')
+            ax.plot(self.expandingTrades['date'], self.expandingTrades[name], color='red')
+            ax.set_ylabel(label)
+            ax.grid(True)
+        self.formatDateAxis(axes[-1])
+        fig.autofmt_xdate()
+        return self.showFigure(fig)
+
+    @instrument.timed
+    def displayRollingDrawdown(self, window=252):
+        """Display time in drawdown, max drawdown and Ulcer index over the
+        last window bars in blue and over all bars so far in red."""
+        self.calcRollingBars(window)
+        fig, axes = plt.subplots(3, sharex=True)
+        fig.suptitle("John Bollinger's Trade Visualization")
+        for ax, name, label in zip(axes, ['regret', 'maxDrawdown', 'ulcerIndex'],
+                ["regret", "max drawdown", "ulcer index"]):
+            decimate.plot(ax, self.rollingBars['date'], self.rollingBars[name], color='blue')
+            decimate.plot(ax, self.expandingBars['date'], self.expandingBars[name], color='red')
+            ax.set_ylabel(label)
+            ax.grid(True)
+        self.formatDateAxis(axes[-1])
+        fig.autofmt_xdate()
+        return self.showFigure(fig)
+
+    @instrument.timed
+    def displayDashboard(self, panels, side=(), distance=0.2, overlays=(), rollingTrades=50,
+            rollingBars=252, monteCarloPaths=1000, monteCarloMethod='bootstrap', monteCarloSeed=None):
+        """Display the charts in panels on one date axis and those in side
+        beside them with the summary results, with linked zooming and a
+        clicked trade highlighted in each, see dashboard.py."""
+        self.dashboard = dashboard.Dashboard(self, panels, side, distance, overlays, rollingTrades,
+            rollingBars, monteCarloPaths, monteCarloMethod, monteCarloSeed)
+        return self.showFigure(self.dashboard.fig)
+
+    def formatDateAxis(self, ax):
+        """Date ticks spaced to suit the span shown, years to minutes."""
+        locator = mdates.AutoDateLocator()
+        ax.xaxis.set_major_locator(locator)
+        ax.xaxis.set_major_formatter(mdates.AutoDateFormatter(locator))
+
+    def showFigure(self, fig):
+        """Show a chart, unless showCharts is off. Returns the figure."""
+        if self.showCharts:
+            plt.show()
+        return fig
+
+    def summaryStats(self):
+        """The summary results as a dictionary."""
+        return {
+            'trades': len(self.trades),
+            'wins': len(self.wins),
+            'losses': len(self.losses),
+            'winPct': float(self.winPct),
+            'avgWin': float(self.averages[0][0]),
+            'avgLoss': float(self.averages[0][1]),
+            'prftFact': float(self.prftFact),
+            'expectancy': float(self.expectancy),
+            'totalGain': float(self.gains[0][0]),
+            'annualGain': float(self.gains[0][1]),
+            'regret': float(self.regret),
+            'maxDrawdown': float(self.maxDrawdown),
+            'ulcerIndex': float(self.ulcerIndex),
+        }
+
+    def resultsText(self):
+        """The lines of the table of summary results."""
+        return [
+            "There were {0} trades.".format(len(self.trades)),
+            "There were {0} winners.".format(len(self.wins)),
+            "There were {0} losers.".format(len(self.losses)),
+            "Winning % =      {0:.2f}%".format(self.winPct*100),
+            "Average win =    {0:.2f}%".format(self.averages[0][0]*100),
+            "Average loss =   {0:.2f}%".format(self.averages[0][1]*100),
+            "Profit factor =  {0:.2f}".format(self.prftFact),
+            "Expectancy =     {0:.2f}".format(self.expectancy),
+            "Total gain =     {0:.2f}%".format(self.gains[0][0]*100),
+            "Annual gain =    {0:.2f}%".format(self.gains[0][1]*100),
+            "Regret =         {0:.2f}%".format(self.regret*100),
+            "Max drawdown =   {0:.2f}%".format(self.maxDrawdown*100),
+            "Ulcer index =    {0:.2f}".format(self.ulcerIndex*100),
+        ]
 
     def printResults(self):
         """Print a table of summary results."""
         print
-        print("There were {0} trades.".format(len(self.trades)))
-        print("There were {0} winners.".format(len(self.wins)))
-        print("There were {0} losers.".format(len(self.losses)))
-        print("Winning % =      {0:.2f}%".format(self.winPct*100))
-        print("Average win =    {0:.2f}%".format(self.averages[0][0]*100))
-        print("Average loss =   {0:.2f}%".format(self.averages[0][1]*100))
-        print("Profit factor =  {0:.2f}".format(self.prftFact))
-        print("Expectancy =     {0:.2f}".format(self.expectancy))
-        print("Total gain =     {0:.2f}%".format(self.gains[0][0]*100))
-        print("Annual gain =    {0:.2f}%".format(self.gains[0][1]*100))
-        print("Regret =         {0:.2f}%".format(self.regret*100))
+        for line in self.resultsText():
+            print(line)
+        print
+
+    def printMonteCarlo(self):
+        """Print percentiles of the Monte Carlo statistics."""
+        q = (5, 25, 50, 75, 95)
+        table = montecarlo.percentiles(self.monteCarlo, q)
+        print
+        print("Monte Carlo, {0} paths".format(len(self.monteCarlo)))
+        print("Percentile      " + "".join("{0:>10d}".format(p) for p in q))
+        print("Total gain =    " + "".join("{0:9.2f}%".format(v*100) for v in table['totalGain']))
+        print("Annual gain =   " + "".join("{0:9.2f}%".format(v*100) for v in table['annualGain']))
+        print("Max drawdown =  " + "".join("{0:9.2f}%".format(v*100) for v in table['maxDrawdown']))
+        print("Regret =        " + "".join("{0:9.2f}%".format(v*100) for v in table['regret']))
         print
 
     def printResultsTk(self):
         """Print a table of summary results to a Tkinter window."""
         root = tk.Tk()
         root.title("SystemView")
-        TextBox = tk.Text(root, height = 13, width = 30)
+        TextBox = tk.Text(root, height = 15, width = 30)
         TextBox.pack()
         class writeTk(object):
             def write(self, s):
                 TextBox.insert(tk.END, s)
         backup = sys.stdout
         sys.stdout = writeTk()
-        print("First trade {0}, {1:.2f}%".format(a.trades[1][0].isoformat(), a.trades[1][1] * 100))
-        print("Last trade  {0}, {1:.2f}%".format(a.trades[-1][0].isoformat(), a.trades[-1][1] * 100))
-        print("There were {0} trades.".format(len(self.trades)))
-        print("There were {0} winners.".format(len(self.wins)))
-        print("There were {0} losers.".format(len(self.losses)))
-        print("Winning % =      {0:.2f}%".format(self.winPct*100))
-        print("Average win =    {0:.2f}%".format(self.averages[0][0]*100))
-        print("Average loss =   {0:.2f}%".format(self.averages[0][1]*100))
-        print("Profit factor =  {0:.2f}".format(self.prftFact))
-        print("Expectancy =     {0:.2f}".format(self.expectancy))
-        print("Total gain =     {0:.2f}%".format(self.gains[0][0]*100))
-        print("Annual gain =    {0:.2f}%".format(self.gains[0][1]*100))
-        print("Regret =         {0:.2f}%".format(self.regret*100))
+        print("First trade {0}, {1:.2f}%".format(self.trades[1][0].isoformat(), self.trades[1][1] * 100))
+        print("Last trade  {0}, {1:.2f}%".format(self.trades[-1][0].isoformat(), self.trades[-1][1] * 100))
+        for line in self.resultsText():
+            print(line)
         sys.stdout = backup
         TextBox.mainloop()
 
 if __name__ == '__main__':
     # create an instance of our class
     a = View()
-    # fetch data
+    # record the time and memory each stage takes
+    if param.profile:
+        a.profiler = instrument.Profiler(cprofile=bool(param.profileStats))
+    # fetch data between the start and end dates
     # expecting comma separated data
     # 2016-01-01, open, high, low, close, volume
-    a.getData(param.file1)
+    a.getData(param.file1, param.cacheData, param.start, param.endDate, param.barPeriod,
+        param.chunkRows, param.dataFormat, param.dataColumns, param.adjustedClose)
+    # reuse the results of calculation stages whose inputs haven't changed
+    if param.stageCacheDir:
+        a.cache = stagecache.StageCache(param.stageCacheDir, diskBytes=param.stageCacheBytes)
     # debug print first and last record
     if param.verbose:
-        print("First record {0}, {1:0.2f}".format(a.myData[1][0].isoformat(), a.myData[1][1]))
-        print("Last record  {0}, {1:0.2f}".format(a.myData[-1][0].isoformat(), a.myData[-1][1]))
-    # calculate indicator
-    a.calcIndicator(param.maLength)
-    # calculate signals
-    a.calcSignals(param.maLength)
-    # get a list of trades
-    a.calcTrades(param.maLength)
-    # calculate returns
-    a.calcReturns()
-    # calculate equity curve
-    a.calcEquityCurve()
-    # calculate time to recover peak asset value
-    a.calcTimeInDrawdown()
-    # calcuate Maximum Adverse Excursion
-    a.calcMAE(param.maLength)
-    # calculate efficiency
-    a.calcEfficiency(param.maLength)
-    # calculate in-trade volatility
-    a.calcVolatility(param.maLength)
-    # calculate summary data
-    a.calcSummaryData()
+        print("First record {0}, {1:0.2f}".format(a.myData.date[1].item().isoformat(), a.myData.open[1]))
+        print("Last record  {0}, {1:0.2f}".format(a.myData.date[-1].item().isoformat(), a.myData.open[-1]))
+    # calculate indicator, signals, trades, returns, equity curve,
+    # time in drawdown and summary data
+    a.calcAll(param.maLength, param.indicator, param.strategy, param.stopLoss, param.profitTarget,
+        param.allowShort, param.positionSize, param.commission, param.slippage)
     # print some summary data
-    if param.resultsTk:
+    if param.resultsTk and not param.dashboard:
         a.printResultsTk()
     # results to sommand line interface
     a.printResults()
+    # Monte Carlo confidence intervals
+    if param.monteCarloPaths:
+        a.calcMonteCarlo(param.monteCarloPaths, param.monteCarloMethod, param.monteCarloSeed)
+        a.printMonteCarlo()
     # debug print first and last trade
     if param.verbose:
         print("First trade {0}, {1:.2f}%".format(a.trades[1][0].isoformat(), a.trades[1][1] * 100))
         print("Last trade  {0}, {1:.2f}%".format(a.trades[-1][0].isoformat(), a.trades[-1][1] * 100))
-    # show a plot of price with trade markers
-    if param.displayPriceGraph:
-        a.displayPriceGraph()
-    if param.displayPriceTradesGraph:
-        a.displayPriceTradesGraph(param.distance)
-    # show a plot of all trades
-    if param.displayTradeGraph:
-        a.displayTradeGraph()
-    # show a plot of trades versus time
-    if param.displayTradesVersusTime:
-        a.displayTradesVersusTime()
-    # show a plot of the equity curve
-    if param.displayEquityCurve:
-        a.displayEquityCurve()
-    # show a log plot of the equity curve
-    if param.displayEquityCurveLog:
-        a.displayEquityCurveLog()
-    # show a graph of the distribution of returns
-    if param.displayDistribution:
-        a.displayDistribution()
-    # show a graph of drawdowns
-    if param.displayDrawdownGraph:
-        a.displayDrawdownGraph()
-    # show a graph of time in drawdown
-    if param.displayTimeInDrawDown:
-        a.displayTimeInDrawDown()
-    # show an MAE graph
-    if param.displayMAE:
-        a.displayMAE()
-    # show an Efficiency graph
-    if param.displayEfficiency:
-        a.displayEfficiency()
-    # show a graph of in-trade volatility
-    if param.displayInTradeVol:
-        a.displayInTradeVol()
+    # show every enabled chart in one window, or each in its own
+    if param.dashboard:
+        panels, side = dashboard.enabled_panels(param)
+        a.displayDashboard(panels, side, param.distance, param.priceIndicators, param.rollingTrades,
+            param.rollingBars, param.monteCarloBandPaths, param.monteCarloMethod, param.monteCarloSeed)
+    else:
+        # show a plot of price with trade markers
+        if param.displayPriceGraph:
+            a.displayPriceGraph(param.priceIndicators)
+        if param.displayPriceTradesGraph:
+            a.displayPriceTradesGraph(param.distance)
+        # show a plot of all trades
+        if param.displayTradeGraph:
+            a.displayTradeGraph()
+        # show a plot of trades versus time
+        if param.displayTradesVersusTime:
+            a.displayTradesVersusTime()
+        # show a plot of the equity curve
+        if param.displayEquityCurve:
+            a.displayEquityCurve()
+        # show Monte Carlo bands of the equity curve
+        if param.displayMonteCarlo:
+            a.displayMonteCarlo(param.monteCarloBandPaths, param.monteCarloMethod, param.monteCarloSeed)
+        # show a log plot of the equity curve
+        if param.displayEquityCurveLog:
+            a.displayEquityCurveLog()
+        # show a graph of the distribution of returns
+        if param.displayDistribution:
+            a.displayDistribution()
+        # show a graph of drawdowns
+        if param.displayDrawdownGraph:
+            a.displayDrawdownGraph()
+        # show a graph of time in drawdown
+        if param.displayTimeInDrawDown:
+            a.displayTimeInDrawDown()
+        # show an MAE graph
+        if param.displayMAE:
+            a.displayMAE()
+        # show an Efficiency graph
+        if param.displayEfficiency:
+            a.displayEfficiency()
+        # show a graph of in-trade volatility
+        if param.displayInTradeVol:
+            a.displayInTradeVol()
+        # show graphs of the statistics over time
+        if param.displayRollingStats:
+            a.displayRollingStats(param.rollingTrades)
+        if param.displayRollingDrawdown:
+            a.displayRollingDrawdown(param.rollingBars)
+    # time and memory taken by each stage
+    if param.profile:
+        a.profiler.printStats()
+        if param.profileJson:
+            a.profiler.writeJson(param.profileJson)
+        if param.profileStats:
+            a.profiler.writeStats(param.profileStats)
 
 # That's all folks!
\ No newline at end of file
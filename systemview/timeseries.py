@@ -0,0 +1,107 @@
+"""
+DESCRIPTION
+    Timestamps, resampling and chunked processing for SystemView
+
+    Bars may carry whole dates or full timestamps of any numpy unit.
+    Minute bars can be resampled to longer bars in one vectorized pass,
+    or a chunk at a time from memory-mapped columns so that a long
+    intraday history never has to fit in memory at once.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import re                                           # period strings
+import numpy as np                                  # numpy
+from bars import Bars, PRICE_FIELDS
+
+# the average Gregorian year
+YEAR = np.timedelta64(31556952, 's')
+
+# rows resampled at a time by resample_chunked
+CHUNK_ROWS = 1000000
+
+def years_between(start, end):
+    """Elapsed years from start to end, fractions included, so short
+    spans of intraday bars don't come out as zero years."""
+    start = np.asarray(start, dtype='datetime64[s]')
+    end = np.asarray(end, dtype='datetime64[s]')
+    return (end - start) / YEAR
+
+def to_dates(date):
+    """Timestamps that all fall at midnight as whole dates."""
+    date = np.asarray(date)
+    days = date.astype('datetime64[D]')
+    if date.dtype != days.dtype and np.array_equal(days, date):
+        return days
+    return date
+
+def parse_period(period):
+    """A bar length as numpy timedelta64 from a timedelta64 or a string
+    of a count and a numpy unit, e.g. "5m", "1h" or "1D"."""
+    if isinstance(period, np.timedelta64):
+        return period
+    match = re.match(r'^\s*(\d*)\s*(D|h|m|s|ms)\s*$', period)
+    if match is None:
+        raise ValueError("unknown bar length {0}".format(period))
+    return np.timedelta64(int(match.group(1) or 1), match.group(2))
+
+def bar_start(date, period):
+    """The start of the bar of length period that each time falls in."""
+    period = parse_period(period)
+    unit = np.datetime_data(period.dtype)[0]
+    ticks = np.asarray(date).astype('datetime64[{0}]'.format(unit)).astype(np.int64)
+    count = period.astype(np.int64)
+    return (ticks // count * count).astype('datetime64[{0}]'.format(unit))
+
+def resample(bars, period):
+    """Combine bars into bars of length period, e.g. minute bars into
+    five minute, hourly or daily bars: first open, highest high, lowest
+    low, last close and total volume. Each bar is dated at its start and
+    only periods that have bars get one. period is longer than the bars."""
+    if len(bars) == 0:
+        return Bars()
+    label = bar_start(bars.date, period)
+    starts = np.concatenate([[0], np.flatnonzero(label[1:] != label[:-1]) + 1])
+    ends = np.concatenate([starts[1:], [len(bars)]])
+    # in the units of the bars, whole days if every bar starts at midnight
+    date = to_dates(label[starts].astype(bars.date.dtype))
+    return Bars.fromColumns(date, bars.open[starts],
+        np.maximum.reduceat(bars.high, starts), np.minimum.reduceat(bars.low, starts),
+        bars.close[ends - 1], np.add.reduceat(bars.volume, starts))
+
+def chunks(length, chunkRows=CHUNK_ROWS):
+    """Slices covering 0 to length, chunkRows at a time."""
+    return [slice(start, min(start + chunkRows, length))
+        for start in range(0, length, chunkRows)]
+
+def _concatenate(parts):
+    """One Bars of the parts in order."""
+    return Bars.fromColumns(*[np.concatenate([getattr(part, name) for part in parts])
+        for name in PRICE_FIELDS])
+
+def resample_chunked(bars, period, chunkRows=CHUNK_ROWS):
+    """resample a chunk of bars at a time, for bars memory-mapped from the
+    loader cache that are too long to hold in memory. The last bar of
+    each chunk is held back, as the next chunk may continue it, and is
+    joined with the first bar of the next chunk when they share a start."""
+    parts = []
+    pending = None  # the last bar so far, one row
+    for part in chunks(len(bars), chunkRows):
+        result = resample(bars[part], period)
+        if pending is not None and pending.date[0] == result.date[0]:
+            joined = Bars.fromColumns(pending.date, pending.open,
+                np.maximum(pending.high, result.high[:1]), np.minimum(pending.low, result.low[:1]),
+                result.close[:1], pending.volume + result.volume[:1])
+            result = _concatenate([joined, result[1:]])
+        elif pending is not None:
+            parts.append(pending)
+        if len(result) > 1:
+            parts.append(result[:-1])
+        pending = result[-1:]
+    if pending is None:
+        return Bars()
+    return _concatenate(parts + [pending])
@@ -0,0 +1,152 @@
+"""
+DESCRIPTION
+    Single-pass trade lifecycle engine for SystemView
+
+    Buys are paired with the first following sell using an index of the
+    signal positions, then every per-trade statistic is computed with
+    segmented NumPy reductions over the bars each trade spans. Trades are
+    taken a batch at a time, so trades that overlap, each buy of a run of
+    buys paired with the same sell, don't lay out more than about
+    BLOCK_BARS bars at once.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+from collections import namedtuple                  # result record
+import numpy as np                                  # numpy
+
+# bars laid end to end by the segmented reductions at a time
+BLOCK_BARS = 2**20
+
+# per-trade arrays, all indexed by trade number
+# entry and exit are bar indices, length is the holding period in bars,
+# direction is 1 for long and -1 for short
+TradeStats = namedtuple('TradeStats', ['entry', 'exit', 'returns', 'length',
+    'drawdown', 'mae', 'efficiency', 'volatility', 'direction'])
+
+def pair_trades(signal, start=0):
+    """Pair each buy at or after start with the first sell after it.
+    Buys that are never sold are dropped. Returns (entries, exits)."""
+    entries = np.flatnonzero(signal[start:] == 1) + start
+    sells = np.flatnonzero(signal == -1)
+    following = np.searchsorted(sells, entries, side='right')
+    closed = following < len(sells)
+    return entries[closed], sells[following[closed]]
+
+def pair_long_short(signal, start=0):
+    """Pair buys with the next sell as long trades and, for selling short,
+    sells with the next buy as short trades. Returns (entries, exits,
+    direction) in entry order."""
+    longEntries, longExits = pair_trades(signal, start)
+    shortEntries, shortExits = pair_trades(-np.asarray(signal), start)
+    entries = np.concatenate([longEntries, shortEntries])
+    order = np.argsort(entries, kind='stable')
+    direction = np.concatenate([np.ones(len(longEntries), dtype=np.int8),
+        -np.ones(len(shortEntries), dtype=np.int8)])
+    return entries[order], np.concatenate([longExits, shortExits])[order], direction[order]
+
+def _segments(entries, exits):
+    """Index the bars of every trade, entry to exit inclusive, laid end to end.
+    Returns the bar indices, the trade number of each and each trade's offset."""
+    lengths = exits - entries + 1
+    offsets = np.cumsum(lengths) - lengths
+    tradeNo = np.repeat(np.arange(len(entries)), lengths)
+    index = np.arange(lengths.sum()) - offsets[tradeNo] + entries[tradeNo]
+    return index, tradeNo, offsets
+
+def _batches(entries, exits, size=None):
+    """Slices of the trades whose bars, laid end to end, start within
+    the same size bars, BLOCK_BARS by default, so no batch spans much
+    more than size bars beyond its longest trade."""
+    size = size or BLOCK_BARS
+    lengths = exits - entries + 1
+    block = (np.cumsum(lengths) - lengths) // size
+    cuts = np.flatnonzero(np.diff(block)) + 1
+    return [slice(begin, end) for begin, end in
+        zip(np.append(0, cuts).tolist(), np.append(cuts, len(entries)).tolist())]
+
+def trade_stats(close, entries, exits, direction=1):
+    """Calculate the statistics of every trade in one pass over its bars.
+    drawdown is the worst close against the entry, mae the worst close
+    against the best close so far (after John Sweeny), efficiency the
+    distance traveled per bar relative to the entry and volatility the
+    average absolute single-period return. direction is 1 for long
+    trades, -1 for short ones, or an array with one for each trade."""
+    close = np.asarray(close, dtype=np.float64)
+    entries = np.asarray(entries, dtype=np.intp)
+    exits = np.asarray(exits, dtype=np.intp)
+    direction = np.broadcast_to(np.asarray(direction, dtype=np.int8), entries.shape)
+    length = exits - entries
+    if len(entries) == 0:
+        empty = np.zeros(0)
+        return TradeStats(entries, exits, empty, length, empty, empty, empty, empty, direction)
+    short = direction < 0
+    entryPrice = close[entries]
+    returns = close[exits] / entryPrice - 1
+    returns[short] = -returns[short]
+    # the closes ranked, to find the best close so far with an accumulate,
+    # and the per-bar moves in price and in percent
+    ranks = np.unique(close, return_inverse=True)[1].reshape(-1)
+    steps = np.zeros((2, len(close)))
+    steps[0, 1:] = np.abs(np.diff(close))
+    steps[1, 1:] = np.abs(close[1:] / close[:-1] - 1)
+    drawdown, mae, efficiency, volatility = np.zeros((4, len(entries)))
+    for batch in _batches(entries, exits):
+        drawdown[batch], mae[batch], efficiency[batch], volatility[batch] = _batch_stats(
+            close, ranks, steps, entries[batch], exits[batch], short[batch])
+    return TradeStats(entries, exits, returns, length, drawdown, mae, efficiency, volatility,
+        direction)
+
+def _batch_stats(close, ranks, steps, entries, exits, short):
+    """drawdown, mae, efficiency and volatility of a batch of trades, see
+    trade_stats."""
+    entryPrice = close[entries]
+    length = exits - entries
+    index, tradeNo, offsets = _segments(entries, exits)
+    prices = close[index]
+    # drawdown below the entry price, above it for shorts
+    low = np.minimum.reduceat(prices, offsets)
+    drawdown = np.where(low < entryPrice, low / entryPrice - 1, 0.0)
+    if short.any():
+        high = np.maximum.reduceat(prices, offsets)
+        drawdown[short] = np.where(high > entryPrice, 1 - high / entryPrice, 0.0)[short]
+    # running best close restarted for each trade: ranking the closes and
+    # lifting each trade above the one before lets a single accumulate
+    # work, shorts rank the closes the other way round
+    ranked = ranks[index]
+    shortBars = short[tradeNo]
+    ranked[shortBars] = ranks.max() - ranked[shortBars]
+    key = ranked + tradeNo * (ranks.max() + 1)
+    newHigh = key == np.maximum.accumulate(key)
+    peak = prices[np.maximum.accumulate(np.where(newHigh, np.arange(len(key)), 0))]
+    adverse = prices / peak - 1
+    adverse[shortBars] = 1 - prices[shortBars] / peak[shortBars]
+    mae = np.minimum(np.minimum.reduceat(adverse, offsets), 0.0)
+    # per-bar moves, the entry bar itself does not count
+    moved = steps[:, index]
+    moved[:, offsets] = 0.0
+    efficiency = np.add.reduceat(moved[0], offsets) / length / entryPrice
+    volatility = np.add.reduceat(moved[1], offsets) / length
+    return drawdown, mae, efficiency, volatility
+
+def trade_summary(returns, group, groups):
+    """Win/loss statistics of the trade returns in each group, as
+    calcSummaryData and calcReturns do for one symbol. Returns trades,
+    wins, losses, winPct, avgWin, avgLoss, prftFact, expectancy and
+    totalGain arrays, NaN where there are no trades to measure."""
+    won = returns > 0.0
+    count = np.bincount(group, minlength=groups)
+    wins = np.bincount(group, weights=won, minlength=groups).astype(np.int64)
+    losses = count - wins
+    with np.errstate(divide='ignore', invalid='ignore'):
+        winPct = wins / count
+        avgWin = np.bincount(group, weights=np.where(won, returns, 0.0), minlength=groups) / wins
+        avgLoss = np.bincount(group, weights=np.where(won, 0.0, returns), minlength=groups) / losses
+        prftFact = avgWin / np.abs(avgLoss)
+    expectancy = winPct * prftFact - (1 - winPct)
+    totalGain = np.expm1(np.bincount(group, weights=np.log1p(returns), minlength=groups))
+    return count, wins, losses, winPct, avgWin, avgLoss, prftFact, expectancy, totalGain
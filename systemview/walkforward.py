@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+"""
+DESCRIPTION
+    SystemView walk-forward analysis
+
+    Rolls an in-sample window followed by an out-of-sample window across
+    the history. The indicator length that does best in each in-sample
+    window is traded in the out-of-sample window after it and the
+    out-of-sample equity curves are stitched into one. The signals and
+    bar-to-bar equity growth of every length are calculated once over the
+    whole history and shared read-only with the workers, which score the
+    windows in parallel.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import multiprocessing                              # process pool
+import numpy as np                                  # numpy
+# import our system variables from parameters.py
+import parameters as param
+import equity
+import indicators
+import signals
+import trades
+from systemview import View
+
+# one row per walk-forward window
+WINDOW_DTYPE = [
+    ('inStart', 'datetime64[D]'),   # first in-sample bar
+    ('inEnd', 'datetime64[D]'),     # last in-sample bar
+    ('outStart', 'datetime64[D]'),  # first out-of-sample bar
+    ('outEnd', 'datetime64[D]'),    # last out-of-sample bar
+    ('maLength', np.int64),         # length chosen in-sample
+    ('inScore', np.float64),        # in-sample score of that length
+    ('outGain', np.float64),        # out-of-sample gain of that length
+]
+
+# what trades.trade_summary returns
+SUMMARY = ('trades', 'wins', 'losses', 'winPct', 'avgWin', 'avgLoss', 'prftFact',
+    'expectancy', 'totalGain')
+
+# in-sample scores, 'equity' for the gain of the equity curve or one of
+# the trade statistics
+METRICS = ('equity', 'winPct', 'avgWin', 'avgLoss', 'prftFact', 'expectancy', 'totalGain')
+
+def length_arrays(close, lengths, kind='sma'):
+    """Signals and bar-to-bar equity growth of every length over the whole
+    history, one row per length. Growth is the close to close change while
+    long from a buy until the next sell, 1 otherwise."""
+    signal = np.zeros((len(lengths), len(close)), dtype=np.int8)
+    growth = np.ones((len(lengths), len(close)))
+    for row, indLength in enumerate(lengths):
+        result = indicators.INDICATORS[kind](close, indLength)
+        indicator = result[0] if isinstance(result, tuple) else result
+        signal[row] = signals.ma_turn(indicator, indLength + 2)
+        growth[row] = equity.growth(close, equity.positions(signal[row]))
+    return signal, growth
+
+def windows(length, inSample, outSample):
+    """(first, split, last) bar indices of each window: in-sample from first
+    up to split, out-of-sample from split up to last. Windows step forward
+    by outSample bars, the last one may be short."""
+    splits = np.arange(inSample, length, outSample)
+    return [(split - inSample, split, min(split + outSample, length)) for split in splits]
+
+def score(close, signal, growth, first, last, metric='equity'):
+    """In-sample score of every length from first up to last. NaN where
+    the statistic can't be calculated, such as a profit factor without
+    any losers."""
+    if metric == 'equity':
+        return np.prod(growth[:, first + 1:last], axis=1) - 1
+    column = SUMMARY.index(metric)
+    returns = []
+    group = []
+    for row in range(len(signal)):
+        entries, exits = trades.pair_trades(signal[row, first:last])
+        returns.append(close[first + exits] / close[first + entries] - 1)
+        group.append(np.full(len(entries), row, dtype=np.intp))
+    return trades.trade_summary(np.concatenate(returns), np.concatenate(group), len(signal))[column]
+
+def run_window(close, signal, growth, window, metric='equity'):
+    """Choose the best length in-sample and measure it out-of-sample.
+    Ties go to the shorter length. Returns (row, inScore, outGain)."""
+    first, split, last = window
+    scores = score(close, signal, growth, first, split, metric)
+    row = int(np.argmax(np.where(np.isnan(scores), -np.inf, scores)))
+    outGain = np.prod(growth[row, split + 1:last + 1]) - 1
+    return row, scores[row], outGain
+
+# shared with each worker process
+_close = None
+_signal = None
+_growth = None
+
+def _init_worker(close, signal, growth):
+    """Keep the shared arrays in the worker, read-only."""
+    global _close, _signal, _growth
+    for values in (close, signal, growth):
+        values.setflags(write=False)
+    _close, _signal, _growth = close, signal, growth
+
+def _run_task(task):
+    """Score one window against the shared arrays."""
+    return run_window(_close, _signal, _growth, *task)
+
+def walk_forward(bars, lengths, inSample, outSample, kind='sma', metric='equity',
+        processes=None):
+    """Walk forward over bars, choosing among lengths in every window of
+    inSample bars and trading the choice for the next outSample bars.
+    processes is the pool size, None for every core, 1 to run in this
+    process. Returns the windows table and a View of the stitched
+    out-of-sample system, see stitched_view."""
+    if metric not in METRICS:
+        raise ValueError("unknown walk-forward metric {0}".format(metric))
+    close = np.array(bars.close, dtype=np.float64)
+    signal, growth = length_arrays(close, lengths, kind)
+    spans = windows(len(close), inSample, outSample)
+    tasks = [(span, metric) for span in spans]
+    if processes == 1:
+        rows = [run_window(close, signal, growth, *task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(processes, _init_worker, (close, signal, growth))
+        try:
+            rows = pool.map(_run_task, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    table = np.zeros(len(spans), dtype=WINDOW_DTYPE)
+    date = bars.date
+    for result, (first, split, last), (row, inScore, outGain) in zip(table, spans, rows):
+        result['inStart'], result['inEnd'] = date[first], date[split - 1]
+        result['outStart'], result['outEnd'] = date[split], date[last - 1]
+        result['maLength'] = lengths[row]
+        result['inScore'] = inScore
+        result['outGain'] = outGain
+    chosen = [row for row, inScore, outGain in rows]
+    return table, stitched_view(bars, spans, chosen, signal, growth)
+
+def stitched_view(bars, spans, chosen, signal, growth):
+    """A View of the out-of-sample windows joined end to end, each with the
+    signals of its chosen length and the equity carried over from the
+    window before. Trades, drawdowns and time in drawdown are calculated,
+    so the equity and drawdown charts can be shown."""
+    view = View()
+    if not spans:
+        view.setData(bars[0:0])
+        return view
+    start = spans[0][1]
+    view.setData(bars[start:])
+    moves = [np.ones(1)]
+    for (first, split, last), row in zip(spans, chosen):
+        view.myData.signal[split - start:last - start] = signal[row, split:last]
+        moves.append(growth[row, split + 1:last + 1])
+    view.myData.equity[:] = np.cumprod(np.concatenate(moves))
+    # the signals already start past the indicator warmup
+    view.calcTrades(0)
+    view.calcTimeInDrawdown()
+    return view
+
+def print_table(table):
+    """Print the windows table."""
+    print("In start   In end     Out start  Out end    Length  In score  Out gain")
+    for row in table:
+        print("{0} {1} {2} {3} {4:6d} {5:9.2f} {6:8.2f}%".format(
+            row['inStart'], row['inEnd'], row['outStart'], row['outEnd'],
+            row['maLength'], row['inScore'], row['outGain'] * 100))
+
+if __name__ == '__main__':
+    a = View()
+    a.getData(param.file1, param.cacheData, period=param.barPeriod, chunkRows=param.chunkRows,
+        format=param.dataFormat, columns=param.dataColumns, adjusted=param.adjustedClose)
+    table, b = walk_forward(a.myData, param.sweepLengths, param.walkInSample,
+        param.walkOutSample, param.indicator, param.walkMetric)
+    print_table(table)
+    b.calcReturns()
+    b.calcSummaryData()
+    b.printResults()
+    if param.displayEquityCurve:
+        b.displayEquityCurve()
+    if param.displayEquityCurveLog:
+        b.displayEquityCurveLog()
+    if param.displayDrawdownGraph:
+        b.displayDrawdownGraph()
+    if param.displayTimeInDrawDown:
+        b.displayTimeInDrawDown()
+
+# That's all folks!
@@ -0,0 +1,48 @@
+"""
+DESCRIPTION
+    The trade returns of a sized system must compound to the gain of its
+    equity curve.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import os
+import sys
+import unittest
+import numpy as np
+# the modules import each other by name, as when run from systemview/
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'systemview')
+sys.path.insert(0, SOURCE)
+import benchmark
+from systemview import View
+
+class SizedReturnsTest(unittest.TestCase):
+    def sized(self, size, short=False, commission=0.0):
+        """A View of external signals, held at size."""
+        view = View()
+        view.setData(benchmark.random_walk(2000, seed=1))
+        view.myData.setColumn('external', benchmark.signal_column(2000, 0.05, seed=2))
+        view.calcAll(5, strategy='column', short=short, size=size, commission=commission)
+        return view
+
+    def test_gains_match_equity(self):
+        for size in (1.0, 0.5, 2.0, np.linspace(0.2, 1.0, 2000)):
+            for short, commission in ((False, 0.0), (False, 0.001), (True, 0.0)):
+                view = self.sized(size, short, commission)
+                last = view.tradeStats.exit[-1]
+                self.assertAlmostEqual(view.gains[0][0], view.myData.equity[last] - 1, places=9,
+                    msg=(size, short, commission))
+
+    def test_whole_positions(self):
+        view = self.sized(1.0, commission=0.001)
+        stats = view.tradeStats
+        close = view.myData.close
+        np.testing.assert_array_equal(stats.returns,
+            close[stats.exit] / close[stats.entry] * 0.999**2 - 1)
+
+if __name__ == '__main__':
+    unittest.main()
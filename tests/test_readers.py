@@ -0,0 +1,114 @@
+"""
+DESCRIPTION
+    Every reader must give the price columns the csv loader gives for the
+    same bars, whatever the file's date style, layout or header names.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import numpy as np
+# the modules import each other by name, as when run from systemview/
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'systemview')
+sys.path.insert(0, SOURCE)
+import readers
+
+class Column(object):
+    """The part of a pyarrow column _read_table uses."""
+    def __init__(self, values):
+        self.values = values
+
+    def to_numpy(self):
+        return np.asarray(self.values)
+
+class Table(object):
+    """The part of a pyarrow table _read_table uses, pyarrow itself is
+    optional."""
+    def __init__(self, columns):
+        self.column_names = [name for name, values in columns]
+        self.columns = dict((name, Column(values)) for name, values in columns)
+
+    def column(self, name):
+        return self.columns[name]
+
+class ReadersTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, text):
+        fileName = os.path.join(self.directory, 'bars.csv')
+        with open(fileName, 'w') as target:
+            target.write(text)
+        return fileName
+
+    def assertColumns(self, columns, date, open, high, low, close, volume):
+        np.testing.assert_array_equal(columns[0], np.array(date, dtype=columns[0].dtype))
+        self.assertEqual(columns[0].dtype, np.array(date).dtype)
+        for values, expected in zip(columns[1:], (open, high, low, close, volume)):
+            np.testing.assert_allclose(values, expected)
+        self.assertEqual(columns[5].dtype, np.int64)
+
+    def test_yahoo(self):
+        fileName = self.write("Date,Open,High,Low,Close,Volume,Adj Close\n"
+            "31-May-16,10,11,9,10.5,1000,5.25\n"
+            "1-Jun-99,10.5,12,10,11,2000,5.5\n")
+        self.assertEqual(readers.detect_format(fileName), 'yahoo')
+        self.assertColumns(readers.read(fileName),
+            np.array(['2016-05-31', '1999-06-01'], dtype='datetime64[D]'),
+            [10, 10.5], [11, 12], [9, 10], [10.5, 11], [1000, 2000])
+
+    def test_adjusted(self):
+        fileName = self.write("Date,Open,High,Low,Close,Volume,Adj Close\n"
+            "2016-05-31,10,11,9,10,1000,5\n")
+        self.assertColumns(readers.read(fileName, adjusted=True),
+            np.array(['2016-05-31'], dtype='datetime64[D]'), [5], [5.5], [4.5], [5], [1000])
+
+    def test_columns(self):
+        fileName = self.write("Day,First,Top,Bottom,Last,Shares\n"
+            "20160531,10,11,9,10.5,1000\n")
+        columns = {'date': 'Day', 'open': 1, 'high': 'top', 'low': 'BOTTOM', 'volume': 5}
+        self.assertColumns(readers.read(fileName, 'csv', columns),
+            np.array(['2016-05-31'], dtype='datetime64[D]'), [10], [11], [9], [10.5], [1000])
+        self.assertRaises(ValueError, readers.read, fileName, 'csv', {'volume': 6})
+        self.assertRaises(ValueError, readers.read, fileName, 'csv', {'volume': 'Turnover'})
+
+    def test_amibroker_intraday(self):
+        fileName = self.write("SPY,2016-05-31,09:30,210,211,209,210.5,1000\n"
+            "SPY,2016-05-31,09:35,210.5,212,210,211,2000\n")
+        self.assertEqual(readers.detect_format(fileName), 'amibroker')
+        self.assertColumns(readers.read(fileName),
+            np.array(['2016-05-31T09:30', '2016-05-31T09:35'], dtype='datetime64[s]'),
+            [210, 210.5], [211, 212], [209, 210], [210.5, 211], [1000, 2000])
+
+    def test_amibroker_daily(self):
+        fileName = self.write("SPY,20160531,210,211,209,210.5,1000,7\n")
+        self.assertColumns(readers.read(fileName),
+            np.array(['2016-05-31'], dtype='datetime64[D]'), [210], [211], [209], [210.5], [1000])
+
+    def test_table_nanoseconds(self):
+        # as pandas writes timestamps to Parquet and Feather
+        date = np.array(['2016-05-31', '2016-06-01'], dtype='datetime64[ns]')
+        table = Table([('date', date), ('open', [10.0, 11.0]), ('high', [11.0, 12.0]),
+            ('low', [9.0, 10.0]), ('close', [10.5, 11.5]), ('volume', [1000.0, 2000.0])])
+        columns = readers._read_table(table, 'bars.parquet')
+        self.assertColumns(columns, date.astype('datetime64[D]'), [10, 11], [11, 12], [9, 10],
+            [10.5, 11.5], [1000, 2000])
+        self.assertEqual(columns[0].tolist()[0].isoformat(), '2016-05-31')
+        intraday = Table([('timestamp', date + np.timedelta64(34200, 's'))] + [(name, [1.0, 1.0])
+            for name in ('open', 'high', 'low', 'close')])
+        self.assertEqual(readers._read_table(intraday, 'bars.feather')[0].dtype,
+            np.dtype('datetime64[s]'))
+
+if __name__ == '__main__':
+    unittest.main()
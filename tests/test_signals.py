@@ -0,0 +1,73 @@
+"""
+DESCRIPTION
+    Stops and profit targets must exit every trade that reaches them,
+    long or short, open or closed.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import os
+import sys
+import unittest
+import numpy as np
+# the modules import each other by name, as when run from systemview/
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'systemview')
+sys.path.insert(0, SOURCE)
+import signals
+from bars import Bars
+
+def stop_and_reverse(close, signal, stop, target):
+    """stop_target with short, a bar at a time."""
+    result = np.zeros(len(signal), dtype=np.int8)
+    position, price = 0, None
+    for i, move in enumerate(signal):
+        if position:
+            gain = position * (close[i] / price - 1)
+            if (stop and gain <= -stop) or (target and gain >= target):
+                result[i] = -position
+                position, price = -position, close[i]
+                continue
+        if move and move != position:
+            result[i] = move
+            position, price = move, close[i]
+    return result
+
+class StopTargetTest(unittest.TestCase):
+    def test_open_trade_is_stopped(self):
+        close = [10, 10, 10, 9, 8, 7, 6, 5]
+        signal = [0, 1, 0, 0, 0, 0, 0, 0]
+        for short in (False, True):
+            np.testing.assert_array_equal(signals.stop_target(close, signal, stop=0.05, short=short),
+                [0, 1, 0, -1, 0, 0, 0, 0])
+
+    def test_open_trade_reaches_target(self):
+        close = [10, 10, 11, 12, 13]
+        np.testing.assert_array_equal(signals.stop_target(close, [1, 0, 0, 0, 0], target=0.15),
+            [1, 0, 0, -1, 0])
+
+    def test_stop_and_reverse(self):
+        rng = np.random.default_rng(1)
+        for test in range(200):
+            rows = rng.integers(2, 300)
+            close = 100 * np.exp(np.cumsum(rng.normal(0.0, 0.01, rows)))
+            signal = rng.choice([-1, 0, 0, 0, 0, 0, 1], rows)
+            stop, target = rng.choice([0, 0.01, 0.03]), rng.choice([0, 0.02, 0.05])
+            if stop or target:
+                np.testing.assert_array_equal(signals.stop_target(close, signal, stop, target,
+                    short=True), stop_and_reverse(close, signal, stop, target))
+
+class ColumnStrategyTest(unittest.TestCase):
+    def test_positions(self):
+        ones = np.ones(8)
+        bars = Bars.fromColumns(np.arange('2000-01-01', '2000-01-09', dtype='datetime64[D]'),
+            ones, ones, ones, ones, ones)
+        bars.setColumn('external', [1, np.nan, 1, 1, 0, -1, -1, 1])
+        np.testing.assert_array_equal(signals.column_strategy(bars, 0),
+            [0, 0, 1, 0, 0, -1, 0, 1])
+
+if __name__ == '__main__':
+    unittest.main()
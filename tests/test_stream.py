@@ -0,0 +1,75 @@
+"""
+DESCRIPTION
+    Bars added one at a time with View.appendBar must leave the View as
+    a full recompute over all the bars does.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import os
+import sys
+import unittest
+import numpy as np
+# the modules import each other by name, as when run from systemview/
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'systemview')
+sys.path.insert(0, SOURCE)
+import loader
+from systemview import View
+
+DATA = os.path.join(SOURCE, 'spx.csv')
+
+class StreamTest(unittest.TestCase):
+    def setUp(self):
+        self.bars = loader.load_csv(DATA, cache=False)
+
+    def streamed(self, indLength, cut):
+        """A View of the first cut bars with the rest appended."""
+        bars = self.bars
+        view = View()
+        view.setData(bars[:cut])
+        view.calcIndicator(indLength)
+        view.calcSignals(indLength)
+        view.calcTrades(indLength)
+        view.calcEquityCurve()
+        view.calcTimeInDrawdown()
+        view.startStream(indLength)
+        for i in range(cut, len(bars)):
+            view.appendBar(bars.date[i], bars.open[i], bars.high[i], bars.low[i],
+                bars.close[i], bars.volume[i])
+        return view
+
+    def assertRowsClose(self, rows, expected):
+        self.assertEqual([row[0] for row in rows], [row[0] for row in expected])
+        np.testing.assert_allclose([row[1] for row in rows], [row[1] for row in expected],
+            rtol=1e-12, atol=1e-15)
+
+    def test_stream_matches_batch(self):
+        for indLength, cut in [(21, 10000), (5, 16000), (50, 30)]:
+            view = self.streamed(indLength, cut)
+            batch = View()
+            batch.setData(self.bars)
+            batch.calcAll(indLength)
+            for name in batch.myData.names:
+                if name == 'date':
+                    np.testing.assert_array_equal(view.myData.date, batch.myData.date)
+                else:
+                    np.testing.assert_allclose(view.myData.column(name), batch.myData.column(name),
+                        rtol=1e-12, atol=1e-15, err_msg=name)
+            # the same trades, entered on the same bars and held as long
+            self.assertEqual([(row[0], row[2]) for row in view.trades],
+                [(row[0], row[2]) for row in batch.trades])
+            self.assertRowsClose(view.trades, batch.trades)
+            for name in ('drawdowns', 'mae', 'efficiency', 'inTradeVol'):
+                self.assertRowsClose(getattr(view, name), getattr(batch, name))
+            self.assertEqual(len(view.wins), len(batch.wins))
+            for name in ('winPct', 'prftFact', 'expectancy', 'regret', 'maxDrawdown', 'ulcerIndex'):
+                self.assertAlmostEqual(getattr(view, name), getattr(batch, name), places=12, msg=name)
+            np.testing.assert_allclose(view.gains, batch.gains, rtol=1e-12)
+            np.testing.assert_array_equal(view.episodes, batch.episodes)
+
+if __name__ == '__main__':
+    unittest.main()
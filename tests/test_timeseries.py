@@ -0,0 +1,65 @@
+"""
+DESCRIPTION
+    Resampling a chunk at a time must give the bars resampling all at
+    once does, whatever the chunk size.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import numpy as np
+# the modules import each other by name, as when run from systemview/
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'systemview')
+sys.path.insert(0, SOURCE)
+import timeseries
+from bars import Bars, PRICE_FIELDS
+from systemview import View
+
+def minute_bars(rows, seed=1, gap=60):
+    """Minute bars of a random walk with gaps of up to gap minutes."""
+    rng = np.random.default_rng(seed)
+    date = np.datetime64('2016-01-04T09:30', 'm') + np.cumsum(rng.integers(1, gap, rows))
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0, 0.001, rows)))
+    open = np.concatenate([[100.0], close[:-1]])
+    high = np.maximum(open, close) * 1.001
+    low = np.minimum(open, close) * 0.999
+    return Bars.fromColumns(date, open, high, low, close, rng.integers(1, 1000, rows))
+
+class ResampleTest(unittest.TestCase):
+    def assertBarsEqual(self, bars, expected):
+        for name in PRICE_FIELDS:
+            np.testing.assert_array_equal(getattr(bars, name), getattr(expected, name), err_msg=name)
+
+    def test_chunked_matches_resample(self):
+        bars = minute_bars(500)
+        for period in ('5m', '1h', '1D'):
+            expected = timeseries.resample(bars, period)
+            for chunkRows in list(range(1, 40)) + [499, 500, 1000]:
+                self.assertBarsEqual(timeseries.resample_chunked(bars, period, chunkRows), expected)
+
+    def test_chunked_load(self):
+        # most chunks of 30 bars fall inside one hour
+        bars = minute_bars(300, gap=2)
+        directory = tempfile.mkdtemp()
+        try:
+            fileName = os.path.join(directory, 'minutes.csv')
+            with open(fileName, 'w') as target:
+                target.write("Date,Open,High,Low,Close,Volume\n")
+                for row in zip(*[getattr(bars, name).tolist() for name in PRICE_FIELDS]):
+                    target.write("{0:%Y-%m-%d %H:%M},{1!r},{2!r},{3!r},{4!r},{5}\n".format(*row))
+            view = View()
+            view.getData(fileName, period='1h', chunkRows=30)
+            self.assertBarsEqual(view.myData, timeseries.resample(bars, '1h'))
+        finally:
+            shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    unittest.main()
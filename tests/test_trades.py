@@ -0,0 +1,78 @@
+"""
+DESCRIPTION
+    The segmented trade statistics must match a plain scan over the bars
+    of each trade, long and short.
+
+AUTHOR
+    SystemView: John Bollinger <BBands@BollingerBands.com>
+"""
+
+# do division as expected and use 3.n print formatting
+from __future__ import (division, print_function)
+
+import os
+import sys
+import unittest
+import numpy as np
+# the modules import each other by name, as when run from systemview/
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'systemview')
+sys.path.insert(0, SOURCE)
+import trades
+
+def scan(close, entry, exit, direction):
+    """The statistics of one trade, a bar at a time."""
+    price = close[entry]
+    drawdown = mae = distance = volatility = 0.0
+    best = price
+    for i in range(entry, exit + 1):
+        if direction > 0:
+            drawdown = min(drawdown, close[i] / price - 1)
+            best = max(best, close[i])
+            mae = min(mae, close[i] / best - 1)
+        else:
+            drawdown = min(drawdown, 1 - close[i] / price)
+            best = min(best, close[i])
+            mae = min(mae, 1 - close[i] / best)
+        if i > entry:
+            distance += abs(close[i] - close[i - 1])
+            volatility += abs(close[i] / close[i - 1] - 1)
+    length = exit - entry
+    returns = direction * (close[exit] / price - 1)
+    return returns, length, drawdown, mae, distance / length / price, volatility / length
+
+class TradeStatsTest(unittest.TestCase):
+    def assertScanned(self, close, entries, exits, direction):
+        stats = trades.trade_stats(close, entries, exits, direction)
+        direction = np.broadcast_to(direction, np.shape(entries))
+        expected = [scan(close, entry, exit, side)
+            for entry, exit, side in zip(entries, exits, direction)]
+        for number, name in enumerate(('returns', 'length', 'drawdown', 'mae', 'efficiency',
+                'volatility')):
+            np.testing.assert_allclose(getattr(stats, name), [row[number] for row in expected],
+                rtol=1e-12, atol=1e-15, err_msg=name)
+
+    def test_long_and_short(self):
+        rng = np.random.default_rng(1)
+        # repeated closes make ties for the best close so far
+        close = np.round(100 * np.exp(np.cumsum(rng.normal(0.0, 0.02, 300))), 0)
+        signal = rng.choice([-1, 0, 0, 0, 1], len(close))
+        entries, exits = trades.pair_trades(signal, 3)
+        self.assertScanned(close, entries, exits, 1)
+        entries, exits, direction = trades.pair_long_short(signal, 3)
+        self.assertScanned(close, entries, exits, direction)
+        self.assertTrue((direction < 0).any())
+
+    def test_batches(self):
+        # overlapping trades split across batches of a few bars
+        close = 100 * np.exp(np.cumsum(np.random.default_rng(2).normal(0.0, 0.01, 200)))
+        entries = np.arange(0, 150, 3)
+        exits = entries + 1 + np.arange(len(entries)) % 40
+        size = trades.BLOCK_BARS
+        try:
+            trades.BLOCK_BARS = 16
+            self.assertScanned(close, entries, exits, np.where(entries % 2, 1, -1))
+        finally:
+            trades.BLOCK_BARS = size
+
+if __name__ == '__main__':
+    unittest.main()